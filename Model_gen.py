@@ -1,12 +1,18 @@
 import pandas as pd
 import numpy as np
+import argparse
 import os
+import time
 import joblib
+from concurrent.futures import ProcessPoolExecutor
 
 from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import (
+    RandomForestClassifier,
+    HistGradientBoostingClassifier
+)
 from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report
 
 # ======================================================
 # CONFIGURATION
@@ -35,6 +41,21 @@ def detect_market_state(row):
     else:
         return "Calm Bear"
 
+
+def label_market_state(drawdown, volatility, ma_short, ma_long):
+    """
+    detect_market_state for whole columns / matrices at once.
+    """
+    return np.select(
+        [
+            np.asarray(drawdown) <= CRASH_DRAWDOWN,
+            np.asarray(volatility) >= HIGH_VOL_THRESHOLD,
+            np.asarray(ma_short) > np.asarray(ma_long)
+        ],
+        ["Crash", "High Volatility", "Calm Bull"],
+        default="Calm Bear"
+    ).astype(object)
+
 # ======================================================
 # PROCESS SINGLE STOCK FILE
 # ======================================================
@@ -67,30 +88,45 @@ def process_stock(file_path):
     df.dropna(inplace=True)
 
     # Market state label
-    df["market_state"] = df.apply(detect_market_state, axis=1)
+    df["market_state"] = label_market_state(
+        df["drawdown"], df["volatility"], df["ma_short"], df["ma_long"]
+    )
 
     return df
 
 # ======================================================
 # LOAD ALL STOCK FILES
 # ======================================================
-all_data = []
-
-for file in os.listdir(DATA_FOLDER):
-    if file.endswith(".csv"):
-        try:
-            print(f"Processing {file}")
-            stock_df = process_stock(os.path.join(DATA_FOLDER, file))
-            if not stock_df.empty:
-                all_data.append(stock_df)
-        except Exception as e:
-            print(f"Skipping {file}: {e}")
-
-if len(all_data) == 0:
-    raise RuntimeError("❌ No valid stock files processed")
-
-df = pd.concat(all_data, ignore_index=True)
-print(f"\n✅ Total samples: {len(df)}")
+def load_dataset(data_folder=DATA_FOLDER, panel=False):
+    """
+    panel=True featurizes every file in one pass (panel.py); the
+    rows and feature values are the same, only the CSV columns that
+    training never reads are left out.
+    """
+    if panel:
+        from panel import load_panel, panel_dataset
+        df = panel_dataset(load_panel(data_folder))
+        print(f"\n✅ Total samples: {len(df)} (panel)")
+        return df
+
+    all_data = []
+
+    for file in sorted(os.listdir(data_folder)):
+        if file.endswith(".csv"):
+            try:
+                print(f"Processing {file}")
+                stock_df = process_stock(os.path.join(data_folder, file))
+                if not stock_df.empty:
+                    all_data.append(stock_df)
+            except Exception as e:
+                print(f"Skipping {file}: {e}")
+
+    if len(all_data) == 0:
+        raise RuntimeError("❌ No valid stock files processed")
+
+    df = pd.concat(all_data, ignore_index=True)
+    print(f"\n✅ Total samples: {len(df)}")
+    return df
 
 # ======================================================
 # FEATURES & TARGET
@@ -103,56 +139,222 @@ FEATURES = [
     "drawdown"
 ]
 
-X = df[FEATURES]
-y = df["market_state"]
+ARTIFACT_FILES = {
+    "model": "market_state_model.pkl",
+    "scaler": "scaler.pkl",
+    "encoder": "label_encoder.pkl"
+}
 
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+# ======================================================
+# CANDIDATE MODELS
+# ======================================================
+DEFAULT_MODEL = "rf300"
+
+CANDIDATES = {
+    "rf300": lambda: RandomForestClassifier(
+        n_estimators=300, max_depth=6,
+        random_state=42, class_weight="balanced"
+    ),
+    "rf100": lambda: RandomForestClassifier(
+        n_estimators=100, max_depth=6,
+        random_state=42, class_weight="balanced"
+    ),
+    "rf50": lambda: RandomForestClassifier(
+        n_estimators=50, max_depth=6,
+        random_state=42, class_weight="balanced"
+    ),
+    "hgb": lambda: HistGradientBoostingClassifier(
+        max_iter=100, max_depth=6,
+        random_state=42, class_weight="balanced"
+    )
+}
+
+# live cycle scores ≈ 126 fetched bars − 50 warm-up rows per symbol
+LIVE_BATCH_ROWS = 76
+LATENCY_BUDGET_MS = 20.0
+
+
+def build_model(name=DEFAULT_MODEL):
+    return CANDIDATES[name]()
 
 # ======================================================
-# MODEL TRAINING (TIME-SERIES SAFE)
+# FOLD EVALUATION (RUNS IN WORKER PROCESSES)
 # ======================================================
-tscv = TimeSeriesSplit(n_splits=5)
+def evaluate_fold(name, X, y, train_idx, test_idx, keep_model=False):
+    scaler = StandardScaler().fit(X[train_idx])
+    model = build_model(name)
+    model.fit(scaler.transform(X[train_idx]), y[train_idx])
+
+    y_pred = model.predict(scaler.transform(X[test_idx]))
+    acc = accuracy_score(y[test_idx], y_pred)
+
+    return acc, (model if keep_model else None), y_pred
+
+
+def measure_latency(model, X, rows=LIVE_BATCH_ROWS, repeats=30):
+    """
+    Median wall time (ms) of one predict() on a live-sized batch,
+    i.e. what a single symbol costs inside run_cycle.
+    """
+    batch = X[:rows]
+    model.predict(batch)                       # warm-up
+
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        model.predict(batch)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+    return float(np.median(timings))
+
+
+def search_models(X, y, names, n_splits=5, n_jobs=None):
+    """
+    Every (candidate, fold) fit is submitted to a process pool at
+    once; latency is then measured serially on each candidate's
+    last-fold model so timings are not skewed by the pool.
+    """
+    splits = list(TimeSeriesSplit(n_splits=n_splits).split(X))
+    last = len(splits) - 1
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        futures = {
+            (name, k): pool.submit(
+                evaluate_fold, name, X, y, tr, te, k == last
+            )
+            for name in names
+            for k, (tr, te) in enumerate(splits)
+        }
+        results = {key: f.result() for key, f in futures.items()}
+
+    report = []
+    for name in names:
+        accs = [results[(name, k)][0] for k in range(len(splits))]
+        model = results[(name, last)][1]
+        test_idx = splits[last][1]
+        scaled = StandardScaler().fit(X[splits[last][0]]).transform(X[test_idx])
+
+        report.append({
+            "model": name,
+            "accuracy": float(np.mean(accs)),
+            "fold_accuracy": [round(a, 4) for a in accs],
+            "latency_ms": measure_latency(model, scaled),
+            "last_fold_pred": results[(name, last)][2]
+        })
+
+    return report, splits
+
+
+def select_model(report, latency_budget_ms=LATENCY_BUDGET_MS):
+    """
+    Most accurate candidate within the latency budget; the fastest
+    one if nothing fits.
+    """
+    within = [r for r in report if r["latency_ms"] <= latency_budget_ms]
+    if within:
+        return max(within, key=lambda r: r["accuracy"])
+    return min(report, key=lambda r: r["latency_ms"])
 
-model = RandomForestClassifier(
-    n_estimators=300,
-    max_depth=6,
-    random_state=42,
-    class_weight="balanced"
-)
+# ======================================================
+# SAVE MODEL (EXTRACTION)
+# ======================================================
+def save_artifacts(model, scaler, label_encoder, folder="."):
+    """
+    Each file is written to a temp name and renamed into place, so
+    a reader never sees a half-written pickle.
+    """
+    os.makedirs(folder, exist_ok=True)
+
+    for name, obj in (
+        ("model", model),
+        ("scaler", scaler),
+        ("encoder", label_encoder)
+    ):
+        path = os.path.join(folder, ARTIFACT_FILES[name])
+        tmp = path + ".tmp"
+        joblib.dump(obj, tmp)
+        os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Train the market-regime model"
+    )
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    parser.add_argument("--candidates", nargs="+", default=list(CANDIDATES),
+                        choices=list(CANDIDATES))
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-jobs", type=int, default=None,
+                        help="worker processes (default: all CPUs)")
+    parser.add_argument("--latency-budget-ms", type=float,
+                        default=LATENCY_BUDGET_MS)
+    parser.add_argument("--output", default=".")
+    parser.add_argument("--panel", action="store_true",
+                        help="featurize all files in one vectorized pass")
+    args = parser.parse_args()
+
+    # time-ordered across symbols so every fold tests on the future
+    df = load_dataset(args.data_folder, panel=args.panel).sort_values(
+        "Date", kind="stable"
+    )
 
-labels = np.arange(len(label_encoder.classes_))
+    X_df = df[FEATURES]
+    X = X_df.to_numpy()
+    y = df["market_state"]
 
-for fold, (train_idx, test_idx) in enumerate(tscv.split(X_scaled), 1):
-    print(f"\nFold {fold}")
+    label_encoder = LabelEncoder()
+    y_encoded = label_encoder.fit_transform(y)
 
-    X_train, X_test = X_scaled[train_idx], X_scaled[test_idx]
-    y_train, y_test = y_encoded[train_idx], y_encoded[test_idx]
+    # ======================================================
+    # MODEL SEARCH (TIME-SERIES SAFE, CONCURRENT FOLDS)
+    # ======================================================
+    t0 = time.perf_counter()
+    report, splits = search_models(
+        X, y_encoded, args.candidates, args.folds, args.n_jobs
+    )
+    print(f"\nSearch finished in {time.perf_counter() - t0:.1f}s\n")
+
+    print(f"{'model':<8}{'accuracy':>10}{'latency ms':>12}  folds")
+    for r in report:
+        print(
+            f"{r['model']:<8}{r['accuracy']:>10.4f}"
+            f"{r['latency_ms']:>12.2f}  {r['fold_accuracy']}"
+        )
 
-    model.fit(X_train, y_train)
-    y_pred = model.predict(X_test)
+    best = select_model(report, args.latency_budget_ms)
+    print(
+        f"\n✅ Selected {best['model']} "
+        f"(budget {args.latency_budget_ms} ms/symbol)"
+    )
 
+    labels = np.arange(len(label_encoder.classes_))
     print(
         classification_report(
-            y_test,
-            y_pred,
+            y_encoded[splits[-1][1]],
+            best["last_fold_pred"],
             labels=labels,
             target_names=label_encoder.classes_,
             zero_division=0
         )
     )
 
-# ======================================================
-# SAVE MODEL (EXTRACTION)
-# ======================================================
-joblib.dump(model, "market_state_model.pkl")
-joblib.dump(scaler, "scaler.pkl")
-joblib.dump(label_encoder, "label_encoder.pkl")
+    # ======================================================
+    # FINAL FIT ON ALL DATA
+    # ======================================================
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X_df)
+
+    model = build_model(best["model"])
+    model.fit(X_scaled, y_encoded)
+
+    save_artifacts(model, scaler, label_encoder, args.output)
+
+    print("\n✅ Model artifacts saved:")
+    print(" - market_state_model.pkl")
+    print(" - scaler.pkl")
+    print(" - label_encoder.pkl")
+
 
-print("\n✅ Model artifacts saved:")
-print(" - market_state_model.pkl")
-print(" - scaler.pkl")
-print(" - label_encoder.pkl")
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,27 @@ from flask import (
     request,
     redirect,
     session,
-    jsonify
+    jsonify,
+    Response
 )
 import threading
 import time
 import datetime
 import numpy as np
 
+from config import (
+    ADMIN_USERS,
+    FEATURE_FLAGS,
+    HISTORY_CAPACITY,
+    HISTORY_SPILL_DIR,
+    LIVE_CYCLE_SECONDS
+)
 from trading_engine import AITradingEngine
+from explain import Explanation
+from utils import INTERVAL_SECONDS
+from result_store import ResultStore, wants_msgpack, pack, MSGPACK_MIMETYPE
+from portfolio_store import PortfolioStore
+from profiler import CycleProfiler
 
 # ======================================
 # APP INIT
@@ -23,7 +36,19 @@ app.secret_key = "ai_trading_secret"
 # GLOBAL LIVE STATE
 # ======================================
 live_engines = {}
-live_results = {}
+live_results = ResultStore(
+    history_size=HISTORY_CAPACITY,
+    spill_dir=HISTORY_SPILL_DIR if FEATURE_FLAGS["HISTORY_SPILL"] else None
+)
+# key → {"cycles", "cycle_sec", "last_end"} of the live loop
+cycle_stats = {}
+# key → CycleProfiler armed via /admin/profile (absent = not profiled)
+engine_profilers = {}
+# paper portfolios survive restarts (snapshot + write-ahead log);
+# opened by startup(), never at import
+portfolio_store = None
+_startup_lock = threading.Lock()
+_started = False
 
 # ======================================
 # JSON SAFE CONVERTER (CRITICAL)
@@ -47,8 +72,63 @@ def make_json_safe(obj):
     if isinstance(obj, (datetime.datetime, datetime.date)):
         return obj.isoformat()
 
+    if isinstance(obj, Explanation):
+        return obj.render()
+
     return obj
 
+# ======================================
+# VERSIONED RESPONSES (ETAG / MSGPACK)
+# ======================================
+def versioned_response(payload, etag=None):
+    if wants_msgpack(request):
+        resp = Response(pack(payload), mimetype=MSGPACK_MIMETYPE)
+    else:
+        resp = jsonify(payload)
+
+    if etag is not None:
+        resp.set_etag(etag)
+        # force browsers to revalidate so unchanged polls become 304s
+        resp.headers["Cache-Control"] = "no-cache"
+        resp.vary.add("Accept")
+
+    return resp
+
+
+def not_modified(etag):
+    if etag is None or not request.if_none_match.contains(etag):
+        return None
+
+    resp = Response(status=304)
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+# ======================================
+# STARTUP (ONCE PER SERVING PROCESS)
+# ======================================
+def startup():
+    """
+    Open the portfolio store and resume the engines that were live.
+    Runs on the first request of the process that serves, so it is
+    the same under flask run, gunicorn and app.run, with or without
+    the debug reloader (whose watcher process never serves).
+    """
+    global portfolio_store, _started
+    with _startup_lock:
+        if _started:
+            return
+        if FEATURE_FLAGS["DURABLE_PORTFOLIOS"] and portfolio_store is None:
+            portfolio_store = PortfolioStore()
+        _started = True
+    resume_engines()
+
+
+@app.before_request
+def run_startup():
+    if not _started:
+        startup()
+
 # ======================================
 # AUTH GUARD
 # ======================================
@@ -71,6 +151,12 @@ def require_login():
     if request.path in protected and "user" not in session:
         return redirect("/login")
 
+    if request.path.startswith("/admin"):
+        if "user" not in session:
+            return redirect("/login")
+        if session["user"] not in ADMIN_USERS:
+            return jsonify({"status": "error", "error": "admin only"}), 403
+
 # ======================================
 # LANDING
 # ======================================
@@ -144,21 +230,64 @@ def start_live():
     if key in live_engines:
         return jsonify({"status": "already_running"})
 
-    engine = AITradingEngine(symbols)
+    # optional bar size, e.g. "5m" for intraday engines
+    interval = request.form.get("interval", "1d")
+    if interval not in INTERVAL_SECONDS:
+        return jsonify({"status": "error", "error": "unsupported interval"})
+
+    launch_engine(key, interval)
+    return jsonify({"status": "started"})
+
+
+def launch_engine(key, interval="1d"):
+    engine = AITradingEngine(key.split("|"), interval=interval)
+
+    if portfolio_store is not None:
+        saved = portfolio_store.start(
+            key, interval=interval, cash=engine.trader.cash
+        )
+        if saved is not None:
+            engine.trader.restore(saved)
+        engine.trader.journal = portfolio_store.journal(key)
+
     live_engines[key] = engine
 
     def run():
         while key in live_engines:
             try:
-                live_results[key] = engine.run_cycle()
-                print("🔁 LIVE UPDATE:", live_results[key])
-                time.sleep(8)
+                t0 = time.perf_counter()
+                profiler = engine_profilers.get(key)
+                if profiler is None or profiler.finished.is_set():
+                    result = engine.run_cycle()
+                else:
+                    result = profiler.run(engine.run_cycle)
+
+                version = live_results.publish(key, make_json_safe(result))
+                stats = cycle_stats.setdefault(key, {"cycles": 0})
+                stats["cycles"] += 1
+                stats["cycle_sec"] = round(time.perf_counter() - t0, 4)
+                stats["last_end"] = time.time()
+
+                print("🔁 LIVE UPDATE:", key, "v", version)
+                time.sleep(LIVE_CYCLE_SECONDS)
             except Exception as e:
                 print("⚠️ LIVE ERROR:", e)
                 time.sleep(5)
 
     threading.Thread(target=run, daemon=True).start()
-    return jsonify({"status": "started"})
+
+
+def resume_engines():
+    """
+    Relaunch the engines that were live when the app last stopped,
+    with their saved cash / positions.
+    """
+    if portfolio_store is None:
+        return
+    for key, state in list(portfolio_store.engines.items()):
+        if key not in live_engines:
+            launch_engine(key, state["interval"])
+            print("♻️ RESUMED:", key, "position", state["position"])
 
 # ======================================
 # LIVE STATUS (SAFE JSON)
@@ -168,7 +297,9 @@ def live_status(key):
     if key not in live_engines:
         return jsonify({"running": False, "data": None})
 
-    if key not in live_results:
+    # one lookup: a concurrent /live/stop can drop the entry any time
+    entry = live_results.entry(key)
+    if entry is None:
         return jsonify({
             "running": True,
             "data": {
@@ -191,12 +322,23 @@ def live_status(key):
             }
         })
 
-    safe_data = make_json_safe(live_results[key])
+    cached = not_modified(entry.etag)
+    if cached is not None:
+        return cached
 
-    return jsonify({
+    # ?since=<version> → only fields changed after that version
+    since = request.args.get("since", type=int)
+    if since is not None:
+        delta = live_results.delta(key, since)
+        if delta is None:
+            return jsonify({"running": False, "data": None})
+        return versioned_response({"running": True, **delta}, entry.etag)
+
+    return versioned_response({
         "running": True,
-        "data": safe_data
-    })
+        "version": entry.version,
+        "data": entry.data
+    }, entry.etag)
 
 # ======================================
 # STOP LIVE TRADING
@@ -206,8 +348,93 @@ def stop_live():
     key = request.form["symbol"]
     live_engines.pop(key, None)
     live_results.pop(key, None)
+    engine_profilers.pop(key, None)
+    cycle_stats.pop(key, None)
+    if portfolio_store is not None:
+        portfolio_store.stop(key)
     return jsonify({"status": "stopped"})
 
+# ======================================
+# PROFILING (ADMIN)
+# ======================================
+@app.route("/admin/profile/<key>", methods=["POST"])
+def profile_start(key):
+    """
+    Profile the next N cycles of a live engine:
+    cycles=3, mode=sample|cprofile, memory=1 (tracemalloc).
+    """
+    if not FEATURE_FLAGS.get("PROFILING", False):
+        return jsonify({"status": "error", "error": "profiling disabled"}), 403
+    if key not in live_engines:
+        return jsonify({"status": "error", "error": "engine not running"}), 404
+
+    current = engine_profilers.get(key)
+    if current is not None and not current.finished.is_set():
+        return jsonify({"status": "busy", "profile": current.status()}), 409
+
+    try:
+        profiler = CycleProfiler(
+            cycles=request.values.get("cycles", 1, type=int),
+            mode=request.values.get("mode", "sample"),
+            memory=request.values.get("memory", "0") in ("1", "true")
+        )
+    except ValueError as e:
+        return jsonify({"status": "error", "error": str(e)}), 400
+
+    engine_profilers[key] = profiler
+    return jsonify({"status": "armed", "profile": profiler.status()})
+
+
+@app.route("/admin/profile/<key>", methods=["GET"])
+def profile_report(key):
+    """
+    ?format=json (default) | collapsed (flamegraph input) | text
+    """
+    profiler = engine_profilers.get(key)
+    if profiler is None:
+        return jsonify({"status": "error", "error": "no profile"}), 404
+
+    fmt = request.args.get("format", "json")
+    if fmt != "json" and not profiler.finished.is_set():
+        return jsonify({"status": "running", "profile": profiler.status()}), 202
+
+    if fmt == "collapsed":
+        return Response(
+            profiler.collapsed(), mimetype="text/plain",
+            headers={"Content-Disposition":
+                     f"attachment; filename=profile-{profiler.mode}.folded"}
+        )
+    if fmt == "text":
+        return Response(profiler.text(), mimetype="text/plain")
+
+    return jsonify({"status": "ok", "profile": profiler.report()})
+
+@app.route("/admin/stats")
+def admin_stats():
+    """
+    Live loop health: threads, and per engine the last cycle time
+    and lag (seconds a cycle is overdue beyond the normal pause).
+    """
+    now = time.time()
+    engines = {}
+    for key in list(live_engines):
+        stats = cycle_stats.get(key)
+        if stats is None:
+            engines[key] = {"cycles": 0}
+            continue
+        engines[key] = {
+            "cycles": stats["cycles"],
+            "cycle_sec": stats["cycle_sec"],
+            "lag_sec": round(
+                max(0.0, now - stats["last_end"] - LIVE_CYCLE_SECONDS), 3
+            )
+        }
+
+    return jsonify({
+        "threads": threading.active_count(),
+        "engines": engines
+    })
+
 # ======================================
 # LOGOUT
 # ======================================
@@ -222,19 +449,71 @@ def live_graphs():
 
 @app.route("/graphs/data/<key>")
 def graph_data(key):
-    if key not in live_results:
+    entry = live_results.entry(key)
+    if entry is None:
         return jsonify({"active": False, "stocks": []})
 
-    data = live_results[key]
+    cached = not_modified(entry.etag)
+    if cached is not None:
+        return cached
 
-    return jsonify({
+    data = entry.data
+    payload = {
         "active": True,
+        "version": entry.version,
         "best_stock": data["best_stock"],
         "price": data["portfolio"].get("price"),
         "volatility": data["risk"]["volatility"],
         "drawdown": data["risk"]["max_drawdown"],
         "allocation": data["allocation"]
-    })
+    }
+
+    # ?since=<version> → every point recorded after that version
+    since = request.args.get("since", type=int)
+    if since is not None:
+        payload["points"] = live_results.points(key, since) or []
+
+    return versioned_response(payload, entry.etag)
+
+# ring-buffer columns a history query can downsample on
+HISTORY_SERIES = ("price", "allocation", "volatility", "drawdown",
+                  "portfolio_value")
+
+
+@app.route("/graphs/history/<key>")
+def graph_history(key):
+    entry = live_results.entry(key)
+    if entry is None:
+        return jsonify({"active": False, "points": []})
+
+    cached = not_modified(entry.etag)
+    if cached is not None:
+        return cached
+
+    method = request.args.get("method", "lttb")
+    if method not in ("lttb", "minmax"):
+        method = "lttb"
+
+    by = request.args.get("by", "price")
+    if by not in HISTORY_SERIES:
+        by = "price"
+
+    points = live_results.history(
+        key,
+        start=request.args.get("start", type=float),
+        end=request.args.get("end", type=float),
+        max_points=request.args.get("points", 300, type=int),
+        method=method,
+        by=by
+    )
+    if points is None:
+        return jsonify({"active": False, "points": []})
+
+    return versioned_response({
+        "active": True,
+        "version": entry.version,
+        "points": points
+    }, entry.etag)
 
 @app.route("/risk")
 def risk_page():
@@ -242,10 +521,11 @@ def risk_page():
 
 @app.route("/risk/status/<key>")
 def risk_status(key):
-    if key not in live_results:
+    entry = live_results.entry(key)
+    if entry is None:
         return jsonify({"running": False})
 
-    data = live_results[key]
+    data = entry.data
 
     # Safe extraction
     risk = data.get("risk", {})
@@ -281,4 +561,5 @@ def portfolio_health():
 # RUN
 # ======================================
 if __name__ == "__main__":
+    # engines resume on the first request (startup())
     app.run(debug=True, threaded=True)
@@ -1,23 +1,151 @@
 import numpy as np
 
-def backtest(df, equity_weight):
-    df = df.copy()
-    df["strategy_return"] = df["return"] * equity_weight
-    df["equity_curve"] = (1 + df["strategy_return"]).cumprod()
+ANNUALIZATION = 252
+DEFAULT_CHUNK = 65536
+
+
+class BacktestAccumulator:
+    """
+    PURPOSE:
+    Single-pass backtest metrics without materialising an equity
+    curve. Feed strategy returns bar by bar (update) or in chunks
+    (update_many); state is a handful of numbers per series, so
+    memory stays constant however long the history is.
+
+    Works on one series (scalars) or k series at once when chunks
+    are shaped (bars, k). NaN returns (listing gaps) are skipped.
+    """
+
+    def __init__(self, n_series=None, annualization=ANNUALIZATION):
+        shape = () if n_series is None else (n_series,)
+        self.annualization = annualization
+
+        self.count = np.zeros(shape)
+        self.mean = np.zeros(shape)
+        self._m2 = np.zeros(shape)
+
+        # downside = negative returns only (Sortino denominator)
+        self.down_count = np.zeros(shape)
+        self.down_mean = np.zeros(shape)
+        self._down_m2 = np.zeros(shape)
+
+        self.equity = np.ones(shape)
+        self.peak = np.ones(shape)
+        self.max_drawdown = np.zeros(shape)
+
+    # ======================================================
+    # UPDATE
+    # ======================================================
+    def update(self, ret):
+        self.update_many(np.asarray(ret, dtype=float)[np.newaxis])
+
+    def update_many(self, returns, chunk_size=DEFAULT_CHUNK):
+        returns = np.asarray(returns, dtype=float)
+        for start in range(0, len(returns), chunk_size):
+            self._update_chunk(returns[start:start + chunk_size])
+
+    def _update_chunk(self, x):
+        if len(x) == 0:
+            return
+
+        valid = ~np.isnan(x)
+        filled = np.where(valid, x, 0.0)
+
+        # equity / peak / drawdown (chunk-sized temporaries only)
+        curve = self.equity * np.cumprod(1 + filled, axis=0)
+        peaks = np.maximum(
+            self.peak, np.maximum.accumulate(curve, axis=0)
+        )
+        dd = (curve / peaks - 1).min(axis=0)
+
+        self.equity = curve[-1]
+        self.peak = peaks[-1]
+        self.max_drawdown = np.minimum(self.max_drawdown, dd)
+
+        # Chan et al. parallel merge of (count, mean, M2)
+        self.count, self.mean, self._m2 = _merge_moments(
+            self.count, self.mean, self._m2, x, valid
+        )
 
-    cagr = df["equity_curve"].iloc[-1] ** (252 / len(df)) - 1
-    sharpe = (
-        df["strategy_return"].mean() /
-        df["strategy_return"].std()
-    ) * np.sqrt(252)
+        down = valid & (filled < 0)
+        self.down_count, self.down_mean, self._down_m2 = _merge_moments(
+            self.down_count, self.down_mean, self._down_m2, x, down
+        )
+
+    # ======================================================
+    # QUERY
+    # ======================================================
+    @property
+    def std(self):
+        return _sample_std(self.count, self._m2)
+
+    @property
+    def downside_std(self):
+        return _sample_std(self.down_count, self._down_m2)
+
+    def metrics(self):
+        ann = self.annualization
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cagr = np.where(
+                self.count > 0,
+                self.equity ** (ann / np.maximum(self.count, 1)) - 1,
+                0.0
+            )
+            sharpe = self.mean / self.std * np.sqrt(ann)
+            sortino = self.mean / self.downside_std * np.sqrt(ann)
+            calmar = np.where(
+                self.max_drawdown < 0, cagr / np.abs(self.max_drawdown), np.nan
+            )
+
+        return {
+            "bars": self.count,
+            "equity": self.equity,
+            "CAGR": cagr,
+            "Sharpe": sharpe,
+            "Sortino": sortino,
+            "Max Drawdown": self.max_drawdown,
+            "Calmar": calmar
+        }
+
+
+def _merge_moments(n_a, mean_a, m2_a, x, mask):
+    n_b = mask.sum(axis=0)
+    if not np.any(n_b):
+        return n_a, mean_a, m2_a
+
+    safe_nb = np.maximum(n_b, 1)
+    xb = np.where(mask, x, 0.0)
+    mean_b = xb.sum(axis=0) / safe_nb
+    m2_b = (np.where(mask, x - mean_b, 0.0) ** 2).sum(axis=0)
+
+    n = n_a + n_b
+    safe_n = np.maximum(n, 1)
+    delta = mean_b - mean_a
+
+    mean = mean_a + delta * n_b / safe_n
+    m2 = m2_a + m2_b + delta ** 2 * n_a * n_b / safe_n
+    return n, mean, m2
+
+
+def _sample_std(count, m2):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(count > 1, np.sqrt(m2 / (count - 1)), np.nan)
+
+
+def backtest(df, equity_weight):
+    """
+    df: feature frame with a 'return' column, or a NumPy array of
+    returns. No copies of the frame are made.
+    """
+    returns = df["return"].to_numpy() if hasattr(df, "columns") else df
 
-    max_dd = (
-        df["equity_curve"] /
-        df["equity_curve"].cummax() - 1
-    ).min()
+    acc = BacktestAccumulator()
+    acc.update_many(np.asarray(returns, dtype=float) * equity_weight)
+    m = acc.metrics()
 
     return {
-        "CAGR": round(cagr, 2),
-        "Sharpe": round(sharpe, 2),
-        "Max Drawdown": round(max_dd, 2)
+        "CAGR": round(float(m["CAGR"]), 2),
+        "Sharpe": round(float(m["Sharpe"]), 2),
+        "Max Drawdown": round(float(m["Max Drawdown"]), 2)
     }
@@ -0,0 +1,152 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+FLOAT_COLUMNS = [
+    "Close",
+    "Volume",
+    "return",
+    "volatility",
+    "ma_short",
+    "ma_long",
+    "drawdown",
+    "momentum",
+    "trend"
+]
+
+REGIME_CATEGORIES = [
+    "Calm Bear",
+    "Calm Bull",
+    "Crash",
+    "High Volatility"
+]
+
+
+# ======================================================
+# COMPACT FRAME CONVERSION
+# ======================================================
+def to_compact(df, inplace=False):
+    """
+    Opt-in compact layout for per-symbol frames:
+    - float32 price / volume / feature columns
+    - int64 epoch-second dates
+    - categorical market_state (int8 codes + one shared category list)
+    Columns are replaced one at a time; the rest of the frame is
+    not copied when inplace=True.
+    """
+    if df is None or df.empty:
+        return df
+    if not inplace:
+        df = df.copy(deep=False)
+
+    if "Date" in df and not np.issubdtype(df["Date"].dtype, np.integer):
+        df["Date"] = epoch_seconds(df["Date"])
+
+    for col in FLOAT_COLUMNS:
+        if col in df and df[col].dtype != np.float32:
+            df[col] = df[col].astype(np.float32)
+
+    if "market_state" in df and not isinstance(
+        df["market_state"].dtype, pd.CategoricalDtype
+    ):
+        df["market_state"] = pd.Categorical(
+            df["market_state"], categories=REGIME_CATEGORIES
+        )
+
+    return df
+
+
+def epoch_seconds(dates):
+    """
+    Any datetime-like column → int64 seconds since the Unix epoch
+    (UTC for tz-aware inputs).
+    """
+    index = pd.DatetimeIndex(dates)
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+    return index.as_unit("s").asi8
+
+
+def regimes_from_codes(codes, classes):
+    """
+    Model predictions (label-encoded ints) → categorical regimes
+    without materialising one Python string per row.
+    """
+    labels = pd.Categorical.from_codes(codes, categories=list(classes))
+    return labels.set_categories(
+        REGIME_CATEGORIES + [c for c in classes if c not in REGIME_CATEGORIES]
+    )
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+# ======================================================
+# MEMORY REPORT
+# ======================================================
+def memory_report(n_symbols=500, data_folder="data", bars=None):
+    """
+    Build feature frames for n_symbols (data/ files are reused
+    round-robin when there are fewer) in the default and compact
+    layouts and report bytes held.
+    """
+    from utils import compute_features, predict_regime
+
+    files = sorted(
+        f for f in os.listdir(data_folder)
+        if f.endswith(".csv") and f != "stock_metadata.csv"
+    )
+
+    base = {}
+    for f in files:
+        raw = pd.read_csv(
+            os.path.join(data_folder, f),
+            usecols=["Date", "Close", "Volume"],
+            parse_dates=["Date"]
+        )
+        if bars:
+            raw = raw.tail(bars)
+        df = predict_regime(compute_features(raw))
+        if df is not None and not df.empty:
+            base[f] = df
+
+    full_bytes = 0
+    compact_bytes = 0
+    rows = 0
+
+    names = list(base)
+    for i in range(n_symbols):
+        df = base[names[i % len(names)]]
+        full_bytes += frame_bytes(df)
+        compact_bytes += frame_bytes(to_compact(df))
+        rows += len(df)
+
+    return {
+        "symbols": n_symbols,
+        "rows": rows,
+        "default_mb": round(full_bytes / 2**20, 1),
+        "compact_mb": round(compact_bytes / 2**20, 1),
+        "saving_pct": round(100 * (1 - compact_bytes / full_bytes), 1)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Memory held by per-symbol frames, default vs compact"
+    )
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=None,
+                        help="bars per symbol (default: full history)")
+    args = parser.parse_args()
+
+    report = memory_report(args.symbols, bars=args.bars)
+
+    print("\n✅ Memory report")
+    for k, v in report.items():
+        print(f" - {k}: {v}")
@@ -1,6 +1,54 @@
+import os
+
 FEATURE_FLAGS = {
     "AUTO_TRADING": True,
     "STRESS_TESTING": True,
     "BACKTESTING": True,
-    "LOGGING": True
+    "LOGGING": True,
+    "HISTORY_SPILL": False,
+    "COMPACT_FRAMES": False,
+    "INDEX_REGIME": False,
+    "DURABLE_PORTFOLIOS": True,
+    "ORDER_EXECUTION": False,
+    "UNIVERSE_RISK": True,
+    "PROFILING": False
 }
+
+# ======================================================
+# DEPLOYMENT (PERCEPTRON_* env vars, read once at import)
+# ======================================================
+# Logins allowed on /admin/* (profiling, loop stats); empty → nobody
+ADMIN_USERS = frozenset(
+    user.strip()
+    for user in os.environ.get("PERCEPTRON_ADMIN_USERS", "").split(",")
+    if user.strip()
+)
+
+# Durable portfolio state (portfolio_store) and the live trade log
+STATE_DIR = os.environ.get("PERCEPTRON_STATE_DIR", "logs/state")
+TRADE_LOG_FILE = os.environ.get("PERCEPTRON_TRADE_LOG", "logs/trades.csv")
+
+# Pause between live engine cycles (app.py run loop)
+LIVE_CYCLE_SECONDS = float(os.environ.get("PERCEPTRON_CYCLE_SECONDS", 8))
+
+# Live chart history (per engine ring buffer)
+HISTORY_CAPACITY = 2048
+HISTORY_SPILL_DIR = "logs/history"
+
+# Market regime: breadth weighting ("equal", "industry", "cap")
+MARKET_BREADTH_WEIGHTING = "equal"
+
+# Market data fetch (market_data.ResilientSource)
+FETCH_DEADLINE = 5.0           # seconds per symbol, retries included
+FETCH_RETRIES = 2
+FETCH_BACKOFF = 0.25           # first retry delay, doubled each time
+FETCH_MAX_BACKOFF = 2.0
+FETCH_MAX_IN_FLIGHT = 16       # per provider, abandoned calls included
+CYCLE_FETCH_BUDGET = 30.0      # seconds for all fetches of one cycle
+BREAKER_FAILURES = 5           # consecutive failures → open
+BREAKER_RESET = 60.0           # seconds before a half-open trial
+
+# Order execution simulator (execution.py)
+EXEC_PARTICIPATION = 0.1       # max share of a bar's volume per symbol
+EXEC_SPREAD_BPS = 5.0          # quoted spread; half is paid per fill
+EXEC_IMPACT_BPS = 50.0         # impact at 100% participation (sqrt law)
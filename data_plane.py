@@ -0,0 +1,344 @@
+import argparse
+import json
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+PLANE_NAME = "perceptron"
+KEEP_VERSIONS = 2            # old snapshots kept for slow readers
+ALIGN = 64
+LOOKBACK_BARS = 126
+
+# manifest = [seq:int64][version:int64]; seq is odd while writing
+_MANIFEST = struct.Struct("qq")
+
+
+def _attach(name):
+    """
+    Attach without letting this process's resource tracker unlink
+    the segment at exit (only the publisher owns it).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:        # Python < 3.13 has no track=
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _block_name(plane, version):
+    return f"{plane}-v{version}"
+
+
+def _create(name, size):
+    """
+    Create a segment; a leftover one of the same name belongs to a
+    crashed publisher (the manifest is ours now), so it is unlinked
+    and created afresh. Readers still mapping it keep their view.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        old = shared_memory.SharedMemory(name=name)
+        old.close()
+        old.unlink()
+        return shared_memory.SharedMemory(name=name, create=True, size=size)
+
+
+def _columns(df):
+    """
+    Frame → {column: ndarray} with dates as int64 ns and
+    market_state as int8 codes (categories kept separately).
+    """
+    arrays = {}
+    categories = {}
+
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            arrays[col] = s.cat.codes.to_numpy(dtype=np.int8)
+            categories[col] = [str(c) for c in s.cat.categories]
+        elif col == "Date" and np.issubdtype(s.dtype, np.integer):
+            # compact frames carry epoch seconds
+            arrays[col] = s.to_numpy(dtype=np.int64) * 10**9
+        elif col == "Date":
+            arrays[col] = pd.DatetimeIndex(s).as_unit("ns").asi8
+        elif s.dtype == object:
+            cat = pd.Categorical(s)
+            arrays[col] = cat.codes.astype(np.int8)
+            categories[col] = [str(c) for c in cat.categories]
+        else:
+            arrays[col] = np.ascontiguousarray(s.to_numpy())
+
+    return arrays, categories
+
+
+# ======================================================
+# PUBLISHER (ONE LOADER PROCESS)
+# ======================================================
+class DataPlanePublisher:
+    """
+    PURPOSE:
+    Owns the shared-memory segments. Each publish() packs every
+    symbol's columns into one new immutable block and then flips
+    the manifest's version number, so readers always see a whole,
+    consistent snapshot.
+    """
+
+    def __init__(self, plane=PLANE_NAME):
+        self.plane = plane
+        self.version = 0
+        self._blocks = {}
+
+        self._manifest = _create(f"{plane}-manifest", _MANIFEST.size)
+        _MANIFEST.pack_into(self._manifest.buf, 0, 0, 0)
+
+    def publish(self, frames):
+        """
+        frames: symbol → DataFrame. Returns the new version.
+        """
+        version = self.version + 1
+
+        directory = {"version": version, "created": time.time(), "symbols": {}}
+        payload = []
+        offset = 0
+
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            arrays, categories = _columns(df)
+            cols = {}
+            for col, arr in arrays.items():
+                offset = -(-offset // ALIGN) * ALIGN
+                cols[col] = [offset, arr.dtype.str, len(arr)]
+                payload.append((offset, arr))
+                offset += arr.nbytes
+            directory["symbols"][symbol] = {
+                "rows": len(df),
+                "columns": cols,
+                "categories": categories
+            }
+
+        header = json.dumps(directory).encode()
+        data_start = -(-(8 + len(header)) // ALIGN) * ALIGN
+        size = max(data_start + offset, 1)
+
+        block = _create(_block_name(self.plane, version), size)
+        struct.pack_into("q", block.buf, 0, len(header))
+        block.buf[8:8 + len(header)] = header
+        for off, arr in payload:
+            start = data_start + off
+            block.buf[start:start + arr.nbytes] = arr.tobytes()
+
+        # seqlock flip: odd → write version → even
+        seq = _MANIFEST.unpack_from(self._manifest.buf, 0)[0]
+        _MANIFEST.pack_into(self._manifest.buf, 0, seq + 1, self.version)
+        _MANIFEST.pack_into(self._manifest.buf, 0, seq + 2, version)
+
+        self._blocks[version] = block
+        self.version = version
+        self._retire()
+        return version
+
+    def _retire(self):
+        # readers already attached keep their mapping after unlink
+        for v in sorted(self._blocks)[:-KEEP_VERSIONS]:
+            block = self._blocks.pop(v)
+            block.close()
+            block.unlink()
+
+    def close(self):
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks = {}
+        self._manifest.close()
+        self._manifest.unlink()
+
+
+# ======================================================
+# READERS (ANY NUMBER OF WORKER PROCESSES)
+# ======================================================
+class Snapshot:
+    """
+    One immutable published version. Arrays are NumPy views on the
+    shared block: nothing is copied when reading.
+    """
+
+    def __init__(self, plane, version):
+        self.version = version
+        self._shm = _attach(_block_name(plane, version))
+
+        header_len = struct.unpack_from("q", self._shm.buf, 0)[0]
+        self.directory = json.loads(bytes(self._shm.buf[8:8 + header_len]))
+        self._data_start = -(-(8 + header_len) // ALIGN) * ALIGN
+
+    @property
+    def symbols(self):
+        return list(self.directory["symbols"])
+
+    def arrays(self, symbol):
+        meta = self.directory["symbols"].get(symbol)
+        if meta is None:
+            return None
+
+        out = {}
+        for col, (off, dtype, n) in meta["columns"].items():
+            arr = np.ndarray(
+                (n,), dtype=np.dtype(dtype), buffer=self._shm.buf,
+                offset=self._data_start + off
+            )
+            arr.flags.writeable = False
+            out[col] = arr
+        return out
+
+    def frame(self, symbol, tail=None):
+        arrays = self.arrays(symbol)
+        if arrays is None:
+            return pd.DataFrame()
+
+        meta = self.directory["symbols"][symbol]
+        cols = {}
+        for col, arr in arrays.items():
+            if tail:
+                arr = arr[-tail:]
+            if col in meta["categories"]:
+                arr = pd.Categorical.from_codes(arr, meta["categories"][col])
+            elif col == "Date":
+                arr = arr.view("datetime64[ns]")
+            cols[col] = arr
+        return pd.DataFrame(cols, copy=False)
+
+    def close(self):
+        self._shm.close()
+
+
+class DataPlaneReader:
+    def __init__(self, plane=PLANE_NAME):
+        self.plane = plane
+        self._manifest = _attach(f"{plane}-manifest")
+        self._snapshot = None
+        self._retired = []
+
+    def current_version(self):
+        while True:
+            seq1, version = _MANIFEST.unpack_from(self._manifest.buf, 0)
+            seq2, _ = _MANIFEST.unpack_from(self._manifest.buf, 0)
+            if seq1 == seq2 and seq1 % 2 == 0:
+                return version
+
+    def snapshot(self):
+        """
+        Latest snapshot; reattaches only when the version changed.
+        """
+        version = self.current_version()
+        if version == 0:
+            return None
+
+        if self._snapshot is None or self._snapshot.version != version:
+            try:
+                snap = Snapshot(self.plane, version)
+            except FileNotFoundError:
+                # retired between manifest read and attach → retry
+                return self.snapshot()
+            if self._snapshot is not None:
+                self._retired.append(self._snapshot)
+            self._snapshot = snap
+            self._release_retired()
+
+        return self._snapshot
+
+
+    def _release_retired(self):
+        # a mapping can only be closed once no frame still views it
+        busy = []
+        for snap in self._retired:
+            try:
+                snap.close()
+            except BufferError:
+                busy.append(snap)
+        self._retired = busy
+
+
+class SharedMemorySource:
+    """
+    AITradingEngine / scan_universe data source backed by the
+    plane. begin_cycle() pins one snapshot so every symbol in a
+    cycle comes from the same published version.
+    """
+
+    def __init__(self, reader=None, lookback=LOOKBACK_BARS):
+        self.reader = reader or DataPlaneReader()
+        self.lookback = lookback
+        self._pinned = None
+
+    def begin_cycle(self):
+        self._pinned = self.reader.snapshot()
+
+    def fetch(self, symbol, bars=None):
+        snap = self._pinned or self.reader.snapshot()
+        if snap is None:
+            return pd.DataFrame()
+        return snap.frame(symbol, tail=bars or self.lookback)
+
+
+# ======================================================
+# LOADER PROCESS
+# ======================================================
+def _load_csv_frames(symbols, data_folder="data"):
+    from replay import data_file_symbol
+    import os
+
+    frames = {}
+    for sym in symbols:
+        path = os.path.join(data_folder, data_file_symbol(sym) + ".csv")
+        if os.path.exists(path):
+            frames[sym] = pd.read_csv(
+                path, usecols=["Date", "Close", "Volume"],
+                parse_dates=["Date"]
+            ).sort_values("Date")
+    return frames
+
+
+def _load_live_frames(symbols):
+    from utils import fetch_live_data
+    return {sym: fetch_live_data(sym) for sym in symbols}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Publish per-symbol market data into shared memory"
+    )
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--source", choices=["csv", "live"], default="live")
+    parser.add_argument("--every", type=float, default=60.0,
+                        help="seconds between refreshes")
+    parser.add_argument("--plane", default=PLANE_NAME)
+    args = parser.parse_args()
+
+    publisher = DataPlanePublisher(args.plane)
+    print(f"🛰 DATA PLANE '{args.plane}' publishing {len(args.symbols)} symbols")
+
+    try:
+        while True:
+            frames = (
+                _load_csv_frames(args.symbols) if args.source == "csv"
+                else _load_live_frames(args.symbols)
+            )
+            version = publisher.publish(frames)
+            print(f"🔁 PUBLISHED v{version} ({len(frames)} symbols)")
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
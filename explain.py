@@ -1,16 +1,422 @@
-def explain_decision(regime, risk, allocation):
-    explanation = []
+import string
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# REASON CODES
+# ======================================================
+# order = rendering order = bit position in masks (append only)
+REASONS = {
+    "SELECTED": "{symbol} selected under {regime} regime.",
+    "REGIME": "Market regime detected: {regime}.",
+    "VOL_SPIKE": "Volatility spike detected, reducing exposure.",
+    "DRAWDOWN": "Drawdown threshold breached, capital protection activated.",
+    "ALLOCATION": "Final equity allocation adjusted to {allocation:.0%}.",
+    "RISK_ALLOCATION": "Risk-adjusted allocation = {allocation:.0%}.",
+    "RISK": "Volatility={volatility}, Drawdown={max_drawdown}.",
+    "DRIVER": "Main score driver: {driver} ({driver_contribution:+.4f})."
+}
+CODES = list(REASONS)
+BITS = {code: 1 << i for i, code in enumerate(CODES)}
+
+DRAWDOWN_LIMIT = -0.2
+
+_FORMATTER = string.Formatter()
+
+
+@lru_cache(maxsize=256)
+def _template(codes):
+    return " ".join(REASONS[c] for c in codes)
+
+
+# ======================================================
+# STRUCTURED EXPLANATION
+# ======================================================
+class Explanation:
+    """
+    PURPOSE:
+    Reason codes + numeric parameters for one decision. Text is
+    rendered from cached templates only when something displays
+    it (str(), a template, the JSON status). The trade log keeps
+    the compact encode() form; trade_logger.read_trades() decodes.
+    """
+
+    def __init__(self, codes, params=None, contributions=None):
+        self.codes = tuple(sorted(codes, key=CODES.index))
+        self.params = dict(params or {})
+        self.contributions = dict(contributions or {})
+        self._text = None
+
+    def render(self):
+        if self._text is None:
+            self._text = _template(self.codes).format(**self.params)
+        return self._text
+
+    __str__ = render
+
+    def __repr__(self):
+        return f"Explanation({'+'.join(self.codes)})"
+
+    @property
+    def mask(self):
+        return sum(BITS[c] for c in self.codes)
+
+    def to_dict(self):
+        return {
+            "codes": list(self.codes),
+            "params": self.params,
+            "contributions": self.contributions
+        }
+
+    # ======================================================
+    # COMPACT LOG FORM
+    # ======================================================
+    def encode(self, omit=("symbol", "regime")):
+        """
+        "<mask>|allocation=0.19;volatility=0.3|momentum=0.001"
+        Fields already stored in their own log columns are omitted.
+        """
+        params = ";".join(
+            f"{k}={v}" for k, v in self.params.items() if k not in omit
+        )
+        contributions = ";".join(
+            f"{k}={v}" for k, v in self.contributions.items()
+        )
+        return f"{self.mask}|{params}|{contributions}"
+
+    @classmethod
+    def decode(cls, text, **extra):
+        """
+        Inverse of encode(); extra supplies the omitted fields
+        (symbol=..., regime=... from the same log row). Plain
+        sentences from older logs come back as-is.
+        """
+        parts = str(text).split("|")
+        if len(parts) != 3 or not parts[0].isdigit():
+            return str(text)
+
+        mask, params, contributions = parts
+        return cls(
+            codes_from_mask(int(mask)),
+            {**_parse_pairs(params), **extra},
+            _parse_pairs(contributions)
+        )
+
 
-    explanation.append(f"Market regime detected: {regime}.")
+def codes_from_mask(mask):
+    return [c for c in CODES if mask & BITS[c]]
 
+
+def _parse_pairs(text):
+    out = {}
+    for pair in filter(None, text.split(";")):
+        k, v = pair.split("=", 1)
+        try:
+            out[k] = float(v)
+        except ValueError:
+            out[k] = v
+    return out
+
+
+# ======================================================
+# BUILDERS
+# ======================================================
+def score_contributions(df, weights=None):
+    """
+    Per-factor contribution of the stock's latest bar to the
+    pick_best_stock score (weight · factor value).
+    """
+    from utils import SCORE_WEIGHTS
+
+    weights = weights or SCORE_WEIGHTS
+    latest = df.iloc[-1]
+    factors = {
+        "momentum": float(
+            latest["momentum"] if "momentum" in df
+            else df["return"].iloc[-20:].mean()
+        ),
+        "volatility": float(latest["volatility"]),
+        "trend": float(latest["ma_short"] - latest["ma_long"])
+    }
+    return {
+        f: round(weights[f] * value, 6) for f, value in factors.items()
+    }
+
+
+def _risk_codes(regime, max_drawdown):
+    codes = []
     if regime == "High Volatility":
-        explanation.append("Volatility spike detected, reducing exposure.")
+        codes.append("VOL_SPIKE")
+    if max_drawdown < DRAWDOWN_LIMIT:
+        codes.append("DRAWDOWN")
+    return codes
+
+
+def build_explanation(symbol, regime, allocation, risk, contributions=None):
+    """
+    Explanation for one run_cycle decision.
+    """
+    codes = ["SELECTED", *_risk_codes(regime, risk["max_drawdown"]),
+             "RISK_ALLOCATION", "RISK"]
+    params = {
+        "symbol": symbol,
+        "regime": regime,
+        "allocation": round(float(allocation), 4),
+        "volatility": risk["volatility"],
+        "max_drawdown": risk["max_drawdown"]
+    }
+
+    if contributions:
+        driver = max(contributions, key=lambda f: abs(contributions[f]))
+        codes.append("DRIVER")
+        params["driver"] = driver
+        params["driver_contribution"] = contributions[driver]
+
+    return Explanation(codes, params, contributions)
+
+
+def explain_decision(regime, risk, allocation):
+    codes = ["REGIME", *_risk_codes(regime, risk["max_drawdown"]),
+             "ALLOCATION"]
+    return Explanation(
+        codes, {"regime": regime, "allocation": allocation}
+    ).render()
+
+
+# ======================================================
+# BATCH (BACKTESTS: ONE ROW PER DECISION)
+# ======================================================
+def explain_batch(regime, allocation, max_drawdown):
+    """
+    Vectorized explain_decision: reason codes as one bit mask per
+    decision plus the parameters. Nothing is rendered here.
+    """
+    regime = np.asarray(regime, dtype=object)
+    max_drawdown = np.asarray(max_drawdown, dtype=float)
+
+    mask = np.full(len(regime), BITS["REGIME"] | BITS["ALLOCATION"],
+                   dtype=np.int64)
+    mask[regime == "High Volatility"] |= BITS["VOL_SPIKE"]
+    mask[max_drawdown < DRAWDOWN_LIMIT] |= BITS["DRAWDOWN"]
+
+    return pd.DataFrame({
+        "mask": mask,
+        "regime": pd.Categorical(regime),
+        "allocation": np.asarray(allocation, dtype=float),
+        "max_drawdown": max_drawdown
+    })
+
+
+def _format_column(col, spec):
+    # format each distinct value once, then broadcast
+    values = col.to_numpy()
+    if not spec:
+        values = values.astype(str)
+    uniques, inverse = np.unique(values, return_inverse=True)
+    text = np.array([format(u, spec) for u in uniques], dtype=object)
+    return pd.Series(text[inverse], index=col.index)
 
-    if risk["max_drawdown"] < -0.2:
-        explanation.append("Drawdown threshold breached, capital protection activated.")
 
-    explanation.append(
-        f"Final equity allocation adjusted to {allocation * 100:.0f}%."
+def _render_piece(template, rows):
+    out = pd.Series("", index=rows.index, dtype=object)
+    for literal, field, spec, _ in _FORMATTER.parse(template):
+        out = out + literal
+        if field is not None:
+            out = out + _format_column(rows[field], spec)
+    return out
+
+
+def render_batch(frame):
+    """
+    Text for an explain_batch() frame (only call for the rows a
+    page or report actually shows).
+    """
+    out = pd.Series("", index=frame.index, dtype=object)
+    mask = frame["mask"].to_numpy()
+
+    # same order as Explanation.render()
+    for code in CODES:
+        has = (mask & BITS[code]) != 0
+        if not has.any():
+            continue
+        piece = _render_piece(REASONS[code], frame[has])
+        out[has] = out[has] + piece + " "
+
+    return out.str.rstrip()
+
+
+# ======================================================
+# MODEL ATTRIBUTIONS (PATH-BASED TREE CONTRIBUTIONS)
+# ======================================================
+ATTRIBUTION_CACHE_SIZE = 4096
+
+
+class TreeContributions:
+    """
+    PURPOSE:
+    Per-prediction feature attributions for the regime forest
+    (Saabas path contributions): walking a sample down a tree, the
+    change in class distribution at every split is credited to
+    that split's feature, so
+
+        predict_proba = bias + Σ_features contribution
+
+    All trees are packed into padded (trees × nodes) arrays once
+    per model; a batch is then walked level by level for every
+    tree at the same time (max_depth NumPy steps, no Python loop
+    over trees or samples).
+    """
+
+    def __init__(self, model):
+        trees = [est.tree_ for est in model.estimators_]
+        width = max(t.node_count for t in trees)
+
+        self.n_trees = len(trees)
+        self.n_features = model.n_features_in_
+        self.classes = model.classes_
+        self.depth = max(t.max_depth for t in trees)
+
+        n_classes = len(self.classes)
+        self.left = np.full((self.n_trees, width), -1, dtype=np.int64)
+        self.right = np.full((self.n_trees, width), -1, dtype=np.int64)
+        self.feature = np.zeros((self.n_trees, width), dtype=np.int64)
+        self.threshold = np.zeros((self.n_trees, width))
+        self.value = np.zeros((self.n_trees, width, n_classes))
+
+        for i, t in enumerate(trees):
+            n = t.node_count
+            self.left[i, :n] = t.children_left
+            self.right[i, :n] = t.children_right
+            self.feature[i, :n] = np.maximum(t.feature, 0)
+            self.threshold[i, :n] = t.threshold
+            value = t.value[:, 0, :]
+            self.value[i, :n] = value / value.sum(axis=1, keepdims=True)
+
+        self.bias = self.value[:, 0, :].mean(axis=0)
+
+    def explain(self, X):
+        """
+        X: scaled feature rows (n, features).
+        Returns (proba (n, classes), contributions (n, features, classes)).
+        """
+        # trees compare in float32, as sklearn does
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+
+        trees = np.arange(self.n_trees)[:, None]
+        rows = np.arange(n)[None, :]
+        node = np.zeros((self.n_trees, n), dtype=np.int64)
+        contrib = np.zeros((n, self.n_features, len(self.classes)))
+
+        for _ in range(self.depth):
+            left = self.left[trees, node]
+            leaf = left == -1
+            feat = self.feature[trees, node]
+
+            go_left = X[rows, feat] <= self.threshold[trees, node]
+            child = np.where(
+                leaf, node,
+                np.where(go_left, left, self.right[trees, node])
+            )
+
+            delta = self.value[trees, child] - self.value[trees, node]
+            for f in range(self.n_features):
+                contrib[:, f, :] += (delta * (feat == f)[..., None]).sum(axis=0)
+
+            node = child
+
+        contrib /= self.n_trees
+        proba = self.bias + contrib.sum(axis=1)
+        return proba, contrib
+
+
+_explainer = (None, None)
+_attribution_cache = {}
+_attribution_lock = threading.Lock()     # engines run in many threads
+
+
+def _tree_explainer(model):
+    global _explainer
+    if _explainer[0] is not model:
+        explainer = (
+            TreeContributions(model) if hasattr(model, "estimators_")
+            and hasattr(model.estimators_[0], "tree_") else None
+        )
+        with _attribution_lock:
+            _explainer = (model, explainer)
+            _attribution_cache.clear()
+    return _explainer[1]
+
+
+def regime_contributions_batch(X):
+    """
+    Attributions for many feature rows (unscaled, FEATURES order)
+    at once. None when the live model is not a tree forest.
+    """
+    from utils import get_artifacts
+
+    model, scaler, encoder = get_artifacts()
+    explainer = _tree_explainer(model)
+    if explainer is None or len(X) == 0:
+        return None
+
+    X = X[list(scaler.feature_names_in_)]
+    proba, contrib = explainer.explain(scaler.transform(X))
+    pred = proba.argmax(axis=1)
+    labels = encoder.inverse_transform(explainer.classes[pred].astype(int))
+
+    out = []
+    for i, k in enumerate(pred):
+        out.append({
+            "regime": str(labels[i]),
+            "probability": round(float(proba[i, k]), 4),
+            "bias": round(float(explainer.bias[k]), 4),
+            "contributions": {
+                f: round(float(contrib[i, j, k]), 4)
+                for j, f in enumerate(X.columns)
+            }
+        })
+    return out
+
+
+def regime_contributions(df, symbol):
+    """
+    Attributions for the latest bar of one symbol, cached per
+    (symbol, bar, feature values) until the live model changes.
+    The values are part of the key because the latest bar is still
+    open: its Close, and every feature built on it, keep moving
+    under the same date.
+    """
+    from utils import FEATURES
+
+    if df is None or df.empty:
+        return None
+
+    row = df[FEATURES].iloc[-1:]
+    key = (
+        symbol,
+        str(df["Date"].iloc[-1]),
+        row.to_numpy(dtype=float).tobytes()
     )
+    with _attribution_lock:
+        hit = _attribution_cache.get(key)
+    if hit is not None and _explainer[0] is _current_model():
+        return hit
+
+    result = regime_contributions_batch(row)
+    if not result:
+        return None
+
+    with _attribution_lock:
+        if len(_attribution_cache) >= ATTRIBUTION_CACHE_SIZE:
+            _attribution_cache.pop(next(iter(_attribution_cache)))
+        _attribution_cache[key] = result[0]
+    return result[0]
+
 
-    return " ".join(explanation)
+def _current_model():
+    from utils import get_artifacts
+    return get_artifacts()[0]
@@ -0,0 +1,123 @@
+from functools import lru_cache
+
+# ======================================================
+# FEATURE REGISTRY
+# ======================================================
+# name → Feature; built-in features are registered in utils.py
+REGISTRY = {}
+
+
+class Feature:
+    """
+    One node of the feature DAG.
+
+    inputs: names of the features it is computed from
+    window: bars it looks at (1 = pointwise); together with the
+            inputs' warm-up this gives the leading rows that are
+            NaN (warm-up) before the feature has a value
+    lookback: for running statistics (cummax, ...) that have no
+              NaN warm-up but whose value depends on how much
+              history was fetched: bars they must always see
+    fn(*input_series, interval=...) → Series
+    """
+
+    def __init__(self, name, inputs, window, fn, lookback=None):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.window = window
+        self.fn = fn
+        self.lookback = lookback
+
+
+def feature(name, inputs=(), window=1, lookback=None):
+    """
+    Decorator registering a feature:
+
+        @feature("momentum", inputs=["return"], window=20)
+        def _momentum(ret, interval):
+            return ret.rolling(20).mean()
+    """
+    def register(fn):
+        REGISTRY[name] = Feature(name, inputs, window, fn, lookback)
+        plan_features.cache_clear()
+        return fn
+    return register
+
+
+# ======================================================
+# PLANNER
+# ======================================================
+class FeaturePlan:
+    """
+    PURPOSE:
+    The minimal, topologically ordered set of nodes needed for the
+    requested features. Every node is computed once per frame and
+    shared by all requested features that depend on it, and
+    features nobody asked for are never computed.
+    """
+
+    def __init__(self, outputs):
+        self.outputs = tuple(outputs)
+        self.steps = []
+        self.warmups = {}
+
+        for name in self.outputs:
+            self._visit(name, ())
+
+        self.warmup = max(
+            (self.warmups[name] for name in self.outputs), default=0
+        )
+        self.lookback = max(
+            (node.lookback or 0 for node in self.steps), default=0
+        )
+
+    def bars(self, rows=1):
+        return max(self.warmup + rows, self.lookback)
+
+    def _visit(self, name, path):
+        if name in self.warmups:
+            return
+        if name in path:
+            raise ValueError(f"Feature cycle: {' → '.join(path + (name,))}")
+        if name not in REGISTRY:
+            raise KeyError(f"Unknown feature: {name}")
+
+        node = REGISTRY[name]
+        for dep in node.inputs:
+            self._visit(dep, path + (name,))
+
+        self.warmups[name] = (
+            max((self.warmups[d] for d in node.inputs), default=0)
+            + node.window - 1
+        )
+        self.steps.append(node)
+
+    def compute(self, df, interval="1d"):
+        """
+        {feature: Series} for every requested output.
+        """
+        values = {}
+        for node in self.steps:
+            args = [values[d] for d in node.inputs] if node.inputs else [df]
+            values[node.name] = node.fn(*args, interval=interval)
+        return {name: values[name] for name in self.outputs}
+
+
+@lru_cache(maxsize=64)
+def _plan(outputs):
+    return FeaturePlan(outputs)
+
+
+def plan_features(features):
+    return _plan(tuple(features))
+
+
+plan_features.cache_clear = _plan.cache_clear
+
+
+def history_bars(features, rows=1):
+    """
+    Bars to fetch so that `rows` rows survive the warm-up of the
+    requested features (e.g. 1 → just enough for the latest row).
+    """
+    return plan_features(features).bars(rows)
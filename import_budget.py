@@ -0,0 +1,110 @@
+import argparse
+import subprocess
+import sys
+
+# ======================================================
+# IMPORT-TIME BUDGETS (ms, cumulative, cold interpreter)
+# ======================================================
+# what a fresh web worker / pool process pays before doing anything
+BUDGETS_MS = {
+    "app": 1200,
+    "trading_engine": 800,
+    "utils": 700,
+    "universe_engine": 900,
+    "stress_test": 500,
+    "execution": 500,
+    "portfolio_store": 100
+}
+
+# must never be imported just by importing the module above
+DEFERRED = ("yfinance", "joblib", "sklearn", "matplotlib")
+
+
+def measure(module, runs=3):
+    """
+    `python -X importtime -c "import <module>"` in fresh
+    interpreters. Returns (best total ms, {direct import of the
+    module: cumulative ms}, every package it imported) of the
+    fastest run.
+    """
+    best = None
+    for _ in range(runs):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{proc.stderr}")
+
+        # children are printed (indented one level deeper) before
+        # their parent; interpreter startup imports come first
+        entries = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, cum, raw = line.split("|")
+            if not cum.strip().isdigit():
+                continue          # header row
+            depth = (len(raw) - len(raw.lstrip()) - 1) // 2
+            entries.append((depth, raw.strip(), int(cum) / 1000))
+
+        end = next(i for i, (d, name, _) in enumerate(entries)
+                   if d == 0 and name == module)
+        start = max(
+            (i + 1 for i, (d, _, _) in enumerate(entries[:end]) if d == 0),
+            default=0
+        )
+        total = entries[end][2]
+        children = {name: ms for d, name, ms in entries[start:end] if d == 1}
+        packages = {name.split(".")[0] for _, name, _ in entries[start:end]}
+
+        if best is None or total < best[0]:
+            best = (total, children, packages)
+    return best
+
+
+def report(modules=None, runs=3, top=5):
+    """
+    Measure every budgeted module; returns rows with the total,
+    the budget, heavy deferred packages that leaked in and the
+    slowest top-level imports.
+    """
+    rows = []
+    for module in modules or BUDGETS_MS:
+        total, children, packages = measure(module, runs)
+        leaked = sorted(packages.intersection(DEFERRED))
+        heaviest = sorted(
+            children.items(), key=lambda item: -item[1]
+        )[:top]
+
+        budget = BUDGETS_MS.get(module)
+        rows.append({
+            "module": module,
+            "ms": round(total, 1),
+            "budget_ms": budget,
+            "ok": (budget is None or total <= budget) and not leaked,
+            "leaked": leaked,
+            "heaviest": [(name, round(ms, 1)) for name, ms in heaviest]
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cold import-time report against per-module budgets"
+    )
+    parser.add_argument("modules", nargs="*", help="default: all budgeted")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    rows = report(args.modules or None, args.runs)
+    for row in rows:
+        mark = "✅" if row["ok"] else "❌"
+        print(f"{mark} {row['module']}: {row['ms']} ms "
+              f"(budget {row['budget_ms']} ms)")
+        if row["leaked"]:
+            print(f"   eager heavy imports: {', '.join(row['leaked'])}")
+        for name, ms in row["heaviest"]:
+            print(f"   - {name}: {ms} ms")
+
+    sys.exit(0 if all(row["ok"] for row in rows) else 1)
@@ -0,0 +1,335 @@
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+# ======================================================
+# CONFIG
+# ======================================================
+PORT = 5055
+STATUS_POLL = 2.0              # seconds between /live/status polls
+GRAPH_POLL = 5.0               # /graphs/data and /risk/status
+SAMPLE_EVERY = 1.0             # server metrics sampling period
+MONITOR_USER = "monitor"       # the only admin of the test server
+DEFAULT_SYMBOLS = [
+    "TCS.NS", "INFY.NS", "ITC.NS", "SBIN.NS", "RELIANCE.NS",
+    "HDFCBANK.NS", "ICICIBANK.NS", "WIPRO.NS", "HCLTECH.NS", "LT.NS",
+    "AXISBANK.NS", "MARUTI.NS", "SUNPHARMA.NS", "TITAN.NS", "ONGC.NS"
+]
+
+
+# ======================================================
+# SERVER (SUBPROCESS, FAKE MARKET DATA)
+# ======================================================
+def serve(port, latency, failure_rate):
+    """
+    app.py on a threaded dev server, fed by a FakeProvider so no
+    network is needed. State dir, trade log, cycle length and the
+    admin login come from the PERCEPTRON_* environment set by
+    _start_server, which config reads at import.
+    """
+    import market_data
+
+    market_data.use_provider(market_data.FakeProvider(
+        latency=latency, jitter=latency, failure_rate=failure_rate, seed=0
+    ))
+
+    import app as web
+
+    web.app.run(port=port, threaded=True, use_reloader=False)
+
+
+def _server_env(args, state_dir):
+    # trade logs and portfolio state go to state_dir, never to logs/
+    return {
+        **os.environ,
+        "PERCEPTRON_STATE_DIR": os.path.join(state_dir, "state"),
+        "PERCEPTRON_TRADE_LOG": os.path.join(state_dir, "trades.csv"),
+        "PERCEPTRON_CYCLE_SECONDS": str(args.cycle_seconds),
+        # the monitor reads /admin/stats
+        "PERCEPTRON_ADMIN_USERS": MONITOR_USER
+    }
+
+
+def _start_server(args, state_dir):
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--serve", "--port", str(args.port),
+         "--latency", str(args.latency),
+         "--failure-rate", str(args.failure_rate)],
+        env=_server_env(args, state_dir),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    import requests
+
+    base = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("❌ server exited during startup")
+        try:
+            requests.get(base + "/", timeout=1)
+            return proc, base
+        except requests.ConnectionError:
+            time.sleep(0.2)
+
+    proc.kill()
+    raise RuntimeError("❌ server did not start in 60s")
+
+
+# ======================================================
+# SIMULATED USERS
+# ======================================================
+class Recorder:
+    """
+    Thread-safe (time, endpoint, latency, status) log.
+    """
+
+    def __init__(self):
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, latency, status):
+        with self._lock:
+            self.rows.append((time.monotonic(), endpoint, latency, status))
+
+    def since(self, t0):
+        with self._lock:
+            return [r for r in self.rows if r[0] >= t0]
+
+
+def _timed(recorder, endpoint, call):
+    t0 = time.perf_counter()
+    try:
+        resp = call()
+        status = resp.status_code
+    except Exception:
+        resp, status = None, 0
+    recorder.add(endpoint, time.perf_counter() - t0, status)
+    return resp
+
+
+def user(base, name, symbols, until, recorder, rng, stop_engine):
+    """
+    One browser: log in, start an engine, then poll the live page
+    (with ETags, like the dashboard does) and the chart / risk
+    pages until `until`.
+    """
+    import requests
+
+    s = requests.Session()
+    _timed(recorder, "login", lambda: s.post(
+        base + "/login", data={"username": name}, allow_redirects=False
+    ))
+
+    key = "|".join(symbols)
+    _timed(recorder, "live/start", lambda: s.post(
+        base + "/live/start", data={"symbol": key}
+    ))
+
+    etag = None
+    next_graph = time.monotonic() + rng.uniform(0, GRAPH_POLL)
+    while time.monotonic() < until:
+        headers = {"If-None-Match": etag} if etag else {}
+        resp = _timed(recorder, "live/status", lambda: s.get(
+            f"{base}/live/status/{key}", headers=headers
+        ))
+        if resp is not None and resp.headers.get("ETag"):
+            etag = resp.headers["ETag"]
+
+        if time.monotonic() >= next_graph:
+            _timed(recorder, "graphs/data",
+                   lambda: s.get(f"{base}/graphs/data/{key}"))
+            _timed(recorder, "risk/status",
+                   lambda: s.get(f"{base}/risk/status/{key}"))
+            next_graph += GRAPH_POLL
+
+        time.sleep(STATUS_POLL * rng.uniform(0.5, 1.5))
+
+    if stop_engine:
+        _timed(recorder, "live/stop", lambda: s.post(
+            base + "/live/stop", data={"symbol": key}
+        ))
+
+
+# ======================================================
+# SERVER METRICS
+# ======================================================
+def monitor(base, pid, until, recorder, timeline):
+    """
+    Every SAMPLE_EVERY seconds: server RSS / threads, engine cycle
+    lag (/admin/stats) and request latency of the last window.
+    """
+    import requests
+
+    s = requests.Session()
+    s.post(base + "/login", data={"username": MONITOR_USER})
+
+    t_start = time.monotonic()
+    while time.monotonic() < until:
+        window = time.monotonic()
+        time.sleep(SAMPLE_EVERY)
+
+        try:
+            stats = s.get(base + "/admin/stats", timeout=5).json()
+        except Exception:
+            stats = {"threads": None, "engines": {}}
+
+        engines = stats["engines"].values()
+        lags = [e["lag_sec"] for e in engines if "lag_sec" in e]
+        cycles = [e["cycle_sec"] for e in engines if "cycle_sec" in e]
+        latencies = [r[2] for r in recorder.since(window)]
+        threads, rss = _process_stats(pid)
+
+        timeline.append({
+            "t": round(time.monotonic() - t_start, 1),
+            "engines": len(stats["engines"]),
+            "threads": threads,
+            "rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+            "rps": round(len(latencies) / SAMPLE_EVERY, 1),
+            "p95_ms": _pct(latencies, 95),
+            "cycle_sec_max": max(cycles) if cycles else None,
+            "lag_sec_max": max(lags) if lags else None
+        })
+
+
+def _process_stats(pid):
+    """
+    (threads, rss bytes) of a process: psutil when installed,
+    else /proc (Linux); (None, None) when neither works.
+    """
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        return proc.num_threads(), proc.memory_info().rss
+    except ImportError:
+        pass
+    except Exception:
+        return None, None
+
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return (
+            int(fields["Threads"]),
+            int(fields["VmRSS"].split()[0]) * 1024
+        )
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _pct(values, q):
+    if not len(values):
+        return None
+    return round(float(np.percentile(values, q)) * 1000, 1)
+
+
+# ======================================================
+# RUN
+# ======================================================
+def run(args):
+    """
+    Start the server, ramp `users` simulated users over `ramp`
+    seconds, keep them polling for `duration` seconds.
+    Returns (per-endpoint latency summary, timeline).
+    """
+    state_dir = tempfile.mkdtemp(prefix="loadtest-")
+    proc, base = _start_server(args, state_dir)
+
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    timeline = []
+    until = time.monotonic() + args.ramp + args.duration
+
+    threads = [threading.Thread(
+        target=monitor, args=(base, proc.pid, until, recorder, timeline),
+        daemon=True
+    )]
+    for i in range(args.users):
+        symbols = rng.sample(args.symbols, rng.randint(1, args.max_symbols))
+        threads.append(threading.Thread(
+            target=user,
+            args=(base, f"user{i}", symbols, until, recorder,
+                  random.Random(rng.random()), args.stop_engines),
+            daemon=True
+        ))
+
+    try:
+        threads[0].start()
+        for i, t in enumerate(threads[1:]):
+            t.start()
+            if args.ramp:
+                time.sleep(args.ramp / args.users)
+        for t in threads:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    summary = {}
+    for endpoint in sorted({r[1] for r in recorder.rows}):
+        rows = [r for r in recorder.rows if r[1] == endpoint]
+        latencies = [r[2] for r in rows]
+        summary[endpoint] = {
+            "requests": len(rows),
+            "errors": sum(1 for r in rows if r[3] == 0 or r[3] >= 500),
+            "p50_ms": _pct(latencies, 50),
+            "p95_ms": _pct(latencies, 95),
+            "p99_ms": _pct(latencies, 99),
+            "max_ms": _pct(latencies, 100)
+        }
+    return summary, timeline
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load test app.py: simulated users + live engines "
+                    "on fake market data"
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--ramp", type=float, default=10.0,
+                        help="seconds to start all users")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="seconds at full load")
+    parser.add_argument("--symbols", nargs="+", default=DEFAULT_SYMBOLS)
+    parser.add_argument("--max-symbols", type=int, default=4,
+                        help="largest symbol set one user starts")
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="fake provider seconds per fetch")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--cycle-seconds", type=float, default=8.0,
+                        help="pause between engine cycles")
+    parser.add_argument("--stop-engines", action="store_true",
+                        help="users stop their engine when leaving")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port, args.latency, args.failure_rate)
+        sys.exit(0)
+
+    summary, timeline = run(args)
+
+    print("\n📈 Server over time")
+    for row in timeline:
+        print(row)
+
+    print("\n⏱️ Request latency")
+    for endpoint, row in summary.items():
+        print(f" - {endpoint}: {row}")
+
+    worst_lag = max(
+        (r["lag_sec_max"] for r in timeline if r["lag_sec_max"] is not None),
+        default=None
+    )
+    print(f"\n✅ {args.users} users, worst engine lag: {worst_lag} s")
@@ -0,0 +1,457 @@
+import argparse
+import os
+import random
+import threading
+import time
+import weakref
+
+import pandas as pd
+
+from config import (
+    FETCH_DEADLINE,
+    FETCH_RETRIES,
+    FETCH_BACKOFF,
+    FETCH_MAX_BACKOFF,
+    FETCH_MAX_IN_FLIGHT,
+    CYCLE_FETCH_BUDGET,
+    BREAKER_FAILURES,
+    BREAKER_RESET
+)
+
+
+class FetchTimeout(Exception):
+    pass
+
+
+class FetchSaturated(Exception):
+    pass
+
+
+# ======================================================
+# PROVIDERS
+# ======================================================
+class YahooProvider:
+    """
+    Live Yahoo Finance bars; raises on any failure.
+    """
+
+    name = "yahoo"
+
+    def fetch(self, symbol, interval="1d", bars=None, timeout=None):
+        from utils import download_bars
+        return download_bars(
+            symbol, interval=interval, bars=bars, timeout=timeout or 10
+        )
+
+
+class FakeProvider:
+    """
+    PURPOSE:
+    Local stand-in for Yahoo serving the data/ CSVs, with injectable
+    latency, random failures and hangs, so deadlines, retries and
+    the circuit breaker can be exercised offline.
+
+    latency:      seconds added to every call
+    jitter:       extra uniform 0..jitter seconds
+    failure_rate: probability a call raises
+    hang_rate:    probability a call sleeps for `hang` seconds
+    down:         every call fails (toggle at runtime)
+    """
+
+    name = "fake"
+
+    def __init__(self, data_folder="data", frames=None, lookback=126,
+                 latency=0.0, jitter=0.0, failure_rate=0.0,
+                 hang_rate=0.0, hang=30.0, seed=None):
+        self.data_folder = data_folder
+        self.lookback = lookback
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.down = False
+        self.calls = 0
+
+        self._frames = dict(frames or {})
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _frame(self, symbol):
+        if symbol not in self._frames:
+            from replay import data_file_symbol
+            path = os.path.join(
+                self.data_folder, data_file_symbol(symbol) + ".csv"
+            )
+            self._frames[symbol] = pd.read_csv(
+                path, usecols=["Date", "Close", "Volume"],
+                parse_dates=["Date"]
+            ).sort_values("Date")
+        return self._frames[symbol]
+
+    def fetch(self, symbol, interval="1d", bars=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(0, self.jitter)
+            hang = self._rng.random() < self.hang_rate
+            fail = self.down or self._rng.random() < self.failure_rate
+
+        time.sleep(self.hang if hang else delay)
+        if fail:
+            raise ConnectionError(f"fake provider failure for {symbol}")
+
+        return self._frame(symbol).tail(bars or self.lookback).reset_index(
+            drop=True
+        )
+
+
+_default_provider = None
+
+
+def use_provider(provider):
+    """
+    Provider every ResilientSource built without an explicit one
+    uses from now on (None → Yahoo), e.g. a FakeProvider to run the
+    whole app offline.
+    """
+    global _default_provider
+    _default_provider = provider
+
+
+def default_provider():
+    # one shared Yahoo provider, so its in-flight cap is global
+    global _default_provider
+    if _default_provider is None:
+        _default_provider = YahooProvider()
+    return _default_provider
+
+
+# ======================================================
+# CIRCUIT BREAKER (PER PROVIDER)
+# ======================================================
+class CircuitBreaker:
+    """
+    closed → open after `failures` consecutive failures; while open
+    every call is refused at once. After `reset_after` seconds one
+    trial call is let through (half-open): success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset_after=BREAKER_RESET,
+                 clock=time.monotonic):
+        self.failures = failures
+        self.reset_after = reset_after
+        self.clock = clock
+
+        self.state = "closed"
+        self.consecutive = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and \
+                    self.clock() - self.opened_at >= self.reset_after:
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def release_trial(self):
+        # the half-open trial never reached the provider (no free
+        # call slot): neither success nor failure, let the next
+        # call be the trial
+        with self._lock:
+            if self.state == "half_open":
+                self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive += 1
+            if self.state == "half_open" or self.consecutive >= self.failures:
+                self.state = "open"
+                self.opened_at = self.clock()
+                self._trial = False
+
+
+# ======================================================
+# RESILIENT DATA SOURCE
+# ======================================================
+def call_with_deadline(fn, args, timeout, slots=None):
+    """
+    Run fn(*args) on a daemon thread and wait at most `timeout`
+    seconds. A call that overruns is abandoned (it finishes in the
+    background and never keeps the process alive).
+    slots: semaphore held until fn returns, abandoned or not; when
+    none frees up within `timeout`, FetchSaturated is raised and fn
+    is not started.
+    """
+    if slots is not None and not slots.acquire(timeout=timeout):
+        raise FetchSaturated(f"no free call slot in {timeout:.1f}s")
+
+    box = {}
+    done = threading.Event()
+
+    def run():
+        try:
+            box["value"] = fn(*args)
+        except BaseException as e:
+            box["error"] = e
+        finally:
+            if slots is not None:
+                slots.release()
+        done.set()
+
+    threading.Thread(target=run, daemon=True, name="fetch").start()
+    if not done.wait(timeout):
+        raise FetchTimeout(f"no answer in {timeout:.1f}s")
+    if "error" in box:
+        raise box["error"]
+    return box["value"]
+
+
+# provider → semaphore / breaker shared by every source calling it
+_in_flight = weakref.WeakKeyDictionary()
+_breakers = weakref.WeakKeyDictionary()
+_in_flight_lock = threading.Lock()
+
+
+def _call_slots(provider, limit):
+    with _in_flight_lock:
+        slots = _in_flight.get(provider)
+        if slots is None:
+            slots = _in_flight[provider] = threading.BoundedSemaphore(limit)
+    return slots
+
+
+def _provider_breaker(provider):
+    with _in_flight_lock:
+        breaker = _breakers.get(provider)
+        if breaker is None:
+            breaker = _breakers[provider] = CircuitBreaker()
+    return breaker
+
+
+class ResilientSource:
+    """
+    PURPOSE:
+    AITradingEngine / scan_universe data source that keeps cycle
+    latency bounded when the provider degrades:
+
+    - every call has a deadline (a hung download is abandoned, the
+      cycle moves on)
+    - failed calls are retried with jittered exponential backoff,
+      within the same deadline
+    - a circuit breaker, shared by every source of the provider,
+      stops calling a provider that keeps failing
+    - on failure the last good frame for the symbol is served,
+      flagged with df.attrs["stale"] = True and its age
+    - begin_cycle() starts a per-cycle budget shared by all symbols;
+      once spent, remaining symbols go straight to the cache
+    - at most `max_in_flight` calls per provider run at once,
+      abandoned ones included, so a hanging provider cannot pile
+      up threads
+    """
+
+    def __init__(self, provider=None, interval="1d", deadline=FETCH_DEADLINE,
+                 retries=FETCH_RETRIES, backoff=FETCH_BACKOFF,
+                 max_backoff=FETCH_MAX_BACKOFF,
+                 cycle_budget=CYCLE_FETCH_BUDGET, breaker=None, seed=None,
+                 max_in_flight=FETCH_MAX_IN_FLIGHT):
+        self.provider = provider or default_provider()
+        self.interval = interval
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.cycle_budget = cycle_budget
+        # one breaker per provider: N engines on a down provider
+        # stop after BREAKER_FAILURES calls, not N × that
+        self.breaker = breaker or _provider_breaker(self.provider)
+        self._slots = _call_slots(self.provider, max_in_flight)
+
+        self._cache = {}
+        self._cycle_end = None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "calls": 0, "ok": 0, "retries": 0, "timeouts": 0,
+            "errors": 0, "refused": 0, "saturated": 0, "stale": 0,
+            "missing": 0
+        }
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    # ======================================================
+    # CYCLE BUDGET
+    # ======================================================
+    def begin_cycle(self):
+        self._cycle_end = (
+            time.monotonic() + self.cycle_budget
+            if self.cycle_budget else None
+        )
+
+    def _call_end(self):
+        end = time.monotonic() + self.deadline
+        if self._cycle_end is not None:
+            end = min(end, self._cycle_end)
+        return end
+
+    # ======================================================
+    # FETCH
+    # ======================================================
+    def fetch(self, symbol, bars=None):
+        self._count("calls")
+        end = self._call_end()
+
+        for attempt in range(self.retries + 1):
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if not self.breaker.allow():
+                self._count("refused")
+                break
+
+            try:
+                df = self._call(symbol, bars, remaining)
+            except FetchSaturated:
+                # earlier calls still hang: not this call's failure
+                self._count("saturated")
+                self.breaker.release_trial()
+                break
+            except FetchTimeout:
+                self._count("timeouts")
+                self.breaker.record_failure()
+            except Exception as e:
+                self._count("errors")
+                self.breaker.record_failure()
+                print(f"⚠️ FETCH ERROR ({self.provider.name} {symbol}):", e)
+            else:
+                self.breaker.record_success()
+                self._count("ok")
+                with self._lock:
+                    self._cache[symbol] = (time.time(), df)
+                return df
+
+            if attempt < self.retries:
+                self._count("retries")
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                delay *= self._rng.uniform(0.5, 1.5)
+                time.sleep(max(0.0, min(delay, end - time.monotonic())))
+
+        return self._stale(symbol, bars)
+
+    def _call(self, symbol, bars, timeout):
+        df = call_with_deadline(
+            self.provider.fetch, (symbol, self.interval, bars, timeout),
+            timeout, self._slots
+        )
+        if df is None or df.empty:
+            raise ValueError(f"empty frame for {symbol}")
+        return df
+
+    def _stale(self, symbol, bars):
+        with self._lock:
+            hit = self._cache.get(symbol)
+        if hit is None:
+            self._count("missing")
+            return pd.DataFrame()
+
+        self._count("stale")
+        fetched_at, df = hit
+        df = (df.tail(bars) if bars else df).copy(deep=False)
+        df.attrs["stale"] = True
+        df.attrs["age_sec"] = round(time.time() - fetched_at, 1)
+        return df
+
+    def status(self):
+        return {
+            "provider": self.provider.name,
+            "breaker": self.breaker.state,
+            **self.stats
+        }
+
+
+# ======================================================
+# DEGRADATION DEMO (FAKE PROVIDER)
+# ======================================================
+def simulate(symbols, cycles=5, latency=0.0, jitter=0.0, failure_rate=0.0,
+             hang_rate=0.0, down_after=None, seed=0, **source_kwargs):
+    """
+    Fetch every symbol once per cycle through ResilientSource on a
+    FakeProvider and report per-cycle latency and data freshness.
+    down_after: provider goes fully down after this many cycles.
+    """
+    provider = FakeProvider(
+        latency=latency, jitter=jitter, failure_rate=failure_rate,
+        hang_rate=hang_rate, seed=seed
+    )
+    source = ResilientSource(provider, seed=seed, **source_kwargs)
+
+    report = []
+    for cycle in range(cycles):
+        if down_after is not None and cycle >= down_after:
+            provider.down = True
+
+        source.begin_cycle()
+        t0 = time.perf_counter()
+        frames = [source.fetch(sym) for sym in symbols]
+
+        report.append({
+            "cycle": cycle,
+            "latency_sec": round(time.perf_counter() - t0, 3),
+            "fresh": sum(not f.empty and not f.attrs.get("stale") for f in frames),
+            "stale": sum(bool(f.attrs.get("stale")) for f in frames),
+            "missing": sum(f.empty for f in frames),
+            "breaker": source.breaker.state
+        })
+
+    return report, source.status()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fetch-layer behaviour under injected provider faults"
+    )
+    parser.add_argument("--symbols", nargs="+",
+                        default=["TCS.NS", "INFY.NS", "ITC.NS", "SBIN.NS"])
+    parser.add_argument("--cycles", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    parser.add_argument("--hang-rate", type=float, default=0.05)
+    parser.add_argument("--down-after", type=int, default=3)
+    parser.add_argument("--deadline", type=float, default=1.0)
+    parser.add_argument("--cycle-budget", type=float, default=3.0)
+    args = parser.parse_args()
+
+    report, status = simulate(
+        args.symbols,
+        cycles=args.cycles,
+        latency=args.latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        hang_rate=args.hang_rate,
+        down_after=args.down_after,
+        deadline=args.deadline,
+        cycle_budget=args.cycle_budget
+    )
+
+    for row in report:
+        print(row)
+    print("\n✅ Source status:", status)
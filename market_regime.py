@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from compact import REGIME_CATEGORIES
+from universe_engine import METADATA_FILE, load_universe
+
+# ======================================================
+# CONFIG
+# ======================================================
+WEIGHTINGS = ["equal", "industry", "cap"]
+CAP_WINDOW = 20              # bars averaged for the traded-value proxy
+
+
+# ======================================================
+# MARKET BREADTH
+# ======================================================
+class MarketBreadth:
+    """
+    PURPOSE:
+    Market-wide regime from the latest regime of every symbol
+    instead of whichever symbol happens to come first.
+
+    weighting:
+    - "equal"    every symbol counts once
+    - "industry" every industry counts once, split over its symbols
+    - "cap"      "Market Cap" column of the metadata file when it
+                 has one, else average traded value (Close × Volume)
+                 over the last CAP_WINDOW bars
+
+    index_regime=True also classifies an equal-weighted synthetic
+    index built from all symbols' returns.
+    """
+
+    def __init__(self, symbols, weighting="equal",
+                 metadata_file=METADATA_FILE, index_regime=False):
+        if weighting not in WEIGHTINGS:
+            raise ValueError(f"weighting must be one of {WEIGHTINGS}")
+
+        self.symbols = list(symbols)
+        self.weighting = weighting
+        self.index_regime = index_regime
+
+        industries = load_universe(metadata_file)
+        self._industry = np.array(
+            [industries.get(s, "UNKNOWN") for s in self.symbols]
+        )
+        self._caps = _market_caps(metadata_file, self.symbols)
+        self._position = {s: i for i, s in enumerate(self.symbols)}
+
+    # ======================================================
+    # WEIGHTS
+    # ======================================================
+    def _weights(self, idx, stock_dfs, present):
+        if self.weighting == "industry":
+            _, inverse, counts = np.unique(
+                self._industry[idx], return_inverse=True, return_counts=True
+            )
+            return 1.0 / counts[inverse]
+
+        if self.weighting == "cap":
+            if self._caps is not None:
+                caps = self._caps[idx]
+            else:
+                caps = np.array([
+                    _traded_value(stock_dfs[s]) for s in present
+                ])
+            return np.nan_to_num(caps, nan=0.0)
+
+        return np.ones(len(idx))
+
+    # ======================================================
+    # UPDATE (ONCE PER CYCLE)
+    # ======================================================
+    def update(self, stock_dfs):
+        """
+        stock_dfs: symbol → frame with market_state (as built by
+        run_cycle). Returns the market regime and breadth shares.
+        """
+        present = [s for s in self.symbols if s in stock_dfs]
+        if not present:
+            return {"regime": None, "breadth": {},
+                    "weighting": self.weighting, "symbols": 0,
+                    "index_regime": None}
+
+        idx = np.array([self._position[s] for s in present])
+        latest = pd.Categorical(
+            [str(stock_dfs[s]["market_state"].iat[-1]) for s in present],
+            categories=REGIME_CATEGORIES
+        )
+        codes = latest.codes
+        known = codes >= 0
+
+        weights = self._weights(idx, stock_dfs, present)[known]
+        if weights.sum() <= 0:
+            weights = np.ones(known.sum())
+
+        shares = np.bincount(
+            codes[known], weights=weights, minlength=len(REGIME_CATEGORIES)
+        ) / weights.sum()
+
+        breadth = {
+            regime: round(float(share), 4)
+            for regime, share in zip(REGIME_CATEGORIES, shares)
+        }
+
+        return {
+            "regime": REGIME_CATEGORIES[int(np.argmax(shares))],
+            "breadth": breadth,
+            "weighting": self.weighting,
+            "symbols": len(present),
+            "index_regime": (
+                synthetic_index_regime(stock_dfs)
+                if self.index_regime else None
+            )
+        }
+
+
+# ======================================================
+# HELPERS
+# ======================================================
+def _market_caps(metadata_file, symbols):
+    """
+    Metadata market caps aligned to symbols, or None when the file
+    has no cap column (the NIFTY-50 file shipped in data/ does not).
+    """
+    try:
+        meta = pd.read_csv(metadata_file)
+    except Exception:
+        return None
+    if "Market Cap" not in meta.columns:
+        return None
+
+    caps = dict(zip(meta["Symbol"].astype(str), meta["Market Cap"]))
+    return np.array(
+        [caps.get(s.split(".")[0], np.nan) for s in symbols], dtype=float
+    )
+
+
+def _traded_value(df):
+    tail = df.iloc[-CAP_WINDOW:]
+    return float(np.nanmean(
+        tail["Close"].to_numpy(dtype=float)
+        * tail["Volume"].to_numpy(dtype=float)
+    ))
+
+
+def synthetic_index_regime(stock_dfs):
+    """
+    Regime of an equal-weighted index: mean return across symbols
+    per date, compounded into a price series and run through the
+    same features and model as a single stock.
+    """
+    from utils import compute_features, predict_regime_rows, FEATURES
+
+    frames = [
+        df[["Date", "return"]] for df in stock_dfs.values()
+        if df is not None and not df.empty
+    ]
+    if not frames:
+        return None
+
+    returns = pd.concat(frames, ignore_index=True).groupby("Date")["return"].mean()
+    index = pd.DataFrame({
+        "Date": returns.index,
+        "Close": 100 * (1 + returns.to_numpy(dtype=float)).cumprod(),
+        "Volume": 0.0
+    })
+
+    feats = compute_features(index)
+    if feats is None or feats.empty:
+        return None
+    return str(predict_regime_rows(feats[FEATURES].iloc[-1:])[0])
@@ -0,0 +1,244 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Model_gen import (
+    VOL_WINDOW,
+    SHORT_MA,
+    LONG_MA,
+    FEATURES,
+    label_market_state
+)
+
+# ======================================================
+# CONFIG
+# ======================================================
+DATA_FOLDER = "data"
+ANNUALIZATION = 252          # utils.bars_per_year(interval) for intraday
+
+
+# ======================================================
+# ALIGNED PANEL
+# ======================================================
+class Panel:
+    """
+    PURPOSE:
+    Closes of many symbols on one shared calendar, as a
+    (dates × symbols) matrix.
+
+    present:  the symbol has a row on that date in its source
+    complete: that row has no missing field (process_stock drops
+              rows with any NaN column, e.g. early blank 'Trades')
+    Dates a symbol was not listed / not traded are NaN in close.
+    """
+
+    def __init__(self, dates, symbols, close, present, complete=None):
+        self.dates = pd.DatetimeIndex(dates)
+        self.symbols = list(symbols)
+        self.close = close
+        self.present = present
+        self.complete = present if complete is None else complete
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    @classmethod
+    def from_frames(cls, frames):
+        """
+        frames: symbol → frame with Date / Close (any other columns
+        count towards `complete`).
+        """
+        symbols = list(frames)
+        dates = np.unique(np.concatenate([
+            frames[s]["Date"].to_numpy(dtype="datetime64[ns]")
+            for s in symbols
+        ]))
+
+        close = np.full((len(dates), len(symbols)), np.nan)
+        present = np.zeros(close.shape, dtype=bool)
+        complete = np.zeros(close.shape, dtype=bool)
+
+        for j, s in enumerate(symbols):
+            df = frames[s]
+            rows = np.searchsorted(
+                dates, df["Date"].to_numpy(dtype="datetime64[ns]")
+            )
+            close[rows, j] = df["Close"].to_numpy(dtype=float)
+            present[rows, j] = True
+            complete[rows, j] = df.notna().all(axis=1).to_numpy()
+
+        return cls(dates, symbols, close, present, complete)
+
+
+def load_panel(data_folder=DATA_FOLDER, symbols=None):
+    """
+    data/ CSVs → Panel, symbols named after the file stem
+    (same file order as Model_gen.load_dataset).
+    """
+    frames = {}
+    for file in sorted(os.listdir(data_folder)):
+        if not file.endswith(".csv") or file == "stock_metadata.csv":
+            continue
+        symbol = file[:-4]
+        if symbols is not None and symbol not in symbols:
+            continue
+
+        df = pd.read_csv(os.path.join(data_folder, file), parse_dates=["Date"])
+        if "Close" not in df.columns:
+            continue
+        frames[symbol] = df.sort_values("Date", kind="stable")
+
+    if not frames:
+        raise RuntimeError("❌ No valid stock files found")
+    return Panel.from_frames(frames)
+
+
+# ======================================================
+# KERNELS (ALL SYMBOLS IN ONE PASS)
+# ======================================================
+def _pack(values, present):
+    """
+    Move each column's present rows to the top, so windows count
+    a symbol's own bars exactly like per-symbol rolling() does;
+    calendar gaps never enter a window.
+    """
+    order = np.argsort(~present, axis=0, kind="stable")
+    packed = np.take_along_axis(values, order, axis=0)
+    packed[np.take_along_axis(~present, order, axis=0)] = np.nan
+    return packed, order
+
+
+def _unpack(packed, order, present):
+    out = np.empty_like(packed)
+    np.put_along_axis(out, order, packed, axis=0)
+    out[~present] = np.nan
+    return out
+
+
+def _rolling(x, window):
+    """
+    pandas' rolling kernels applied column-wise to the whole packed
+    matrix in one call: the same online algorithm per-symbol
+    rolling() runs, so values match bit for bit.
+    """
+    return pd.DataFrame(x, copy=False).rolling(window)
+
+
+def panel_features(close, present=None, annualization=ANNUALIZATION):
+    """
+    Same features as utils.compute_features / process_stock, for a
+    (dates × symbols) close matrix. Returns {feature: matrix}; rows
+    that a per-symbol frame would hold NaN in are NaN here too.
+    """
+    close = np.asarray(close, dtype=float)
+    if present is None:
+        present = ~np.isnan(close)
+
+    packed, order = _pack(close, present)
+
+    ret = np.full(packed.shape, np.nan)
+    ret[1:] = packed[1:] / packed[:-1] - 1
+
+    volatility = (
+        _rolling(ret, VOL_WINDOW).std().to_numpy() * np.sqrt(annualization)
+    )
+    ma_short = _rolling(packed, SHORT_MA).mean().to_numpy()
+    ma_long = _rolling(packed, LONG_MA).mean().to_numpy()
+
+    # cummax skips missing closes, as pandas does
+    rolling_max = np.fmax.accumulate(packed, axis=0)
+    drawdown = (packed - rolling_max) / rolling_max
+
+    features = {
+        "return": ret,
+        "volatility": volatility,
+        "ma_short": ma_short,
+        "ma_long": ma_long,
+        "drawdown": drawdown
+    }
+    return {
+        name: _unpack(values, order, present)
+        for name, values in features.items()
+    }
+
+
+def panel_labels(features):
+    """
+    Vectorized Model_gen.detect_market_state over the matrices.
+    """
+    return label_market_state(
+        features["drawdown"], features["volatility"],
+        features["ma_short"], features["ma_long"]
+    )
+
+
+# ======================================================
+# LONG FORMAT (TRAINING)
+# ======================================================
+def panel_dataset(panel, labels=True):
+    """
+    Rows Model_gen.load_dataset would produce (same values, same
+    symbol-then-date order): rows with every feature available and
+    a complete source row.
+    """
+    features = panel_features(panel.close, panel.present)
+
+    keep = panel.complete & panel.present
+    for values in features.values():
+        keep &= ~np.isnan(values)
+
+    # symbol-major order = one file after another
+    cols, rows = np.nonzero(keep.T)
+
+    out = pd.DataFrame({
+        "Date": panel.dates[rows],
+        "Symbol": np.asarray(panel.symbols, dtype=object)[cols],
+        "Close": panel.close[rows, cols],
+        **{f: features[f][rows, cols] for f in FEATURES}
+    })
+    if labels:
+        out["market_state"] = panel_labels(
+            {f: out[f].to_numpy() for f in FEATURES}
+        )
+    return out
+
+
+# ======================================================
+# BACKTESTS
+# ======================================================
+def panel_backtest(panel, equity_weight, annualization=ANNUALIZATION):
+    """
+    Constant-weight backtest of every symbol at once; listing
+    gaps are NaN returns, which BacktestAccumulator skips.
+    """
+    from backtest import BacktestAccumulator
+
+    features = panel_features(panel.close, panel.present, annualization)
+    acc = BacktestAccumulator(
+        n_series=len(panel.symbols), annualization=annualization
+    )
+    acc.update_many(features["return"] * equity_weight)
+
+    return pd.DataFrame(acc.metrics(), index=panel.symbols)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Featurize all data/ files as one panel"
+    )
+    parser.add_argument("--data-folder", default=DATA_FOLDER)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    panel = load_panel(args.data_folder)
+    t1 = time.perf_counter()
+    dataset = panel_dataset(panel)
+    t2 = time.perf_counter()
+
+    print(f"✅ Panel {panel.shape[0]} dates × {panel.shape[1]} symbols")
+    print(f" - load: {t1 - t0:.2f}s")
+    print(f" - features + labels: {t2 - t1:.2f}s ({len(dataset)} rows)")
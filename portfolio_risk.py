@@ -0,0 +1,270 @@
+import os
+from functools import lru_cache
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+DATA_FOLDER = "data"
+
+COV_WINDOW = 252
+SHRINKAGE = 0.10
+ANNUALIZATION = 252
+REBUILD_EVERY = 1000     # re-sum the window to cancel float drift
+MARKET_SHOCK = -0.03     # systemic stress: one-day market move
+
+
+# ======================================================
+# UNIVERSE LOADER
+# ======================================================
+def load_universe_returns(data_folder=DATA_FOLDER, symbols=None):
+    """
+    Aligned (dates × symbols) daily return matrix from data/*.csv.
+    Dates where a symbol was not listed stay NaN.
+    """
+    cols = {}
+
+    for file in sorted(os.listdir(data_folder)):
+        if not file.endswith(".csv") or file == "stock_metadata.csv":
+            continue
+
+        symbol = file[:-4]
+        if symbols is not None and symbol not in symbols:
+            continue
+
+        df = pd.read_csv(
+            os.path.join(data_folder, file),
+            usecols=["Date", "Close"],
+            parse_dates=["Date"]
+        )
+        if df.empty:
+            continue                 # header-only file (e.g. INFRATEL)
+        df = df.sort_values("Date").drop_duplicates("Date")
+        cols[symbol] = df.set_index("Date")["Close"].pct_change()
+
+    return pd.concat(cols, axis=1, sort=True)
+
+
+@lru_cache(maxsize=4)
+def cached_universe_returns(data_folder=DATA_FOLDER):
+    """
+    load_universe_returns() of the whole folder, parsed once per
+    process and shared by every engine (treat as read-only).
+    """
+    return load_universe_returns(data_folder)
+
+
+class RollingCovariance:
+    """
+    PURPOSE:
+    Rolling, NaN-aware covariance / correlation across many symbols,
+    updated incrementally as bars arrive.
+
+    Pairwise sums (counts, sums, cross-products) over the last
+    `window` return rows are kept as n × n matrices, so one new bar
+    costs O(n²) (a few rank-1 updates) instead of re-estimating the
+    whole matrix. Shrinkage pulls off-diagonal terms towards zero
+    for a well-conditioned estimate with few bars or many symbols.
+    """
+
+    def __init__(self, symbols, window=COV_WINDOW, shrinkage=SHRINKAGE,
+                 annualization=ANNUALIZATION):
+        self.symbols = list(symbols)
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        self.window = int(window)
+        self.shrinkage = float(shrinkage)
+        self.annualization = annualization
+
+        n = len(self.symbols)
+        self._rows = np.full((self.window, n), np.nan)
+        self._head = 0
+        self._filled = 0
+        self._since_rebuild = 0
+
+        self._n = np.zeros((n, n))      # pairwise valid counts
+        self._sx = np.zeros((n, n))     # Σ x_i over rows where i & j valid
+        self._p = np.zeros((n, n))      # Σ x_i x_j
+        self.last_date = None
+
+    # ======================================================
+    # UPDATE
+    # ======================================================
+    def update(self, returns):
+        self.update_many(np.asarray(returns, dtype=float)[np.newaxis])
+
+    def update_many(self, block):
+        """
+        block: (bars × symbols) returns, oldest first.
+        """
+        block = np.asarray(block, dtype=float)
+        if len(block) == 0:
+            return
+        if len(block) > self.window:
+            block = block[-self.window:]
+
+        k = len(block)
+        slots = (self._head + np.arange(k)) % self.window
+
+        # rows about to be overwritten leave the window
+        n_evicted = max(0, self._filled + k - self.window)
+        if n_evicted:
+            oldest = self._head - self._filled
+            old_slots = (oldest + np.arange(n_evicted)) % self.window
+            self._accumulate(self._rows[old_slots], sign=-1.0)
+
+        self._rows[slots] = block
+        self._accumulate(block, sign=1.0)
+
+        self._head = (self._head + k) % self.window
+        self._filled = min(self.window, self._filled + k)
+
+        self._since_rebuild += k
+        if self._since_rebuild >= REBUILD_EVERY:
+            self._rebuild()
+
+    def update_frame(self, returns_df):
+        """
+        returns_df: (dates × symbols) frame; only dates after the
+        last one seen are fed.
+        """
+        df = returns_df.reindex(columns=self.symbols)
+        if self.last_date is not None:
+            df = df[df.index > self.last_date]
+        if df.empty:
+            return
+
+        self.update_many(df.to_numpy(dtype=float))
+        self.last_date = df.index[-1]
+
+    def update_frames(self, stock_dfs):
+        """
+        stock_dfs: symbol → feature frame with Date / return columns.
+        """
+        cols = {
+            sym: df.set_index("Date")["return"]
+            for sym, df in stock_dfs.items()
+            if sym in self.index and df is not None and not df.empty
+        }
+        if cols:
+            frame = pd.concat(cols, axis=1, sort=True)
+            # live (Yahoo) dates are tz-aware, data/ dates are not
+            if getattr(frame.index, "tz", None) is not None:
+                frame.index = frame.index.tz_localize(None)
+            self.update_frame(frame)
+
+    def _accumulate(self, block, sign):
+        mask = (~np.isnan(block)).astype(float)
+        x0 = np.where(mask > 0, block, 0.0)
+
+        self._n += sign * (mask.T @ mask)
+        self._sx += sign * (x0.T @ mask)
+        self._p += sign * (x0.T @ x0)
+
+    def _rebuild(self):
+        n = len(self.symbols)
+        self._n = np.zeros((n, n))
+        self._sx = np.zeros((n, n))
+        self._p = np.zeros((n, n))
+        self._accumulate(self._rows[:self._filled] if self._filled < self.window
+                         else self._rows, sign=1.0)
+        self._since_rebuild = 0
+
+    # ======================================================
+    # ESTIMATES
+    # ======================================================
+    def covariance(self, shrinkage=None):
+        """
+        Daily covariance with pairwise-complete observations,
+        shrunk towards its own diagonal.
+        """
+        delta = self.shrinkage if shrinkage is None else shrinkage
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = (
+                self._p - self._sx * self._sx.T / self._n
+            ) / (self._n - 1)
+        cov[self._n < 2] = np.nan
+
+        # symbols without an estimate contribute nothing
+        cov = np.nan_to_num(cov, nan=0.0)
+        diag = np.diag(np.diag(cov))
+        return (1 - delta) * cov + delta * diag
+
+    def correlation(self, shrinkage=None):
+        cov = self.covariance(shrinkage)
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return np.nan_to_num(corr, nan=0.0)
+
+    def _weights(self, weights):
+        if isinstance(weights, dict):
+            w = np.zeros(len(self.symbols))
+            for sym, v in weights.items():
+                if sym in self.index:
+                    w[self.index[sym]] = v
+            return w
+        return np.asarray(weights, dtype=float)
+
+    def portfolio_volatility(self, weights, annualize=True):
+        w = self._weights(weights)
+        var = max(float(w @ self.covariance() @ w), 0.0)
+        if annualize:
+            var *= self.annualization
+        return np.sqrt(var)
+
+    def marginal_contributions(self, weights):
+        """
+        Marginal risk (∂σ/∂w_i) and component contributions
+        (w_i · ∂σ/∂w_i, summing to σ) per symbol, annualized.
+        """
+        w = self._weights(weights)
+        cov = self.covariance() * self.annualization
+        sigma_w = cov @ w
+        vol = np.sqrt(max(float(w @ sigma_w), 0.0))
+
+        marginal = sigma_w / vol if vol > 0 else np.zeros_like(w)
+        component = w * marginal
+
+        return pd.DataFrame({
+            "weight": w,
+            "marginal": marginal,
+            "contribution": component,
+            "share": component / vol if vol > 0 else np.zeros_like(w)
+        }, index=self.symbols)
+
+    def parametric_var(self, weights, confidence=0.95, horizon=1,
+                       portfolio_value=1.0):
+        """
+        Gaussian (variance-covariance) Value-at-Risk, as a positive
+        loss over `horizon` bars.
+        """
+        z = NormalDist().inv_cdf(confidence)
+        daily_vol = self.portfolio_volatility(weights, annualize=False)
+        return float(z * daily_vol * np.sqrt(horizon) * portfolio_value)
+
+    def betas(self, weights=None):
+        """
+        Beta of every symbol to a portfolio (equal weight by default).
+        """
+        n = len(self.symbols)
+        w = np.full(n, 1.0 / n) if weights is None else self._weights(weights)
+        cov = self.covariance()
+        port_var = float(w @ cov @ w)
+        if port_var <= 0:
+            return np.ones(n)
+        return (cov @ w) / port_var
+
+
+def correlated_shock(cov_model, market_shock=MARKET_SHOCK, weights=None):
+    """
+    Per-symbol returns for a systemic move of `market_shock` in the
+    (equal-weighted) market, scaled by each symbol's beta.
+    """
+    return pd.Series(
+        cov_model.betas(weights) * market_shock,
+        index=cov_model.symbols
+    )
@@ -0,0 +1,233 @@
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+
+from config import STATE_DIR
+
+# ======================================================
+# CONFIG
+# ======================================================
+SNAPSHOT_FILE = "snapshot.json"
+SNAPSHOT_EVERY = 500           # WAL records between snapshots
+
+# record = [length:uint32][crc32:uint32][payload]
+# payload = [type:uint8][seq:uint64][time:f64][position:int64]
+#           [cash:f64][price:f64][key utf-8 ...]
+_HEADER = struct.Struct("<II")
+_BODY = struct.Struct("<BQdqdd")
+
+TRADE, START, STOP = 1, 2, 3
+_SEP = "\x1f"                  # key / interval separator in START
+
+
+def _segment_name(seq):
+    return f"wal-{seq:012d}.log"
+
+
+# ======================================================
+# WRITE-AHEAD LOG + SNAPSHOTS
+# ======================================================
+class PortfolioStore:
+    """
+    PURPOSE:
+    Durable PaperTrader state for every live engine.
+
+    Each executed trade appends one small fixed-layout record (the
+    trader's cash / position / price after the trade) to the
+    current WAL segment and is fsync'd before the cycle moves on.
+    Every `snapshot_every` records the whole state is written to
+    snapshot.json (temp file + rename) and a fresh segment starts,
+    so a restart loads one snapshot and replays only the tail.
+
+    Records carry a CRC32: a record torn by a crash mid-write fails
+    the check, recovery stops there and truncates the segment.
+    Records hold absolute state, so replaying one twice is harmless.
+    """
+
+    def __init__(self, folder=STATE_DIR, snapshot_every=SNAPSHOT_EVERY,
+                 sync=True):
+        self.folder = folder
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+
+        os.makedirs(folder, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self.engines = {}        # key → {"interval", "cash", "position", "price"}
+        self.seq = 0
+        self._since_snapshot = 0
+        self._file = None
+
+        self._recover()
+
+    # ======================================================
+    # RECOVERY
+    # ======================================================
+    def _recover(self):
+        path = os.path.join(self.folder, SNAPSHOT_FILE)
+        segment_seq = 0
+
+        if os.path.exists(path):
+            with open(path) as f:
+                snap = json.load(f)
+            self.engines = snap["engines"]
+            self.seq = snap["seq"]
+            segment_seq = snap["segment"]
+
+        replayed = 0
+        for name in self._segments():
+            if int(name[4:16]) < segment_seq:
+                continue
+            replayed += self._replay(os.path.join(self.folder, name))
+
+        self._since_snapshot = replayed
+        self._open_segment(self._last_segment() or _segment_name(segment_seq))
+        self.recovered = replayed
+
+    def _segments(self):
+        return sorted(
+            f for f in os.listdir(self.folder)
+            if f.startswith("wal-") and f.endswith(".log")
+        )
+
+    def _last_segment(self):
+        segments = self._segments()
+        return segments[-1] if segments else None
+
+    def _replay(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+
+        offset = 0
+        count = 0
+        while offset + _HEADER.size <= len(data):
+            length, crc = _HEADER.unpack_from(data, offset)
+            start = offset + _HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            self._apply(payload)
+            offset = start + length
+            count += 1
+
+        if offset < len(data):
+            # torn tail from a crash mid-write
+            print(f"⚠️ WAL: truncating {len(data) - offset} torn bytes in {path}")
+            with open(path, "r+b") as f:
+                f.truncate(offset)
+        return count
+
+    def _apply(self, payload):
+        kind, seq, _, position, cash, price = _BODY.unpack_from(payload)
+        key = payload[_BODY.size:].decode()
+        if seq <= self.seq:
+            return              # already covered by the snapshot
+        self.seq = seq
+
+        if kind == START:
+            key, interval = key.split(_SEP)
+            self.engines.setdefault(key, {
+                "interval": interval, "cash": cash,
+                "position": position, "price": None
+            })["interval"] = interval
+        elif kind == STOP:
+            self.engines.pop(key, None)
+        elif kind == TRADE and key in self.engines:
+            self.engines[key].update(
+                cash=cash, position=position, price=price
+            )
+
+    # ======================================================
+    # APPEND
+    # ======================================================
+    def _open_segment(self, name):
+        if self._file is not None:
+            self._file.close()
+        self._segment = name
+        self._file = open(os.path.join(self.folder, name), "ab")
+
+    def _append(self, kind, key, position=0, cash=0.0, price=0.0):
+        # caller holds self._lock
+        payload = _BODY.pack(
+            kind, self.seq + 1, time.time(), int(position),
+            float(cash), float(price or 0.0)
+        ) + key.encode()
+        record = _HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+        self._file.write(record)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+
+        self._apply(payload)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self._snapshot()
+
+    def start(self, key, interval="1d", cash=100000.0):
+        """
+        Register a live engine. Returns its saved state when the
+        engine was already known (restart), else None.
+        """
+        with self._lock:
+            known = self.engines.get(key)
+            if known is not None:
+                return dict(known)
+            self._append(START, f"{key}{_SEP}{interval}", cash=cash)
+            return None
+
+    def stop(self, key):
+        with self._lock:
+            if key in self.engines:
+                self._append(STOP, key)
+
+    def record(self, key, trader):
+        with self._lock:
+            self._append(
+                TRADE, key, trader.position, trader.cash, trader.last_price
+            )
+
+    def journal(self, key):
+        """
+        PaperTrader.journal hook for one engine.
+        """
+        return lambda trader: self.record(key, trader)
+
+    # ======================================================
+    # SNAPSHOT
+    # ======================================================
+    def snapshot(self):
+        with self._lock:
+            self._snapshot()
+
+    def _snapshot(self):
+        # new segment first: the snapshot covers everything before it
+        self._open_segment(_segment_name(self.seq + 1))
+
+        snap = {
+            "seq": self.seq,
+            "segment": self.seq + 1,
+            "created": time.time(),
+            "engines": self.engines
+        }
+        path = os.path.join(self.folder, SNAPSHOT_FILE)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(snap, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        for name in self._segments():
+            if name < self._segment:
+                os.remove(os.path.join(self.folder, name))
+        self._since_snapshot = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
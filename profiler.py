@@ -0,0 +1,298 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# ======================================================
+# CONFIG
+# ======================================================
+SAMPLE_INTERVAL = 0.005        # seconds between stack samples
+MAX_CYCLES = 50
+TOP_N = 25
+
+
+# tracemalloc is process-wide: the first memory profile starts it,
+# the last one to finish stops it (unless it was on already)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _tracing_acquire():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _tracing_release():
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _tracing_owned = False
+
+
+def _frame_name(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+# ======================================================
+# STACK SAMPLER (ONE THREAD)
+# ======================================================
+class _Sampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from
+    a background thread; counts collapsed stacks ("a;b;c") below
+    the `root` frame (the profiler's own run()).
+    """
+
+    def __init__(self, thread_id, interval, stacks, root):
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks = stacks
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="profile-sampler"
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None and frame.f_code is not self.root:
+                names.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+
+# ======================================================
+# CYCLE PROFILER
+# ======================================================
+class CycleProfiler:
+    """
+    PURPOSE:
+    Profile the next `cycles` run_cycle() calls of one live engine,
+    then detach. Nothing is installed until a cycle is actually
+    profiled, so an engine without an armed profiler runs exactly
+    as before.
+
+    mode "cprofile": deterministic, exact call counts, top-functions
+                     report (per-call overhead while attached)
+    mode "sample":   stack sampling every `interval` seconds, low
+                     overhead, flamegraph collapsed stacks
+    memory:          also trace allocations (tracemalloc) and report
+                     the lines that allocated most during the cycles
+    """
+
+    def __init__(self, cycles=1, mode="sample", memory=False,
+                 interval=SAMPLE_INTERVAL):
+        if mode not in ("cprofile", "sample"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.cycles = max(1, min(int(cycles), MAX_CYCLES))
+        self.mode = mode
+        self.memory = memory
+        self.interval = interval
+
+        self.done = 0
+        self.cycle_sec = []
+        self.finished = threading.Event()
+
+        self._profile = cProfile.Profile() if mode == "cprofile" else None
+        self._stacks = Counter()
+        self._memory_start = None
+        self._memory_top = None
+        self._tracing = False
+
+    # ======================================================
+    # RUN (CALLED FROM THE ENGINE THREAD)
+    # ======================================================
+    def run(self, fn):
+        """
+        fn() under the profiler; returns its result.
+        """
+        if self.memory and not self._tracing and not self.finished.is_set():
+            _tracing_acquire()
+            self._tracing = True
+            self._memory_start = tracemalloc.take_snapshot()
+
+        sampler = None
+        if self._profile is not None:
+            self._profile.enable()
+        else:
+            sampler = _Sampler(
+                threading.get_ident(), self.interval, self._stacks,
+                CycleProfiler.run.__code__
+            )
+            sampler.start()
+
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            self.cycle_sec.append(round(time.perf_counter() - t0, 4))
+            if self._profile is not None:
+                self._profile.disable()
+            else:
+                sampler.stop()
+
+            self.done += 1
+            if self.done >= self.cycles:
+                self._finish()
+
+    def _finish(self):
+        try:
+            if self._tracing:
+                self._memory_top = self._memory_diff()
+        finally:
+            if self._tracing:
+                self._tracing = False
+                self._memory_start = None
+                _tracing_release()
+            self.finished.set()
+
+    def _memory_diff(self):
+        if not tracemalloc.is_tracing():
+            return None                # stopped outside the profiler
+
+        # the profiler's own bookkeeping is not the engine's
+        ignore = [
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ]
+        diff = tracemalloc.take_snapshot().filter_traces(ignore).compare_to(
+            self._memory_start.filter_traces(ignore), "lineno"
+        )
+        return [
+            {
+                "where": str(stat.traceback[0]),
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff
+            }
+            for stat in diff[:TOP_N]
+        ]
+
+    # ======================================================
+    # REPORTS
+    # ======================================================
+    def collapsed(self):
+        """
+        Collapsed stacks ("frame;frame;frame count" per line), the
+        input format of flamegraph.pl / speedscope. cProfile mode
+        has no full stacks: caller → callee pairs are emitted.
+        """
+        if self._profile is None:
+            stacks = self._stacks
+        else:
+            stacks = Counter()
+            stats = pstats.Stats(self._profile).stats
+            for func, (_, _, tottime, _, callers) in stats.items():
+                name = _pstats_name(func)
+                if not callers:
+                    stacks[name] += int(tottime * 1e6)
+                for caller, caller_stats in callers.items():
+                    # µs of callee self time reached from this caller
+                    stacks[f"{_pstats_name(caller)};{name}"] += int(
+                        caller_stats[2] * 1e6
+                    )
+
+        return "".join(
+            f"{stack} {count}\n" for stack, count in stacks.most_common()
+            if count > 0
+        )
+
+    def top(self, n=TOP_N):
+        if self._profile is not None:
+            stats = pstats.Stats(self._profile).stats
+            rows = sorted(
+                (
+                    {
+                        "function": _pstats_name(func),
+                        "calls": nc,
+                        "self_sec": round(tottime, 4),
+                        "total_sec": round(cumtime, 4)
+                    }
+                    for func, (_, nc, tottime, cumtime, _) in stats.items()
+                ),
+                key=lambda row: -row["self_sec"]
+            )
+            return rows[:n]
+
+        total = sum(self._stacks.values()) or 1
+        own, inclusive = Counter(), Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+
+        return [
+            {
+                "function": name,
+                "samples": count,
+                "self_pct": round(100 * count / total, 1),
+                "total_pct": round(100 * inclusive[name] / total, 1)
+            }
+            for name, count in own.most_common(n)
+        ]
+
+    def text(self, n=TOP_N):
+        """
+        pstats-style report (cProfile) or the sampled top table.
+        """
+        if self._profile is not None:
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out) \
+                .sort_stats("tottime").print_stats(n)
+            return out.getvalue()
+
+        lines = [f"{'self%':>6} {'total%':>7} {'samples':>8}  function"]
+        for row in self.top(n):
+            lines.append(
+                f"{row['self_pct']:>6} {row['total_pct']:>7} "
+                f"{row['samples']:>8}  {row['function']}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def status(self):
+        return {
+            "mode": self.mode,
+            "cycles": self.cycles,
+            "done": self.done,
+            "finished": self.finished.is_set(),
+            "cycle_sec": self.cycle_sec,
+            "memory": self.memory
+        }
+
+    def report(self):
+        return {
+            **self.status(),
+            "top": self.top() if self.finished.is_set() else [],
+            "memory_top": self._memory_top
+        }
+
+
+def _pstats_name(func):
+    filename, line, name = func
+    if filename == "~":
+        return name                # builtins: "<method 'sort' ...>"
+    return f"{os.path.basename(filename)}:{name}"
@@ -0,0 +1,210 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# ======================================================
+# CONFIG
+# ======================================================
+DATA_FOLDER = "data"
+LOOKBACK_BARS = 126          # ≈ the live fetch's period="6mo"
+REPLAY_LOG_FILE = "logs/replay_trades.csv"
+
+
+def data_file_symbol(symbol):
+    """
+    "TCS.NS" → "TCS", "M&M.NS" → "MM" (data/ file names)
+    """
+    return symbol.split(".")[0].replace("&", "")
+
+
+class ReplayClock:
+    """
+    Deterministic clock: always returns the bar currently replayed.
+    """
+
+    def __init__(self):
+        self.current = None
+
+    def __call__(self):
+        return self.current.to_pydatetime()
+
+
+class ReplayDataSource:
+    """
+    PURPOSE:
+    Stream historical bars from the data/ CSVs into AITradingEngine
+    as if they were live downloads.
+
+    Every CSV is parsed once into NumPy arrays; fetch() then cuts
+    the trailing `lookback` bars up to the replay clock with a
+    binary search, so each cycle sees exactly what a live fetch
+    would have returned on that day (no look-ahead).
+    """
+
+    def __init__(self, symbols, data_folder=DATA_FOLDER, start=None,
+                 end=None, lookback=LOOKBACK_BARS):
+        self.symbols = list(symbols)
+        self.lookback = lookback
+        self.clock = ReplayClock()
+
+        self._dates = {}
+        self._close = {}
+        self._volume = {}
+
+        for sym in self.symbols:
+            path = os.path.join(data_folder, data_file_symbol(sym) + ".csv")
+            if not os.path.exists(path):
+                print(f"⚠️ REPLAY: no data file for {sym}")
+                continue
+
+            df = pd.read_csv(
+                path, usecols=["Date", "Close", "Volume"],
+                parse_dates=["Date"]
+            ).sort_values("Date")
+
+            self._dates[sym] = df["Date"].to_numpy(dtype="datetime64[ns]")
+            self._close[sym] = df["Close"].to_numpy(dtype=float)
+            self._volume[sym] = df["Volume"].to_numpy(dtype=float)
+
+        if not self._dates:
+            raise RuntimeError("❌ No replay data found")
+
+        calendar = np.unique(np.concatenate(list(self._dates.values())))
+        if start is not None:
+            calendar = calendar[calendar >= np.datetime64(start)]
+        if end is not None:
+            calendar = calendar[calendar <= np.datetime64(end)]
+
+        self.calendar = calendar
+        self._cursor = -1
+
+    def __len__(self):
+        return len(self.calendar)
+
+    # ======================================================
+    # CLOCK CONTROL
+    # ======================================================
+    def advance(self):
+        """
+        Move the clock to the next trading date. False when done.
+        """
+        self._cursor += 1
+        if self._cursor >= len(self.calendar):
+            return False
+        self.clock.current = pd.Timestamp(self.calendar[self._cursor])
+        return True
+
+    # ======================================================
+    # DATA SOURCE API (same contract as fetch_live_data)
+    # ======================================================
+    def fetch(self, symbol, bars=None):
+        dates = self._dates.get(symbol)
+        if dates is None or self.clock.current is None:
+            return pd.DataFrame()
+
+        now = np.datetime64(self.clock.current)
+        end = np.searchsorted(dates, now, side="right")
+        start = max(0, end - (bars or self.lookback))
+        if end == start:
+            return pd.DataFrame()
+
+        return pd.DataFrame({
+            "Date": dates[start:end],
+            "Close": self._close[symbol][start:end],
+            "Volume": self._volume[symbol][start:end]
+        })
+
+
+# ======================================================
+# REPLAY DRIVER
+# ======================================================
+def replay(symbols, start=None, end=None, speed=None,
+           lookback=LOOKBACK_BARS, log_file=REPLAY_LOG_FILE,
+           on_result=None, max_cycles=None, seed=0):
+    """
+    Drive AITradingEngine.run_cycle once per historical trading day.
+
+    speed: bars per second (None → as fast as possible)
+    on_result(date, result): optional per-cycle callback
+    seed: paper trader jitter seed, so repeated replays match
+    """
+    from trading_engine import AITradingEngine
+
+    source = ReplayDataSource(symbols, start=start, end=end,
+                              lookback=lookback)
+    engine = AITradingEngine(
+        symbols, data_source=source, clock=source.clock,
+        log_file=log_file, seed=seed
+    )
+
+    cycles = 0
+    t0 = time.perf_counter()
+    interval = 1.0 / speed if speed else 0.0
+
+    while source.advance():
+        tick = time.perf_counter()
+        result = engine.run_cycle()
+        cycles += 1
+
+        if on_result is not None:
+            on_result(source.clock.current, result)
+
+        if max_cycles and cycles >= max_cycles:
+            break
+
+        if interval:
+            time.sleep(max(0.0, interval - (time.perf_counter() - tick)))
+
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "symbols": len(symbols),
+        "cycles": cycles,
+        "elapsed_sec": round(elapsed, 3),
+        "cycles_per_sec": round(cycles / elapsed, 2) if elapsed else None,
+        "final_portfolio": engine.trader.snapshot()
+    }
+
+
+def _all_symbols(data_folder=DATA_FOLDER):
+    return sorted(
+        f[:-4] for f in os.listdir(data_folder)
+        if f.endswith(".csv") and f != "stock_metadata.csv"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay data/ history through the live trading engine"
+    )
+    parser.add_argument("--symbols", nargs="+", default=["all"],
+                        help="symbols (TCS or TCS.NS) or 'all'")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--speed", type=float, default=None,
+                        help="bars per second (default: max speed)")
+    parser.add_argument("--lookback", type=int, default=LOOKBACK_BARS)
+    parser.add_argument("--max-cycles", type=int, default=None)
+    parser.add_argument("--log-file", default=REPLAY_LOG_FILE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    symbols = _all_symbols() if args.symbols == ["all"] else args.symbols
+
+    stats = replay(
+        symbols,
+        start=args.start,
+        end=args.end,
+        speed=args.speed,
+        lookback=args.lookback,
+        log_file=args.log_file,
+        max_cycles=args.max_cycles,
+        seed=args.seed
+    )
+
+    print("\n✅ Replay finished")
+    for k, v in stats.items():
+        print(f" - {k}: {v}")
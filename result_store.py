@@ -0,0 +1,213 @@
+import os
+import threading
+import time
+import uuid
+
+from timeseries import RingBuffer
+
+try:
+    import msgpack
+except ImportError:  # optional binary encoding
+    msgpack = None
+
+# ======================================================
+# CONFIG
+# ======================================================
+HISTORY_SIZE = 2048
+
+
+def graph_point(result):
+    """
+    Flatten one run_cycle result into the numbers the charts plot.
+    """
+    portfolio = result.get("portfolio", {}) or {}
+    risk = result.get("risk", {}) or {}
+
+    return {
+        "price": portfolio.get("price"),
+        "volatility": risk.get("volatility"),
+        "drawdown": risk.get("max_drawdown"),
+        "allocation": result.get("allocation"),
+        "portfolio_value": portfolio.get("portfolio_value")
+    }
+
+
+def _spill_file(spill_dir, key, epoch):
+    safe = "".join(c if c.isalnum() else "_" for c in key)
+    return os.path.join(spill_dir, f"{safe}-{epoch}.f64")
+
+
+class _Entry:
+    def __init__(self, key, history_size, spill_dir=None):
+        # epoch changes whenever an engine is (re)started so that
+        # ETags from a previous run can never match the new one
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self.data = {}
+        self.field_versions = {}
+        self.history = RingBuffer(
+            capacity=history_size,
+            spill_path=(
+                _spill_file(spill_dir, key, self.epoch)
+                if spill_dir else None
+            )
+        )
+
+    @property
+    def etag(self):
+        return f"{self.epoch}-{self.version}"
+
+
+class ResultStore:
+    """
+    PURPOSE:
+    Versioned store of the latest live result per engine key.
+
+    Every publish bumps the version, records which top-level fields
+    changed and appends a chart point to the engine's ring buffer, so
+    pollers can ask for "what changed since version N" instead of
+    re-downloading the whole nested result.
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE, spill_dir=None):
+        self.history_size = history_size
+        self.spill_dir = spill_dir
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    # ======================================================
+    # DICT-LIKE ACCESS (KEEPS app.py ROUTES SIMPLE)
+    # ======================================================
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __getitem__(self, key):
+        return self._entries[key].data
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        entry.history.flush()
+        return entry.data
+
+    def entry(self, key):
+        return self._entries.get(key)
+
+    # ======================================================
+    # WRITE PATH (ONCE PER CYCLE)
+    # ======================================================
+    def publish(self, key, result):
+        """
+        result must already be JSON safe.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(key, self.history_size, self.spill_dir)
+                self._entries[key] = entry
+
+            changed = [
+                field for field, value in result.items()
+                if entry.data.get(field) != value
+            ]
+            changed += [f for f in entry.data if f not in result]
+
+            if not changed and entry.version > 0:
+                return entry.version
+
+            entry.version += 1
+            for field in changed:
+                entry.field_versions[field] = entry.version
+
+            entry.data = result
+            entry.history.append({
+                "version": entry.version,
+                "time": time.time(),
+                **graph_point(result)
+            })
+
+            return entry.version
+
+    # ======================================================
+    # READ PATH (DELTA MODE)
+    # ======================================================
+    def delta(self, key, since):
+        """
+        Fields changed after `since` plus the chart points the
+        caller has not seen yet. `truncated` tells the client that
+        the history ring no longer reaches back to `since`.
+        None once the engine has been stopped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            changed = {
+                field: entry.data[field]
+                for field, v in entry.field_versions.items()
+                if v > since and field in entry.data
+            }
+            removed = [
+                field for field, v in entry.field_versions.items()
+                if v > since and field not in entry.data
+            ]
+            points = entry.history.since(since)
+
+            versions = entry.history.column("version")
+            oldest = int(versions[0]) if len(versions) else 0
+
+            return {
+                "version": entry.version,
+                "since": since,
+                "changed": changed,
+                "removed": removed,
+                "points": points,
+                "truncated": since < oldest - 1
+            }
+
+    def points(self, key, since=0):
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else entry.history.since(since)
+
+    def history(self, key, start=None, end=None, max_points=None,
+                method="lttb", by="price"):
+        """
+        Time-range query over the engine's ring buffer, downsampled
+        for charts (LTTB or min/max buckets). None once the engine
+        has been stopped.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            return entry.history.query(
+                start=start, end=end, max_points=max_points,
+                method=method, by=by
+            )
+
+
+# ======================================================
+# RESPONSE ENCODING
+# ======================================================
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+def wants_msgpack(request):
+    if msgpack is None:
+        return False
+
+    if request.args.get("format") == "msgpack":
+        return True
+
+    best = request.accept_mimetypes.best_match(
+        ["application/json", MSGPACK_MIMETYPE, "application/x-msgpack"]
+    )
+    return best in (MSGPACK_MIMETYPE, "application/x-msgpack")
+
+
+def pack(payload):
+    return msgpack.packb(payload, use_bin_type=True)
@@ -0,0 +1,338 @@
+import argparse
+import datetime
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import joblib
+from joblib import Parallel, delayed
+
+from sklearn.base import clone
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.metrics import accuracy_score
+
+from Model_gen import (
+    CANDIDATES,
+    DATA_FOLDER,
+    DEFAULT_MODEL,
+    FEATURES,
+    build_model,
+    process_stock,
+    save_artifacts
+)
+from utils import MODEL_MANIFEST, read_manifest, load_artifacts
+
+# ======================================================
+# CONFIG
+# ======================================================
+CACHE_FILE = "cache/features.pkl"
+MODELS_FOLDER = "models"
+
+N_FOLDS = 5
+MIN_TRAIN_FRACTION = 0.5      # first fold trains on ≥ half the dates
+HOLDOUT_FRACTION = 0.1        # latest dates kept for the swap check
+MAX_ACCURACY_DROP = 0.01      # candidate may not be worse than this
+
+
+# ======================================================
+# FEATURE CACHE (REUSED ACROSS RUNS)
+# ======================================================
+def load_features(data_folder=DATA_FOLDER, cache_file=CACHE_FILE):
+    """
+    Processed frames per CSV, keyed by (mtime, size). Only files
+    that changed since the last run are re-featurized.
+    """
+    cache = {}
+    if os.path.exists(cache_file):
+        try:
+            cache = joblib.load(cache_file)
+        except Exception as e:
+            print("⚠️ FEATURE CACHE UNREADABLE, rebuilding:", e)
+
+    frames = []
+    fresh = {}
+    rebuilt = 0
+
+    for file in sorted(os.listdir(data_folder)):
+        if not file.endswith(".csv") or file == "stock_metadata.csv":
+            continue
+
+        path = os.path.join(data_folder, file)
+        stat = os.stat(path)
+        key = (stat.st_mtime, stat.st_size)
+
+        hit = cache.get(file)
+        if hit is not None and hit[0] == key:
+            df = hit[1]
+        else:
+            try:
+                df = process_stock(path)
+            except Exception as e:
+                print(f"Skipping {file}: {e}")
+                continue
+            rebuilt += 1
+
+        fresh[file] = (key, df)
+        if not df.empty:
+            frames.append(df)
+
+    if rebuilt:
+        os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+        tmp = cache_file + ".tmp"
+        joblib.dump(fresh, tmp)
+        os.replace(tmp, cache_file)
+
+    if not frames:
+        raise RuntimeError("❌ No valid stock files processed")
+
+    print(f"✅ Features: {len(frames)} files ({rebuilt} rebuilt)")
+    return pd.concat(frames, ignore_index=True)
+
+
+# ======================================================
+# WALK-FORWARD SPLITS (BY CALENDAR DATE, EXPANDING)
+# ======================================================
+def walk_forward_splits(dates, n_folds=N_FOLDS,
+                        min_train_fraction=MIN_TRAIN_FRACTION):
+    """
+    Yields (train_idx, test_idx): every fold trains on all rows
+    before a cutoff date and tests on the next block of dates, so
+    no symbol's future leaks into another symbol's training rows.
+    """
+    dates = np.asarray(dates)
+    unique = np.unique(dates)
+    first = int(len(unique) * min_train_fraction)
+    cutoffs = np.linspace(first, len(unique), n_folds + 1).astype(int)
+
+    for lo, hi in zip(cutoffs[:-1], cutoffs[1:]):
+        start = unique[lo]
+        end = unique[hi] if hi < len(unique) else None
+
+        train_idx = np.flatnonzero(dates < start)
+        test_mask = dates >= start
+        if end is not None:
+            test_mask &= dates < end
+        yield train_idx, np.flatnonzero(test_mask)
+
+
+def _fit(estimator, X, y):
+    scaler = StandardScaler().fit(X)
+    model = clone(estimator).fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def _evaluate_fold(estimator, X, y, train_idx, test_idx):
+    model, scaler = _fit(estimator, X[train_idx], y[train_idx])
+    pred = model.predict(scaler.transform(X[test_idx]))
+    return accuracy_score(y[test_idx], pred)
+
+
+def evaluate_walk_forward(estimator, X, y, dates, n_folds=N_FOLDS,
+                          n_jobs=-1):
+    """
+    Folds are independent fits, so they run in parallel.
+    """
+    splits = list(walk_forward_splits(dates, n_folds))
+    return Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_fold)(estimator, X, y, tr, te)
+        for tr, te in splits
+        if len(tr) and len(te)
+    )
+
+
+# ======================================================
+# VALIDATION AGAINST THE LIVE MODEL
+# ======================================================
+def _live_model():
+    """
+    (model, scaler, encoder) currently served and the last date it
+    was trained on. The root-level artifacts carry no date: every
+    date is assumed seen.
+    """
+    try:
+        manifest = read_manifest()
+        folder = manifest["folder"] if manifest else "."
+        artifacts = load_artifacts(folder)
+    except Exception as e:
+        print("⚠️ No previous model to compare against:", e)
+        return None, None
+
+    last_date = (manifest or {}).get("metrics", {}).get("last_date")
+    return artifacts, last_date
+
+
+def _accuracy(artifacts, X, labels):
+    model, scaler, encoder = artifacts
+    X_df = pd.DataFrame(X, columns=FEATURES)
+    pred = encoder.inverse_transform(model.predict(scaler.transform(X_df)))
+    return accuracy_score(labels, pred)
+
+
+def holdout_start(dates, live_last_date=None, has_live=False,
+                  fraction=HOLDOUT_FRACTION):
+    """
+    First date of the comparison window: the latest `fraction` of
+    dates, cut further so the live model never trained on it either.
+    None when every date was already seen by the live model.
+    """
+    unique = np.unique(dates)
+    start = unique[int(len(unique) * (1 - fraction))]
+    if not has_live:
+        return start
+    if live_last_date is None:
+        return None
+
+    unseen = unique[unique > np.datetime64(live_last_date)]
+    return max(start, unseen[0]) if len(unseen) else None
+
+
+# ======================================================
+# PUBLISH (ATOMIC MANIFEST FLIP)
+# ======================================================
+def publish(model, scaler, encoder, metrics, models_folder=MODELS_FOLDER):
+    version = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    folder = os.path.join(models_folder, version)
+    save_artifacts(model, scaler, encoder, folder)
+
+    manifest = {
+        "version": version,
+        "folder": folder,
+        "created": datetime.datetime.now().isoformat(),
+        "metrics": metrics
+    }
+
+    tmp = MODEL_MANIFEST + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MODEL_MANIFEST)
+
+    return manifest
+
+
+# ======================================================
+# PIPELINE
+# ======================================================
+def retrain(n_jobs=-1, n_folds=N_FOLDS, warm_start=False, add_trees=50,
+            force=False, model_name=DEFAULT_MODEL):
+    df = load_features().sort_values("Date", kind="stable")
+    dates = df["Date"].to_numpy()
+
+    X = df[FEATURES].to_numpy()
+    labels = df["market_state"].to_numpy()
+
+    encoder = LabelEncoder().fit(labels)
+    y = encoder.transform(labels)
+
+    estimator = build_model(model_name)
+    if "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=1)   # parallelism lives at fold level
+
+    # 1. walk-forward cross-validation
+    t0 = time.perf_counter()
+    fold_scores = evaluate_walk_forward(
+        estimator, X, y, dates, n_folds=n_folds, n_jobs=n_jobs
+    )
+    print(
+        f"Walk-forward accuracy: {np.mean(fold_scores):.4f} "
+        f"({len(fold_scores)} folds, {time.perf_counter() - t0:.1f}s)"
+    )
+
+    # 2. candidate vs live model on dates neither was trained on
+    previous, live_last_date = _live_model()
+    start = holdout_start(dates, live_last_date, previous is not None)
+
+    cand_acc = prev_acc = None
+    if start is None:
+        print("⚠️ Live model has seen every date; comparison skipped")
+    else:
+        train_mask = dates < start
+        candidate, cand_scaler = _fit(
+            estimator, X[train_mask], y[train_mask]
+        )
+        cand_pred = candidate.predict(cand_scaler.transform(X[~train_mask]))
+        cand_acc = accuracy_score(y[~train_mask], cand_pred)
+        if previous is not None:
+            prev_acc = _accuracy(
+                previous, X[~train_mask], labels[~train_mask]
+            )
+        print(
+            f"Holdout from {pd.Timestamp(start).date()}: "
+            f"candidate={cand_acc:.4f} previous={prev_acc}"
+        )
+
+    if (
+        prev_acc is not None and not force
+        and cand_acc < prev_acc - MAX_ACCURACY_DROP
+    ):
+        print("❌ Candidate rejected, live model kept")
+        return None
+
+    # 3. final fit on the whole expanding window
+    if warm_start and previous is not None and \
+            hasattr(previous[0], "estimators_") and \
+            list(previous[2].classes_) == list(encoder.classes_):
+        # keep the live trees, grow new ones on the latest window in
+        # the live feature space (scaler must stay the same)
+        model, scaler, encoder = previous
+        model.set_params(
+            warm_start=True,
+            n_estimators=model.n_estimators + add_trees
+        )
+        model.fit(scaler.transform(pd.DataFrame(X, columns=FEATURES)), y)
+    else:
+        scaler = StandardScaler().fit(pd.DataFrame(X, columns=FEATURES))
+        model = clone(estimator)
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=n_jobs)
+        model.fit(scaler.transform(pd.DataFrame(X, columns=FEATURES)), y)
+
+    manifest = publish(model, scaler, encoder, {
+        "walk_forward_accuracy": float(np.mean(fold_scores)),
+        "fold_accuracy": [float(s) for s in fold_scores],
+        "holdout_start": (
+            None if start is None else str(pd.Timestamp(start).date())
+        ),
+        "holdout_accuracy": None if cand_acc is None else float(cand_acc),
+        "previous_holdout_accuracy": prev_acc,
+        "samples": int(len(X)),
+        "last_date": str(pd.Timestamp(dates[-1]).date())
+    })
+    print(f"✅ Published model {manifest['version']} → {manifest['folder']}")
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Walk-forward retraining with live model hot-swap"
+    )
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        choices=list(CANDIDATES))
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--warm-start", action="store_true",
+                        help="add trees to the live forest instead of refitting")
+    parser.add_argument("--add-trees", type=int, default=50)
+    parser.add_argument("--force", action="store_true",
+                        help="publish even if the candidate is worse")
+    parser.add_argument("--every", type=float, default=None,
+                        help="re-run every N hours (scheduler mode)")
+    args = parser.parse_args()
+
+    while True:
+        try:
+            retrain(
+                n_jobs=args.n_jobs,
+                n_folds=args.folds,
+                warm_start=args.warm_start,
+                add_trees=args.add_trees,
+                force=args.force,
+                model_name=args.model
+            )
+        except Exception as e:
+            print("⚠️ RETRAIN ERROR:", e)
+
+        if not args.every:
+            break
+        time.sleep(args.every * 3600)
@@ -1,16 +1,27 @@
 import numpy as np
+from collections import deque
 
 TARGET_VOL = 0.15
 MAX_DRAWDOWN = -0.20
 
-def apply_risk_controls(df, base_equity_weight):
-    port_vol = df["return"].std() * np.sqrt(252)
+def apply_risk_controls(df, base_equity_weight, calc=None,
+                        annualization=252):
+    """
+    calc: optional OnlineRiskCalculator already fed with df's bars;
+    its running metrics replace the whole-frame recomputation.
+    annualization: bars per year of df (batch path only)
+    """
+    if calc is not None:
+        port_vol = calc.volatility
+        max_dd = calc.max_drawdown
+    else:
+        port_vol = df["return"].std() * np.sqrt(annualization)
 
-    vol_scale = min(1.0, TARGET_VOL / port_vol) if port_vol > 0 else 1.0
+        rolling_max = df["Close"].cummax()
+        drawdown = (df["Close"] - rolling_max) / rolling_max
+        max_dd = drawdown.min()
 
-    rolling_max = df["Close"].cummax()
-    drawdown = (df["Close"] - rolling_max) / rolling_max
-    max_dd = drawdown.min()
+    vol_scale = min(1.0, TARGET_VOL / port_vol) if port_vol > 0 else 1.0
 
     dd_scale = 0.0 if max_dd < MAX_DRAWDOWN else 1.0
 
@@ -22,3 +33,170 @@ def apply_risk_controls(df, base_equity_weight):
         "max_drawdown": round(max_dd, 2),
         "volatility_scale": round(vol_scale, 2)
     }
+
+
+# ======================================================
+# STREAMING RISK (PER BAR, NO WHOLE-HISTORY RECOMPUTE)
+# ======================================================
+EWMA_LAMBDA = 0.94
+ANNUALIZATION = 252
+
+
+class OnlineRiskCalculator:
+    """
+    PURPOSE:
+    Incremental replacement for the batch std / cummax / drawdown
+    in apply_risk_controls. Feed one bar at a time with update();
+    every metric can be read at any time in O(1).
+
+    - Welford mean / variance of returns (ddof=1, same as pandas)
+    - running peak, current drawdown and max drawdown of Close
+    - RiskMetrics-style EWMA volatility
+    - window=N keeps a rolling variance and rolling peak instead
+      of expanding ones (max drawdown stays expanding)
+    """
+
+    def __init__(self, window=None, ewma_lambda=EWMA_LAMBDA,
+                 annualization=ANNUALIZATION):
+        self.window = window
+        self.ewma_lambda = ewma_lambda
+        self.annualization = annualization
+
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.ewma_var = None
+
+        self.last_close = None
+        self.peak = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.last_date = None
+
+        if window:
+            self._returns = deque()
+            self._peaks = deque()   # (bar index, close), decreasing closes
+        self._bars = 0
+
+    # ======================================================
+    # UPDATE
+    # ======================================================
+    def update(self, close, ret=None, date=None):
+        close = float(close)
+
+        if ret is None and self.last_close:
+            ret = close / self.last_close - 1
+
+        if ret is not None and not np.isnan(ret):
+            self._add_return(float(ret))
+
+        self._update_peak(close)
+        self.last_close = close
+        if date is not None:
+            self.last_date = date
+
+    def update_many(self, closes, returns=None, dates=None):
+        closes = np.asarray(closes, dtype=float)
+        returns = (
+            [None] * len(closes) if returns is None
+            else np.asarray(returns, dtype=float)
+        )
+        dates = [None] * len(closes) if dates is None else list(dates)
+
+        for c, r, d in zip(closes, returns, dates):
+            self.update(c, r, d)
+
+    def update_frame(self, df):
+        """
+        Feed only the rows of a feature frame newer than the last bar
+        seen, so calling it every cycle on a refetched frame is cheap.
+        The first frame's running peak starts where its "drawdown"
+        column says it was, so max_drawdown equals
+        df["drawdown"].min() of that frame.
+        """
+        if df is None or df.empty:
+            return
+
+        if self.last_date is not None:
+            df = df[df["Date"] > self.last_date]
+            if df.empty:
+                return
+        elif self.peak is None and not self.window and "drawdown" in df:
+            # feature frames drop their warm-up rows, but the drawdown
+            # column was measured from a peak that may lie in them
+            close = float(df["Close"].iloc[0])
+            dd = float(df["drawdown"].iloc[0])
+            if dd > -1:
+                self.peak = close / (1 + dd)
+
+        self.update_many(
+            df["Close"].to_numpy(),
+            df["return"].to_numpy() if "return" in df else None,
+            df["Date"].to_numpy()
+        )
+
+    def _add_return(self, x):
+        # Welford add
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+        # Welford remove (rolling variant)
+        if self.window:
+            self._returns.append(x)
+            if len(self._returns) > self.window:
+                old = self._returns.popleft()
+                delta = old - self.mean
+                self.count -= 1
+                self.mean -= delta / self.count
+                self._m2 -= delta * (old - self.mean)
+                self._m2 = max(self._m2, 0.0)
+
+        lam = self.ewma_lambda
+        if self.ewma_var is None:
+            self.ewma_var = x * x
+        else:
+            self.ewma_var = lam * self.ewma_var + (1 - lam) * x * x
+
+    def _update_peak(self, close):
+        if self.window:
+            # monotonic deque → O(1) amortised rolling max
+            while self._peaks and self._peaks[-1][1] <= close:
+                self._peaks.pop()
+            self._peaks.append((self._bars, close))
+            while self._peaks[0][0] <= self._bars - self.window:
+                self._peaks.popleft()
+            self.peak = self._peaks[0][1]
+        else:
+            self.peak = close if self.peak is None else max(self.peak, close)
+
+        self._bars += 1
+        self.drawdown = (close - self.peak) / self.peak if self.peak else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+
+    # ======================================================
+    # QUERY
+    # ======================================================
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def volatility(self):
+        return np.sqrt(self.variance) * np.sqrt(self.annualization)
+
+    @property
+    def ewma_volatility(self):
+        if self.ewma_var is None:
+            return np.nan
+        return np.sqrt(self.ewma_var) * np.sqrt(self.annualization)
+
+    def metrics(self):
+        return {
+            "volatility": self.volatility,
+            "ewma_volatility": self.ewma_volatility,
+            "drawdown": self.drawdown,
+            "max_drawdown": self.max_drawdown,
+            "bars": self._bars
+        }
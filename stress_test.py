@@ -1,5 +1,10 @@
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
+
+from portfolio_risk import MARKET_SHOCK, correlated_shock
+
+PLOT_DIR = "logs/stress_plots"
 
 
 class PortfolioStressor:
@@ -9,17 +14,41 @@ class PortfolioStressor:
     to verify capital protection by the Risk Engine.
     """
 
-    def __init__(self, processed_df):
+    def __init__(self, processed_df, market_shock=MARKET_SHOCK,
+                 cov_model=None, symbol=None):
         """
         processed_df must contain:
         - 'return'
         - 'volatility'
         - 'market_state'
+
+        market_shock: daily market move in "systemic_collapse"
+        cov_model / symbol: portfolio_risk.RollingCovariance and this
+        asset's name in it; the move is then scaled by the asset's
+        beta to the whole universe (correlated_shock). Without them
+        the asset takes the market move one for one.
         """
         self.original_df = processed_df.copy()
+        self.systemic_shock = market_shock
+        if cov_model is not None and symbol in cov_model.index:
+            self.systemic_shock = float(
+                correlated_shock(cov_model, market_shock)[symbol]
+            )
         self.results = {}
         self.equity_curves = {}
 
+    @classmethod
+    def from_source(cls, data_source, symbol, **kwargs):
+        """
+        Build from any engine data source (e.g. data_plane's
+        SharedMemorySource) instead of a separately loaded frame.
+        Pass cov_model= for a beta-scaled systemic scenario.
+        """
+        from utils import compute_features, predict_regime
+
+        df = predict_regime(compute_features(data_source.fetch(symbol)))
+        return cls(df, symbol=symbol, **kwargs)
+
     # ======================================================
     # INTERNAL: SHOCK GENERATOR
     # ======================================================
@@ -39,9 +68,9 @@ class PortfolioStressor:
                 stressed_df.columns.get_loc("volatility")] *= 4
 
         elif scenario_type == "systemic_collapse":
-            # Correlated losses across assets
+            # Correlated losses across assets (beta-scaled)
             stressed_df.iloc[window,
-                stressed_df.columns.get_loc("return")] = -0.03
+                stressed_df.columns.get_loc("return")] = self.systemic_shock
 
         return stressed_df
 
@@ -100,44 +129,61 @@ class PortfolioStressor:
             print("-" * 30)
 
     # ======================================================
-    # VISUALIZATION (BAR + CURVES)
+    # VISUALIZATION (BAR + CURVES → PNG FILES)
     # ======================================================
-    def plot_results(self):
+    def plot_results(self, out_dir=PLOT_DIR):
+        """
+        Render the bar chart and one equity-curve chart per scenario
+        into out_dir and return the file paths. Headless: figures are
+        drawn on matplotlib's Agg canvas (no pyplot, no display), and
+        matplotlib is only imported when plots are asked for.
+        """
         if not self.results:
-            return
+            return []
+
+        os.makedirs(out_dir, exist_ok=True)
+        paths = []
 
         # -----------------------------
         # BAR CHART
         # -----------------------------
         df_plot = pd.DataFrame(self.results).T
-        df_plot.plot(
-            kind="bar",
-            figsize=(10, 6),
-            color=["#ff6666", "#44bb44"]
-        )
-
-        plt.title("Portfolio Resilience: Risk Engine vs Passive Market")
-        plt.ylabel("Terminal Wealth (Initial = 1.0)")
-        plt.xticks(rotation=30)
-        plt.grid(axis="y", linestyle="--", alpha=0.7)
-        plt.tight_layout()
-        plt.show()
+        fig, ax = _figure((10, 6))
+        width = 0.4
+        x = range(len(df_plot))
+        ax.bar([i - width / 2 for i in x], df_plot["Unmanaged"], width,
+               color="#ff6666", label="Unmanaged")
+        ax.bar([i + width / 2 for i in x], df_plot["Managed"], width,
+               color="#44bb44", label="Managed")
+        ax.set_xticks(list(x))
+        ax.set_xticklabels(df_plot.index, rotation=30)
+
+        ax.set_title("Portfolio Resilience: Risk Engine vs Passive Market")
+        ax.set_ylabel("Terminal Wealth (Initial = 1.0)")
+        ax.legend()
+        ax.grid(axis="y", linestyle="--", alpha=0.7)
+        paths.append(_save(fig, os.path.join(out_dir, "resilience.png")))
 
         # -----------------------------
         # EQUITY CURVES
         # -----------------------------
         for scenario, curves in self.equity_curves.items():
-            plt.figure(figsize=(10, 5))
-            plt.plot(curves["Unmanaged"], label="Passive Market", color="#ff6666")
-            plt.plot(curves["Managed"], label="Risk Engine", color="#44bb44")
-
-            plt.title(f"Equity Curve Under Stress: {scenario}")
-            plt.xlabel("Time")
-            plt.ylabel("Portfolio Value")
-            plt.legend()
-            plt.grid(linestyle="--", alpha=0.7)
-            plt.tight_layout()
-            plt.show()
+            fig, ax = _figure((10, 5))
+            ax.plot(curves["Unmanaged"].to_numpy(), label="Passive Market",
+                    color="#ff6666")
+            ax.plot(curves["Managed"].to_numpy(), label="Risk Engine",
+                    color="#44bb44")
+
+            ax.set_title(f"Equity Curve Under Stress: {scenario}")
+            ax.set_xlabel("Time")
+            ax.set_ylabel("Portfolio Value")
+            ax.legend()
+            ax.grid(linestyle="--", alpha=0.7)
+
+            name = scenario.lower().replace(" ", "_") + ".png"
+            paths.append(_save(fig, os.path.join(out_dir, name)))
+
+        return paths
 
     # ======================================================
     # DASHBOARD-FRIENDLY OUTPUT
@@ -153,3 +199,23 @@ class PortfolioStressor:
             }
             for scenario, v in self.results.items()
         }
+
+
+# ======================================================
+# HEADLESS FIGURES
+# ======================================================
+def _figure(figsize):
+    # Figure + Agg canvas directly: no pyplot state, no GUI backend,
+    # safe from worker threads
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+def _save(fig, path):
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
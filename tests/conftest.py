@@ -0,0 +1,8 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules are flat at the repo root and read data/, *.pkl relative to it
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
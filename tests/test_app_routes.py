@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app as web
+from portfolio_store import PortfolioStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # the first request runs startup(): keep it off logs/state
+    monkeypatch.setattr(web, "portfolio_store",
+                        PortfolioStore(str(tmp_path), sync=False))
+    web.app.config["TESTING"] = True
+    client = web.app.test_client()
+    with client.session_transaction() as session:
+        session["user"] = "tester"
+    yield client
+    web.live_engines.pop("TEST.NS", None)
+    web.live_results.pop("TEST.NS", None)
+
+
+def _publish():
+    web.live_engines["TEST.NS"] = object()
+    web.live_results.publish("TEST.NS", {
+        "best_stock": "TEST.NS",
+        "allocation": 0.5,
+        "portfolio": {"price": 100.0},
+        "risk": {"volatility": 0.2, "max_drawdown": -0.1},
+        "backtest": {}
+    })
+
+
+@pytest.mark.parametrize("path", [
+    "/live/status/TEST.NS",
+    "/live/status/TEST.NS?since=0",
+    "/graphs/data/TEST.NS?since=0",
+    "/graphs/history/TEST.NS",
+    "/risk/status/TEST.NS"
+])
+def test_routes_survive_concurrent_stop(client, path):
+    _publish()
+    assert client.get(path).status_code == 200
+
+    # /live/stop dropped the result but the engine is still listed
+    web.live_results.pop("TEST.NS")
+    resp = client.get(path)
+    assert resp.status_code == 200
+
+
+def test_result_store_missing_key_returns_none():
+    assert web.live_results.delta("nope", 0) is None
+    assert web.live_results.points("nope") is None
+    assert web.live_results.history("nope") is None
+
+
+def test_import_does_not_open_the_store():
+    out = subprocess.run(
+        [sys.executable, "-c", "import app; print(app.portfolio_store)"],
+        capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip().splitlines()[-1] == "None"
+
+
+def test_deployment_settings_come_from_the_environment(tmp_path):
+    env = {
+        **os.environ,
+        "PERCEPTRON_STATE_DIR": str(tmp_path / "state"),
+        "PERCEPTRON_TRADE_LOG": str(tmp_path / "trades.csv"),
+        "PERCEPTRON_CYCLE_SECONDS": "0.5",
+        "PERCEPTRON_ADMIN_USERS": "ops, monitor"
+    }
+    out = subprocess.run(
+        [sys.executable, "-c",
+         "import app, portfolio_store, trade_logger; "
+         "print(app.LIVE_CYCLE_SECONDS, sorted(app.ADMIN_USERS)); "
+         "print(portfolio_store.PortfolioStore.__init__.__defaults__[0]); "
+         "print(trade_logger.LOG_FILE)"],
+        capture_output=True, text=True, check=True, env=env
+    ).stdout.strip().splitlines()
+
+    assert out[-3:] == [
+        "0.5 ['monitor', 'ops']",
+        str(tmp_path / "state"),
+        str(tmp_path / "trades.csv")
+    ]
+
+
+def test_startup_resumes_engines_once(tmp_path, monkeypatch):
+    store = PortfolioStore(str(tmp_path), sync=False)
+    store.start("AAA.NS", interval="5m")
+    launched = []
+
+    monkeypatch.setattr(web, "_started", False)
+    monkeypatch.setattr(web, "portfolio_store", store)
+    monkeypatch.setattr(web, "launch_engine",
+                        lambda key, interval="1d": launched.append(
+                            (key, interval)))
+
+    client = web.app.test_client()
+    client.get("/")
+    client.get("/login")
+
+    assert launched == [("AAA.NS", "5m")]
+    assert web.portfolio_store is store
+
+
+def test_admin_routes_need_an_allowlisted_login(client, monkeypatch):
+    monkeypatch.setattr(web, "ADMIN_USERS", frozenset({"ops"}))
+
+    assert web.app.test_client().get("/admin/stats").status_code == 302
+    assert client.get("/admin/stats").status_code == 403
+    assert client.post("/admin/profile/TEST.NS").status_code == 403
+
+    with client.session_transaction() as session:
+        session["user"] = "ops"
+    assert client.get("/admin/stats").status_code == 200
+
+
+def test_profiling_ships_disabled(client, monkeypatch):
+    monkeypatch.setattr(web, "ADMIN_USERS", frozenset({"tester"}))
+    _publish()
+
+    resp = client.post("/admin/profile/TEST.NS")
+    assert resp.status_code == 403
+    assert resp.get_json()["error"] == "profiling disabled"
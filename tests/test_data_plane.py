@@ -0,0 +1,64 @@
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_plane import DataPlanePublisher, DataPlaneReader, _block_name
+
+
+@pytest.fixture
+def plane():
+    return f"test-plane-{os.getpid()}"
+
+
+def _frame(rows=10, start=100.0):
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2024-01-01", periods=rows),
+        "Close": start + np.arange(rows, dtype=float),
+        "Volume": np.ones(rows)
+    })
+
+
+def test_publish_replaces_orphaned_blocks(plane):
+    # a crashed publisher left its manifest and first block behind
+    orphans = [
+        shared_memory.SharedMemory(name=f"{plane}-manifest", create=True,
+                                   size=16),
+        shared_memory.SharedMemory(name=_block_name(plane, 1), create=True,
+                                   size=8)
+    ]
+    for shm in orphans:
+        shm.close()
+
+    publisher = DataPlanePublisher(plane)
+    try:
+        assert publisher.publish({"TCS": _frame()}) == 1
+
+        reader = DataPlaneReader(plane)
+        df = reader.snapshot().frame("TCS")
+        assert df["Close"].tolist() == _frame()["Close"].tolist()
+    finally:
+        publisher.close()
+
+
+def test_readers_see_whole_versions(plane):
+    publisher = DataPlanePublisher(plane)
+    try:
+        reader = DataPlaneReader(plane)
+        assert reader.snapshot() is None
+
+        publisher.publish({"A": _frame(), "B": _frame(start=5)})
+        first = reader.snapshot()
+        publisher.publish({"A": _frame(start=200)})
+
+        assert first.frame("B")["Close"].iloc[0] == 5
+        latest = reader.snapshot()
+        assert latest.version == 2
+        assert latest.symbols == ["A"]
+        assert latest.frame("A", tail=3)["Close"].tolist() == [
+            207.0, 208.0, 209.0
+        ]
+    finally:
+        publisher.close()
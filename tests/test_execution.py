@@ -0,0 +1,33 @@
+import numpy as np
+
+from execution import ExecutionModel
+from trade_executor import PaperTrader
+from trading_engine import AITradingEngine
+
+
+def test_engine_fills_at_the_close_by_default():
+    # ORDER_EXECUTION ships off: trades fill in full at the close
+    engine = AITradingEngine(["TCS.NS"], seed=0)
+    assert engine.trader.execution is None
+
+    trade = engine.trader.execute_trade(100.0, 1.0, volume=10)
+    assert trade["shares_traded"] == trade["shares_requested"]
+    assert trade["fill_price"] == 100.0
+
+
+def test_execution_model_caps_fills_at_participation():
+    trader = PaperTrader(seed=0, execution=ExecutionModel(participation=0.1))
+
+    trade = trader.execute_trade(100.0, 1.0, volume=1_000)
+    assert trade["shares_traded"] == 100
+    assert trade["shares_requested"] > 100
+    assert trade["fill_price"] > 100.0
+    assert trader.execution_cost > 0
+
+
+def test_limit_order_never_fills_through_its_price():
+    fills = ExecutionModel().match(
+        [500, -500], [100.0, 100.0], [1e6, 1e6], limit=[99.0, 100.5]
+    )
+    assert list(fills.filled) == [0, 0]
+    assert np.isnan(fills.price).all()
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+import explain
+from utils import FEATURES
+
+
+def _frame(close=100.0, date="2026-10-19"):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(0, 0.01, (3, len(FEATURES))),
+                      columns=FEATURES)
+    df["Date"] = pd.to_datetime(["2026-10-15", "2026-10-16", date])
+    df.loc[2, "ma_short"] = close
+    return df
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    explain._attribution_cache.clear()
+    seen = []
+    batch = explain.regime_contributions_batch
+
+    def counting(X):
+        seen.append(X)
+        return batch(X)
+
+    monkeypatch.setattr(explain, "regime_contributions_batch", counting)
+    return seen
+
+
+def test_same_bar_same_values_is_cached(calls):
+    first = explain.regime_contributions(_frame(), "TCS.NS")
+    again = explain.regime_contributions(_frame(), "TCS.NS")
+
+    assert first is again
+    assert len(calls) == 1
+
+
+def test_open_bar_with_new_values_is_recomputed(calls):
+    explain.regime_contributions(_frame(close=100.0), "TCS.NS")
+    explain.regime_contributions(_frame(close=140.0), "TCS.NS")
+
+    assert len(calls) == 2
+    assert calls[1]["ma_short"].iloc[0] == 140.0
+    assert len(explain._attribution_cache) == 2
+
+
+def test_cache_is_thread_safe(monkeypatch, calls):
+    monkeypatch.setattr(explain, "ATTRIBUTION_CACHE_SIZE", 8)
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(25):
+                explain.regime_contributions(
+                    _frame(close=offset * 100 + i), f"S{offset}"
+                )
+        except Exception as e:          # pragma: no cover
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert len(explain._attribution_cache) <= 8
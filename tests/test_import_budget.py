@@ -0,0 +1,23 @@
+import pytest
+
+from import_budget import BUDGETS_MS, DEFERRED, measure
+
+# cold imports on a loaded CI box are noisy: fail only well past
+# the budget, a heavy eager import is several times over anyway
+MARGIN = 2.0
+
+
+@pytest.mark.parametrize("module", list(BUDGETS_MS))
+def test_import_stays_within_budget(module):
+    total, _, packages = measure(module, runs=2)
+
+    assert not packages.intersection(DEFERRED), \
+        f"import {module} pulls in {sorted(packages.intersection(DEFERRED))}"
+    assert total <= BUDGETS_MS[module] * MARGIN, \
+        f"import {module}: {total:.0f} ms (budget {BUDGETS_MS[module]} ms)"
+
+
+def test_app_defers_heavy_packages():
+    _, _, packages = measure("app", runs=1)
+    for name in DEFERRED:
+        assert name not in packages
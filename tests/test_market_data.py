@@ -0,0 +1,281 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from market_data import CircuitBreaker, FakeProvider, ResilientSource
+
+
+def _frames(symbols=("A", "B", "C", "D")):
+    rows = 50
+    return {
+        s: pd.DataFrame({
+            "Date": pd.bdate_range("2024-01-01", periods=rows),
+            "Close": np.linspace(100, 110, rows) + i,
+            "Volume": np.ones(rows)
+        })
+        for i, s in enumerate(symbols)
+    }
+
+
+class FlakyProvider(FakeProvider):
+    """
+    Fails the first `failures` calls, then serves normally.
+    """
+
+    def __init__(self, failures, **kwargs):
+        super().__init__(frames=_frames(), **kwargs)
+        self.failures = failures
+
+    def fetch(self, symbol, interval="1d", bars=None, timeout=None):
+        with self._lock:
+            fail = self.calls < self.failures
+        if fail:
+            with self._lock:
+                self.calls += 1
+            raise ConnectionError("flaky")
+        return super().fetch(symbol, interval, bars, timeout)
+
+
+def _source(provider, **kwargs):
+    kwargs.setdefault("cycle_budget", None)
+    kwargs.setdefault("seed", 0)
+    return ResilientSource(provider, **kwargs)
+
+
+# ======================================================
+# DEADLINE
+# ======================================================
+def test_hung_call_is_abandoned_at_the_deadline():
+    provider = FakeProvider(frames=_frames(), hang_rate=1.0, hang=2.0)
+    source = _source(provider, deadline=0.2, retries=3)
+
+    t0 = time.monotonic()
+    df = source.fetch("A")
+    elapsed = time.monotonic() - t0
+
+    assert df.empty
+    assert elapsed < 1.0
+    assert source.stats["timeouts"] == 1
+    assert source.stats["missing"] == 1
+
+
+def test_cycle_budget_caps_every_symbol():
+    provider = FakeProvider(frames=_frames(), hang_rate=1.0, hang=2.0)
+    source = _source(provider, deadline=5.0, cycle_budget=0.3)
+
+    source.begin_cycle()
+    t0 = time.monotonic()
+    for sym in ("A", "B", "C"):
+        source.fetch(sym)
+    assert time.monotonic() - t0 < 1.0
+
+
+# ======================================================
+# RETRIES + BACKOFF
+# ======================================================
+def test_retries_with_backoff_then_succeeds():
+    provider = FlakyProvider(failures=2)
+    source = _source(provider, retries=2, backoff=0.1, deadline=5.0)
+
+    t0 = time.monotonic()
+    df = source.fetch("A")
+    elapsed = time.monotonic() - t0
+
+    assert not df.empty and not df.attrs.get("stale")
+    assert source.stats["retries"] == 2
+    assert source.stats["ok"] == 1
+    # 0.1 then 0.2 seconds, each jittered by 0.5 – 1.5
+    assert 0.15 <= elapsed < 1.0
+
+
+def test_backoff_is_capped():
+    provider = FlakyProvider(failures=2)
+    source = _source(provider, retries=2, backoff=1.0, max_backoff=0.05,
+                     deadline=5.0)
+
+    t0 = time.monotonic()
+    source.fetch("A")
+    assert time.monotonic() - t0 < 0.5
+
+
+def test_gives_up_after_retries():
+    provider = FlakyProvider(failures=10)
+    source = _source(provider, retries=2, backoff=0.0)
+
+    assert source.fetch("A").empty
+    assert provider.calls == 3
+    assert source.stats["errors"] == 3
+
+
+# ======================================================
+# CIRCUIT BREAKER
+# ======================================================
+def test_breaker_opens_then_half_opens():
+    now = [0.0]
+    breaker = CircuitBreaker(failures=2, reset_after=10,
+                             clock=lambda: now[0])
+
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 10
+    assert breaker.allow()              # the single half-open trial
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_failure()            # trial failed → open again
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_stops_calling_the_provider():
+    now = [0.0]
+    provider = FakeProvider(frames=_frames())
+    provider.down = True
+    breaker = CircuitBreaker(failures=3, reset_after=60,
+                             clock=lambda: now[0])
+    source = _source(provider, retries=0, breaker=breaker)
+
+    for _ in range(5):
+        source.fetch("A")
+    assert provider.calls == 3
+    assert source.stats["refused"] == 2
+
+    provider.down = False
+    now[0] = 60
+    assert not source.fetch("A").empty
+    assert breaker.state == "closed"
+
+
+def test_saturated_half_open_trial_is_released():
+    now = [0.0]
+    provider = FakeProvider(frames=_frames(), hang_rate=1.0, hang=0.5)
+    breaker = CircuitBreaker(failures=1, reset_after=10,
+                             clock=lambda: now[0])
+    source = _source(provider, deadline=0.1, retries=0, max_in_flight=1,
+                     breaker=breaker)
+
+    source.fetch("A")                   # hangs → timeout → open
+    assert breaker.state == "open"
+
+    now[0] = 10
+    source.fetch("B")                   # trial finds no free slot
+    assert source.stats["saturated"] == 1
+    assert breaker.state == "half_open"
+
+    time.sleep(0.5)                     # the hung call returns
+    provider.hang_rate = 0.0
+    assert not source.fetch("C").empty  # a new trial gets through
+    assert breaker.state == "closed"
+
+
+def test_sources_of_one_provider_share_a_breaker():
+    provider = FakeProvider(frames=_frames())
+    provider.down = True
+    first, second = _source(provider, retries=0), _source(provider, retries=0)
+    other = _source(FakeProvider(frames=_frames()), retries=0)
+
+    assert first.breaker is second.breaker
+    assert other.breaker is not first.breaker
+
+    for source in (first, second) * 3:
+        source.fetch("A")
+    assert first.breaker.state == "open"
+    assert provider.calls == first.breaker.failures
+    assert first.stats["refused"] + second.stats["refused"] == 1
+    assert other.breaker.state == "closed"
+
+
+# ======================================================
+# STALE CACHE
+# ======================================================
+def test_stale_frame_served_when_provider_fails():
+    provider = FakeProvider(frames=_frames())
+    source = _source(provider, retries=0)
+
+    fresh = source.fetch("A", bars=20)
+    provider.down = True
+    stale = source.fetch("A", bars=10)
+
+    assert stale.attrs["stale"] is True
+    assert stale.attrs["age_sec"] >= 0
+    assert stale["Close"].tolist() == fresh["Close"].tail(10).tolist()
+    assert not fresh.attrs.get("stale")
+    assert source.stats["stale"] == 1
+
+
+# ======================================================
+# IN-FLIGHT CAP
+# ======================================================
+def test_hung_calls_do_not_pile_up():
+    provider = FakeProvider(frames=_frames(), hang_rate=1.0, hang=1.0)
+    source = _source(provider, deadline=0.1, retries=0, max_in_flight=2)
+
+    before = threading.active_count()
+    for sym in ("A", "B", "C", "D", "A", "B"):
+        source.fetch(sym)
+
+    assert provider.calls == 2
+    assert source.stats["timeouts"] == 2
+    assert source.stats["saturated"] == 4
+    assert threading.active_count() - before <= 2
+
+    time.sleep(1.1)                     # hung calls return, slots free
+    provider.hang_rate = 0.0
+    assert not source.fetch("C").empty
+
+
+def test_cap_is_shared_by_sources_of_one_provider():
+    provider = FakeProvider(frames=_frames(), latency=0.2)
+    sources = [_source(provider, max_in_flight=2, deadline=5.0)
+               for _ in range(4)]
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    fetch = provider.fetch
+
+    def tracking(*args, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        try:
+            return fetch(*args, **kwargs)
+        finally:
+            with lock:
+                active[0] -= 1
+
+    provider.fetch = tracking
+    threads = [threading.Thread(target=s.fetch, args=("A",))
+               for s in sources]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert peak[0] == 2
+
+
+# ======================================================
+# ENGINE WIRING
+# ======================================================
+def test_engine_keeps_an_empty_replay_source():
+    # ReplayDataSource defines __len__: an empty calendar is falsy
+    from replay import ReplayDataSource
+    from trading_engine import AITradingEngine
+
+    source = ReplayDataSource(["TCS.NS"], start="2100-01-01")
+    assert len(source) == 0
+
+    engine = AITradingEngine(["TCS.NS"], data_source=source,
+                             universe=False)
+    assert engine.data_source is source
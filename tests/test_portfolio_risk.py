@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from portfolio_risk import RollingCovariance, correlated_shock
+from stress_test import PortfolioStressor
+
+
+def _returns(rows=40, n=4, seed=0):
+    rng = np.random.default_rng(seed)
+    mix = rng.normal(size=(n, n))
+    return rng.normal(0, 0.01, (rows, n)) @ mix
+
+
+@pytest.mark.parametrize("batches", [
+    [5, 7],             # second batch straddles the fill boundary
+    [3, 3, 9],
+    [12],               # longer than the window at once
+    [9, 1, 1, 4],
+    [10, 10, 3],
+    [1] * 25
+])
+def test_rolling_covariance_matches_np_cov(batches):
+    window = 10
+    X = _returns(sum(batches))
+    cov = RollingCovariance(range(X.shape[1]), window=window, shrinkage=0)
+
+    end = 0
+    for size in batches:
+        cov.update_many(X[end:end + size])
+        end += size
+        if end >= 2:
+            expected = np.cov(X[max(0, end - window):end].T)
+            np.testing.assert_allclose(cov.covariance(), expected,
+                                       atol=1e-12)
+
+
+def test_rolling_covariance_fill_boundary_example():
+    X = _returns(12)
+    cov = RollingCovariance(range(X.shape[1]), window=10, shrinkage=0)
+    cov.update_many(X[:5])
+    cov.update_many(X[5:12])
+    np.testing.assert_allclose(cov.covariance(), np.cov(X[2:12].T),
+                               atol=1e-12)
+
+
+def test_rolling_covariance_pairwise_nan():
+    X = _returns(30)
+    X[:8, 1] = np.nan                          # symbol 1 listed late
+    cov = RollingCovariance(range(X.shape[1]), window=20, shrinkage=0)
+    cov.update_many(X[:15])
+    cov.update_many(X[15:])
+
+    expected = pd.DataFrame(X[-20:]).cov().to_numpy()
+    np.testing.assert_allclose(cov.covariance(), expected, atol=1e-12)
+
+
+def test_correlated_shock_scales_by_beta():
+    X = _returns(60)
+    X[:, 3] = 2 * X[:, 0]                      # twice as volatile as 0
+    cov = RollingCovariance(list("abcd"), window=60, shrinkage=0)
+    cov.update_many(X)
+
+    shock = correlated_shock(cov, -0.03)
+    w = np.full(4, 0.25)
+    market = cov.covariance() @ w
+    np.testing.assert_allclose(
+        shock.to_numpy(), market / (w @ market) * -0.03
+    )
+    assert shock["d"] == pytest.approx(2 * shock["a"])
+
+
+def test_stressor_systemic_scenario_uses_correlated_shock():
+    X = _returns(60)
+    cov = RollingCovariance(list("abcd"), window=60, shrinkage=0)
+    cov.update_many(X)
+
+    df = pd.DataFrame({
+        "return": X[:, 2], "volatility": 0.2, "market_state": 0
+    })
+    stressor = PortfolioStressor(df, market_shock=-0.05,
+                                 cov_model=cov, symbol="c")
+    stressed = stressor._generate_shock("systemic_collapse")["return"]
+
+    expected = correlated_shock(cov, -0.05)["c"]
+    assert stressed.iloc[30:60].eq(expected).all()
+    assert stressed.iloc[:30].equals(df["return"].iloc[:30])
@@ -0,0 +1,178 @@
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from portfolio_store import PortfolioStore, _segment_name
+from trade_executor import PaperTrader
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEY = "crash"
+
+# runs in a child process: trade through the real store until killed,
+# printing every trade once record() has returned (fsync'd)
+WRITER = """
+import sys
+from portfolio_store import PortfolioStore
+from tests.test_portfolio_store import KEY, trades
+
+folder, seed, every = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+store = PortfolioStore(folder, snapshot_every=every)
+store.start(KEY)
+for n, trader in enumerate(trades(seed, store.journal(KEY)), 1):
+    print(n, store.seq, trader.cash, trader.position, flush=True)
+"""
+
+
+def trades(seed, journal=None, limit=None):
+    """
+    Deterministic journaled trades: yields the trader after each.
+    """
+    rng = random.Random(seed)
+    trader = PaperTrader(seed=seed, journal=journal)
+    n = 0
+    while limit is None or n < limit:
+        price = round(rng.uniform(90, 110), 2)
+        weight = rng.choice([0.1, 0.5, 0.9])
+        if trader.execute_trade(price, weight)["shares_traded"]:
+            n += 1
+            yield trader
+
+
+def _state_after(seed, n):
+    if n == 0:
+        return 100000.0, 0
+    for trader in trades(seed, limit=n):
+        pass
+    return trader.cash, trader.position
+
+
+# ======================================================
+# CRASH CONSISTENCY (SIGKILL MID-RUN)
+# ======================================================
+@pytest.mark.parametrize("round_", range(6))
+def test_sigkill_recovers_acknowledged_trades(tmp_path, round_):
+    folder = str(tmp_path / "state")
+    seed = 100 + round_
+    proc = subprocess.Popen(
+        [sys.executable, "-c", WRITER, folder, str(seed), "20"],
+        stdout=subprocess.PIPE, text=True, cwd=ROOT
+    )
+
+    # let it trade past a few snapshots, then kill at a random moment
+    first = proc.stdout.readline()
+    assert first, "writer produced no trades"
+    time.sleep(random.Random(round_).uniform(0.05, 0.4))
+    os.kill(proc.pid, signal.SIGKILL)
+    out, _ = proc.communicate()
+
+    acked = [first] + out.splitlines()
+    acked = [line.split() for line in acked if line.strip()]
+    # the last line may be cut by the kill
+    if len(acked[-1]) != 4:
+        acked.pop()
+    n_acked = int(acked[-1][0])
+
+    store = PortfolioStore(folder)
+    try:
+        state = store.engines[KEY]
+        n = store.seq - 1                       # first record is START
+
+        # every acknowledged trade survived; at most one more record
+        # (written, killed before the ack) may follow
+        assert n in (n_acked, n_acked + 1)
+        cash, position = _state_after(seed, n)
+        assert state["position"] == position
+        assert state["cash"] == pytest.approx(cash, abs=1e-6)
+        if n == n_acked:
+            assert state["cash"] == pytest.approx(float(acked[-1][2]))
+    finally:
+        store.close()
+
+
+# ======================================================
+# TORN / CORRUPT TAILS
+# ======================================================
+def _filled_store(folder, n=5, snapshot_every=1000):
+    store = PortfolioStore(folder, snapshot_every=snapshot_every)
+    store.start(KEY)
+    for trader in trades(1, store.journal(KEY), limit=n):
+        pass
+    store.close()
+    return trader
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    folder = str(tmp_path)
+    trader = _filled_store(folder)
+    path = os.path.join(folder, _segment_name(0))
+    size = os.path.getsize(path)
+
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "ab") as f:
+        f.write(data[-30:-5])                   # half of a record
+
+    store = PortfolioStore(folder)
+    assert store.seq == 6
+    assert store.engines[KEY]["cash"] == pytest.approx(trader.cash)
+    assert os.path.getsize(path) == size
+    store.close()
+
+
+def test_corrupt_record_stops_replay(tmp_path):
+    folder = str(tmp_path)
+    _filled_store(folder)
+    path = os.path.join(folder, _segment_name(0))
+
+    with open(path, "r+b") as f:
+        f.seek(-3, os.SEEK_END)
+        f.write(b"\xff\xff\xff")
+
+    store = PortfolioStore(folder)
+    assert store.seq == 5                       # last trade dropped
+    cash, position = _state_after(1, 4)
+    assert store.engines[KEY]["cash"] == pytest.approx(cash)
+    assert store.engines[KEY]["position"] == position
+    store.close()
+
+
+def test_snapshot_plus_tail_replay(tmp_path):
+    folder = str(tmp_path)
+    trader = _filled_store(folder, n=23, snapshot_every=10)
+
+    assert len([f for f in os.listdir(folder) if f.endswith(".log")]) == 1
+    store = PortfolioStore(folder)
+    assert store.seq == 24
+    assert store.recovered == 4
+    assert store.engines[KEY]["position"] == trader.position
+    store.close()
+
+
+# ======================================================
+# CONCURRENT START
+# ======================================================
+def test_concurrent_start_registers_once(tmp_path):
+    store = PortfolioStore(str(tmp_path), sync=False)
+    barrier = threading.Barrier(16)
+    results = []
+
+    def start():
+        barrier.wait()
+        results.append(store.start("TCS.NS", cash=5000.0))
+
+    threads = [threading.Thread(target=start) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert store.seq == 1
+    assert results.count(None) == 1
+    assert all(r["cash"] == 5000.0 for r in results if r is not None)
+    store.close()
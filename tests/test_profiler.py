@@ -0,0 +1,39 @@
+import tracemalloc
+
+from profiler import CycleProfiler
+
+
+def _cycle():
+    return [bytes(1024) for _ in range(100)]
+
+
+def test_overlapping_memory_profiles():
+    # first starts tracing, second attaches, first finishes first
+    first = CycleProfiler(cycles=2, memory=True)
+    second = CycleProfiler(cycles=2, memory=True)
+
+    first.run(_cycle)
+    second.run(_cycle)
+    first.run(_cycle)
+    assert first.finished.is_set()
+    assert tracemalloc.is_tracing()     # second still needs it
+
+    assert len(second.run(_cycle)) == 100
+    assert second.finished.is_set()
+    assert first.report()["memory_top"]
+    assert second.report()["memory_top"]
+    assert not tracemalloc.is_tracing()
+
+
+def test_finished_even_when_tracing_was_stopped_elsewhere():
+    profiler = CycleProfiler(cycles=1, memory=True)
+    profiler.run(tracemalloc.stop)
+
+    assert profiler.finished.is_set()
+    assert profiler.report()["memory_top"] is None
+
+    # the next memory profile starts tracing again
+    again = CycleProfiler(cycles=1, memory=True)
+    again.run(_cycle)
+    assert again.report()["memory_top"]
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from utils import bars_per_year, resample_bars
+
+
+def _session_minutes(day="2026-10-19", tz="Asia/Kolkata"):
+    # one NSE session of 1m bars, 09:15 – 15:29
+    dates = pd.date_range(f"{day} 09:15", f"{day} 15:29", freq="1min",
+                          tz=tz)
+    n = len(dates)
+    return pd.DataFrame({
+        "Date": dates,
+        "Open": np.arange(n, dtype=float),
+        "High": np.arange(n, dtype=float) + 0.5,
+        "Low": np.arange(n, dtype=float) - 0.5,
+        "Close": np.arange(n, dtype=float) + 0.25,
+        "Volume": np.ones(n)
+    })
+
+
+def test_75m_bars_start_at_session_open():
+    out = resample_bars(_session_minutes(), "75m")
+    times = out["Date"].dt.strftime("%H:%M").tolist()
+
+    assert times == ["09:15", "10:30", "11:45", "13:00", "14:15"]
+    assert out["Volume"].tolist() == [75.0] * 5
+    assert out["Date"].dt.tz is not None
+    assert len(out) == bars_per_year("75m") / 252
+
+
+def test_hourly_bars_match_exchange_candles():
+    out = resample_bars(_session_minutes(), "1h")
+    times = out["Date"].dt.strftime("%H:%M").tolist()
+
+    assert times[0] == "09:15" and times[-1] == "15:15"
+    assert out["Volume"].iloc[-1] == 15            # 15:15 – 15:29
+
+
+def test_ohlc_aggregation():
+    df = _session_minutes()
+    out = resample_bars(df, "5m")
+    first = df.iloc[:5]
+
+    assert out["Open"].iloc[0] == first["Open"].iloc[0]
+    assert out["High"].iloc[0] == first["High"].max()
+    assert out["Low"].iloc[0] == first["Low"].min()
+    assert out["Close"].iloc[0] == first["Close"].iloc[-1]
+
+
+def test_daily_buckets_are_calendar_days():
+    df = pd.concat([
+        _session_minutes("2026-10-19"), _session_minutes("2026-10-20")
+    ], ignore_index=True)
+    out = resample_bars(df, "1d")
+
+    assert out["Date"].dt.strftime("%Y-%m-%d %H:%M").tolist() == [
+        "2026-10-19 00:00", "2026-10-20 00:00"
+    ]
+    assert out["Close"].tolist() == [
+        df["Close"].iloc[374], df["Close"].iloc[-1]
+    ]
+
+
+def test_chained_resampling_matches_direct():
+    df = _session_minutes()
+    direct = resample_bars(df, "75m")
+    chained = resample_bars(resample_bars(df, "15m"), "75m")
+
+    pd.testing.assert_frame_equal(direct, chained)
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from retrain import holdout_start, walk_forward_splits
+
+
+def _dates(days=100):
+    d = pd.bdate_range("2020-01-01", periods=days).to_numpy()
+    return np.repeat(d, 3)                 # three symbols per date
+
+
+def test_holdout_is_latest_dates_without_live_model():
+    dates = _dates()
+    start = holdout_start(dates, has_live=False)
+    assert start == np.unique(dates)[90]
+
+
+def test_holdout_excludes_dates_the_live_model_saw():
+    dates = _dates()
+    unique = np.unique(dates)
+    live_last = str(pd.Timestamp(unique[95]).date())
+
+    start = holdout_start(dates, live_last, has_live=True)
+    assert start == unique[96]
+    assert (dates[dates >= start] > np.datetime64(live_last)).all()
+
+
+def test_holdout_keeps_latest_window_for_an_older_live_model():
+    dates = _dates()
+    unique = np.unique(dates)
+    live_last = str(pd.Timestamp(unique[40]).date())
+    assert holdout_start(dates, live_last, has_live=True) == unique[90]
+
+
+def test_no_holdout_when_live_model_saw_everything():
+    dates = _dates()
+    last = str(pd.Timestamp(dates[-1]).date())
+    assert holdout_start(dates, last, has_live=True) is None
+    # root-level artifacts: no training date recorded
+    assert holdout_start(dates, None, has_live=True) is None
+
+
+def test_walk_forward_never_trains_on_test_dates():
+    dates = _dates()
+    for train_idx, test_idx in walk_forward_splits(dates, n_folds=4):
+        assert dates[train_idx].max() < dates[test_idx].min()
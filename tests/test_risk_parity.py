@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest import BacktestAccumulator, backtest
+from risk_engine import OnlineRiskCalculator, apply_risk_controls
+from utils import compute_features
+
+
+def _prices(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2020-01-01", periods=rows),
+        "Close": close,
+        "Volume": rng.integers(1_000, 10_000, rows).astype(float)
+    })
+
+
+def _features(df):
+    return compute_features(df, features=["return", "volatility", "drawdown"])
+
+
+# ======================================================
+# VOLATILITY / DRAWDOWN vs apply_risk_controls (batch)
+# ======================================================
+def test_online_matches_batch_risk_controls():
+    df = _prices()
+    df["return"] = df["Close"].pct_change()
+
+    calc = OnlineRiskCalculator()
+    calc.update_many(df["Close"], df["return"])
+
+    ann = 252
+    batch_vol = df["return"].std() * np.sqrt(ann)
+    batch_dd = (df["Close"] / df["Close"].cummax() - 1).min()
+
+    assert calc.volatility == pytest.approx(batch_vol, rel=1e-12)
+    assert calc.max_drawdown == pytest.approx(batch_dd, rel=1e-12)
+    assert apply_risk_controls(df, 0.6, calc) == apply_risk_controls(df, 0.6)
+
+
+def test_online_update_frame_in_chunks_matches_one_pass():
+    df = _features(_prices())
+    calc = OnlineRiskCalculator()
+    for end in (50, 51, 200, len(df)):
+        calc.update_frame(df.iloc[:end])    # refetched, overlapping frames
+
+    one = OnlineRiskCalculator()
+    one.update_frame(df)
+
+    assert calc.volatility == pytest.approx(one.volatility, rel=1e-12)
+    assert calc.max_drawdown == one.max_drawdown
+    assert calc.count == len(df)
+
+
+def test_rolling_window_matches_pandas():
+    df = _prices()
+    df["return"] = df["Close"].pct_change()
+    calc = OnlineRiskCalculator(window=20)
+    calc.update_many(df["Close"], df["return"])
+
+    tail = df["return"].iloc[-20:]
+    assert calc.volatility == pytest.approx(
+        tail.std() * np.sqrt(252), rel=1e-9
+    )
+    assert calc.peak == df["Close"].iloc[-20:].max()
+
+
+def test_step6_max_drawdown_counts_warmup_peak():
+    # a peak inside the warm-up rows that compute_features drops:
+    # the original step 6 read df["drawdown"].min(), measured from it
+    raw = _prices()
+    raw.loc[5, "Close"] = raw["Close"].max() * 1.5
+    df = _features(raw)
+    assert df["Date"].iloc[0] > raw["Date"].iloc[5]
+
+    calc = OnlineRiskCalculator()
+    calc.update_frame(df)
+
+    assert calc.max_drawdown == pytest.approx(df["drawdown"].min(),
+                                              rel=1e-12)
+    assert calc.drawdown == pytest.approx(df["drawdown"].iloc[-1],
+                                          rel=1e-12)
+
+
+# ======================================================
+# SHARPE / SORTINO / DRAWDOWN vs the batch backtest
+# ======================================================
+def _batch_backtest(returns, weight, ann=252):
+    # the original whole-frame computation
+    strat = returns * weight
+    equity = (1 + strat).cumprod()
+    downside = strat[strat < 0]
+    return {
+        "equity": equity.iloc[-1],
+        "CAGR": equity.iloc[-1] ** (ann / len(strat)) - 1,
+        "Sharpe": strat.mean() / strat.std() * np.sqrt(ann),
+        "Sortino": strat.mean() / downside.std() * np.sqrt(ann),
+        "Max Drawdown": (equity / equity.cummax() - 1).min()
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 65536])
+def test_accumulator_matches_batch_backtest(chunk_size):
+    df = _features(_prices())
+    expected = _batch_backtest(df["return"], 0.7)
+
+    acc = BacktestAccumulator()
+    acc.update_many(df["return"].to_numpy() * 0.7, chunk_size=chunk_size)
+    got = acc.metrics()
+
+    for key, value in expected.items():
+        assert float(got[key]) == pytest.approx(value, rel=1e-9), key
+
+
+def test_backtest_wrapper_matches_batch():
+    df = _features(_prices())
+    expected = _batch_backtest(df["return"], 0.5)
+    got = backtest(df, 0.5)
+
+    assert got["Sharpe"] == round(expected["Sharpe"], 2)
+    assert got["CAGR"] == round(expected["CAGR"], 2)
+    assert got["Max Drawdown"] == round(expected["Max Drawdown"], 2)
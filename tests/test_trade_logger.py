@@ -0,0 +1,74 @@
+import csv
+
+from explain import Explanation, build_explanation
+from trade_logger import HEADER, log_trade, read_trades
+
+
+def _rows(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def _explanation():
+    return build_explanation(
+        "TCS.NS", "High Volatility", 0.19,
+        {"volatility": 0.31, "max_drawdown": -0.25},
+        {"momentum": 0.001, "volatility": -0.02, "trend": 0.4}
+    )
+
+
+def test_log_keeps_only_the_code(tmp_path):
+    path = str(tmp_path / "trades.csv")
+    explanation = _explanation()
+
+    log_trade("TCS.NS", "High Volatility", "AUTO_TRADE", 0.19,
+              explanation, {"portfolio_value": 100000.0}, log_file=path)
+
+    row = _rows(path)[0]
+    assert list(row) == HEADER
+    assert row["Explanation"] == explanation.encode()
+    assert len(row["Explanation"]) < len(explanation.render())
+
+
+def test_read_trades_renders_the_code(tmp_path):
+    path = str(tmp_path / "trades.csv")
+    explanation = _explanation()
+    for _ in range(3):
+        log_trade("TCS.NS", "High Volatility", "AUTO_TRADE", 0.19,
+                  explanation, {"portfolio_value": 100000.0}, log_file=path)
+
+    rows = read_trades(path, limit=2)
+    assert len(rows) == 2
+    assert isinstance(rows[0]["Explanation"], Explanation)
+    assert str(rows[0]["Explanation"]) == explanation.render()
+
+
+def test_plain_text_explanation(tmp_path):
+    path = str(tmp_path / "trades.csv")
+    log_trade("TCS.NS", "Bull", "AUTO_TRADE", 0.5, "manual note", {},
+              log_file=path)
+
+    assert _rows(path)[0]["Explanation"] == "manual note"
+    assert read_trades(path)[0]["Explanation"] == "manual note"
+
+
+def test_older_log_reads_as_plain_text(tmp_path):
+    path = tmp_path / "trades.csv"
+    sentence = "Market regime detected: Bull. Final equity allocation adjusted to 50%."
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerow(["2026-02-14 22:36:01", "TCS.NS", "Bull",
+                         "AUTO_TRADE", 0.5, sentence, 100000.0])
+
+    log_trade("TCS.NS", "High Volatility", "AUTO_TRADE", 0.19,
+              _explanation(), {"portfolio_value": 1.0}, log_file=str(path))
+
+    old, new = read_trades(str(path))
+    assert old["Explanation"] == sentence
+    assert str(new["Explanation"]) == _explanation().render()
+
+
+def test_repo_log_is_readable():
+    rows = read_trades("logs/trades.csv", limit=5)
+    assert all(isinstance(r["Explanation"], str) for r in rows)
@@ -0,0 +1,94 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_plane import DataPlanePublisher
+from market_data import FakeProvider, ResilientSource
+from universe_engine import SCAN_BARS, ScanSource, scan_universe
+
+
+@pytest.fixture
+def plane():
+    return f"test-scan-{os.getpid()}"
+
+
+def _frame(rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Date": pd.bdate_range("2023-01-02", periods=rows),
+        "Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows))),
+        "Volume": rng.integers(1_000, 10_000, rows).astype(float)
+    })
+
+
+def _source(symbols, plane, **kwargs):
+    provider = FakeProvider(frames={s: _frame(seed=i)
+                                    for i, s in enumerate(symbols)})
+    return ScanSource(ResilientSource(provider), plane=plane,
+                      **kwargs), provider
+
+
+def test_second_scan_is_served_from_the_bar_cache(plane):
+    source, provider = _source(["A", "B"], plane)
+
+    source.fetch("A", bars=SCAN_BARS)
+    source.fetch("A", bars=SCAN_BARS)
+    source.fetch("B", bars=SCAN_BARS)
+
+    assert provider.calls == 2
+    assert source.stats == {"plane": 0, "cache": 1, "network": 2}
+
+
+def test_cache_expires_after_ttl(plane):
+    now = [0.0]
+    source, provider = _source(["A"], plane, ttl=60, clock=lambda: now[0])
+
+    source.fetch("A", bars=50)
+    now[0] = 61
+    source.fetch("A", bars=50)
+    assert provider.calls == 2
+
+
+def test_longer_history_than_cached_goes_to_network(plane):
+    source, provider = _source(["A"], plane)
+    source.fetch("A", bars=50)
+    assert len(source.fetch("A", bars=100)) == 100
+    assert provider.calls == 2
+
+
+def test_data_plane_is_read_before_the_network(plane):
+    source, provider = _source(["A", "B"], plane)
+    assert source.fetch("A", bars=10).shape[0] == 10   # no plane yet
+
+    publisher = DataPlanePublisher(plane)
+    try:
+        published = _frame(seed=99)
+        publisher.publish({"A": published})
+
+        source.begin_cycle()
+        df = source.fetch("A", bars=10)
+        assert df["Close"].tolist() == published["Close"].tail(10).tolist()
+
+        source.fetch("B", bars=10)                      # not published
+        assert provider.calls == 2
+        assert source.stats["plane"] == 1
+    finally:
+        publisher.close()
+
+
+def test_large_scan_from_cache(plane):
+    symbols = [f"S{i}" for i in range(500)]
+    source, provider = _source(symbols, plane)
+
+    first = scan_universe(symbols, data_source=source)
+    t0 = time.perf_counter()
+    second = scan_universe(symbols, data_source=source)
+    elapsed = time.perf_counter() - t0
+
+    assert len(first) == len(second) == 500
+    assert provider.calls == 500
+    assert source.stats["cache"] == 500
+    assert elapsed < 30
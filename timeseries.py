@@ -0,0 +1,243 @@
+import os
+import numpy as np
+
+# ======================================================
+# CONFIG
+# ======================================================
+DEFAULT_CAPACITY = 2048
+DEFAULT_SPILL_CHUNK = 256
+
+SERIES_FIELDS = [
+    "version",
+    "time",
+    "price",
+    "allocation",
+    "volatility",
+    "drawdown",
+    "portfolio_value"
+]
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class RingBuffer:
+    """
+    PURPOSE:
+    Fixed-capacity, NumPy-backed history of live results.
+
+    - append() is O(1) and never allocates after construction
+    - memory is capacity × len(fields) float64, however long it runs
+    - optional spill keeps the full history on disk in raw float64
+      rows, written in chunks, readable back through a memmap
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, fields=SERIES_FIELDS,
+                 spill_path=None, spill_chunk=DEFAULT_SPILL_CHUNK):
+        self.capacity = int(capacity)
+        self.fields = list(fields)
+        self._col = {name: i for i, name in enumerate(self.fields)}
+
+        self._data = np.full((self.capacity, len(self.fields)), np.nan)
+        self._head = 0      # next slot to write
+        self._total = 0     # rows ever appended
+
+        self.spill_path = spill_path
+        self.spill_chunk = min(int(spill_chunk), self.capacity)
+        self._spilled = 0   # rows already on disk
+
+        if spill_path:
+            os.makedirs(os.path.dirname(spill_path) or ".", exist_ok=True)
+
+    def __len__(self):
+        return min(self._total, self.capacity)
+
+    @property
+    def total(self):
+        return self._total
+
+    # ======================================================
+    # WRITE
+    # ======================================================
+    def append(self, row):
+        """
+        row: dict keyed by field name (missing / non-numeric → NaN)
+        """
+        slot = self._data[self._head]
+        for name, i in self._col.items():
+            slot[i] = _to_float(row.get(name))
+
+        self._head = (self._head + 1) % self.capacity
+        self._total += 1
+
+        if self.spill_path and self._total - self._spilled >= self.spill_chunk:
+            self.flush()
+
+    def flush(self):
+        """
+        Write rows not yet on disk. Rows are spilled before they can
+        be overwritten because spill_chunk <= capacity.
+        """
+        if not self.spill_path:
+            return
+
+        pending = self._total - self._spilled
+        if pending <= 0:
+            return
+
+        rows = self._ordered()[-pending:]
+        with open(self.spill_path, "ab") as f:
+            rows.tofile(f)
+        self._spilled = self._total
+
+    # ======================================================
+    # READ
+    # ======================================================
+    def _ordered(self):
+        """
+        Oldest → newest view of the live rows.
+        """
+        if self._total < self.capacity:
+            return self._data[:self._total]
+        return np.concatenate(
+            (self._data[self._head:], self._data[:self._head])
+        )
+
+    def column(self, name):
+        return self._ordered()[:, self._col[name]]
+
+    def latest(self):
+        if self._total == 0:
+            return None
+        return self._row_dict(self._data[(self._head - 1) % self.capacity])
+
+    def since(self, value, field="version"):
+        """
+        Rows whose (monotonic) `field` is strictly greater than value.
+        """
+        rows = self._ordered()
+        start = np.searchsorted(rows[:, self._col[field]], value, side="right")
+        return self._to_records(rows[start:])
+
+    def query(self, start=None, end=None, max_points=None,
+              method="lttb", by="price", field="time"):
+        """
+        Rows with start <= field <= end, downsampled to at most
+        max_points using LTTB or min/max buckets on the `by` column.
+        """
+        rows = self._ordered()
+        key = rows[:, self._col[field]]
+
+        lo = 0 if start is None else np.searchsorted(key, start, side="left")
+        hi = len(rows) if end is None else np.searchsorted(key, end, side="right")
+        rows = rows[lo:hi]
+
+        if max_points and len(rows) > max_points:
+            x = rows[:, self._col[field]]
+            y = rows[:, self._col[by]]
+            if method == "minmax":
+                idx = minmax_indices(y, max_points)
+            else:
+                idx = lttb_indices(x, y, max_points)
+            rows = rows[idx]
+
+        return self._to_records(rows)
+
+    def read_spill(self):
+        """
+        Full spilled history as a read-only memmap (rows × fields).
+        """
+        if not self.spill_path or not os.path.exists(self.spill_path):
+            return np.empty((0, len(self.fields)))
+
+        n_rows = os.path.getsize(self.spill_path) // (8 * len(self.fields))
+        if n_rows == 0:
+            return np.empty((0, len(self.fields)))
+
+        return np.memmap(
+            self.spill_path, dtype=np.float64, mode="r",
+            shape=(n_rows, len(self.fields))
+        )
+
+    # ======================================================
+    # INTERNAL: ROW CONVERSION (JSON SAFE)
+    # ======================================================
+    def _row_dict(self, row):
+        out = {}
+        for name, i in self._col.items():
+            v = row[i]
+            out[name] = None if np.isnan(v) else float(v)
+        if out.get("version") is not None:
+            out["version"] = int(out["version"])
+        return out
+
+    def _to_records(self, rows):
+        return [self._row_dict(r) for r in rows]
+
+
+# ======================================================
+# DOWNSAMPLING
+# ======================================================
+def minmax_indices(y, n_points):
+    """
+    Split into n_points // 2 buckets and keep each bucket's min and
+    max in time order, so spikes survive downsampling.
+    """
+    n = len(y)
+    n_buckets = max(1, n_points // 2)
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+
+    keep = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        bucket = y[lo:hi]
+        if np.all(np.isnan(bucket)):
+            keep.append(lo)
+            continue
+        a = lo + int(np.nanargmin(bucket))
+        b = lo + int(np.nanargmax(bucket))
+        keep.extend(sorted({a, b}))
+
+    return np.asarray(keep, dtype=int)
+
+
+def lttb_indices(x, y, n_points):
+    """
+    Largest-Triangle-Three-Buckets: keeps first and last point and,
+    per bucket, the point forming the largest triangle with the
+    previously kept point and the next bucket's average.
+    """
+    n = len(y)
+    if n_points >= n or n_points < 3:
+        return np.arange(n)
+
+    y = np.where(np.isnan(y), np.nanmean(y) if np.any(~np.isnan(y)) else 0.0, y)
+    edges = np.linspace(1, n - 1, n_points - 1).astype(int)
+
+    keep = np.empty(n_points, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+
+    for i in range(n_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo = hi
+        nxt_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        area = np.abs(
+            (x[a] - avg_x) * (by - y[a])
+            - (x[a] - bx) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
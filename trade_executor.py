@@ -3,15 +3,36 @@ import random
 
 
 class PaperTrader:
-    def __init__(self, initial_capital=100000):
+    def __init__(self, initial_capital=100000, clock=None, seed=None,
+                 journal=None, execution=None):
         self.cash = float(initial_capital)
         self.position = 0   # number of shares (INT)
         self.last_price = None
+        # clock() → datetime; replay passes a deterministic one
+        self.clock = clock or datetime.datetime.now
+        # seeded → reproducible micro-rebalancing jitter
+        self._rng = random.Random(seed)
+        # journal(trader) after every executed trade (portfolio_store)
+        self.journal = journal
+        # execution.ExecutionModel → volume-capped fills with spread /
+        # impact costs; None → instant fills at the close
+        self.execution = execution
+        self.execution_cost = 0.0
 
-    def execute_trade(self, price, target_equity_weight):
+    def restore(self, state):
+        """
+        Resume from a saved {"cash", "position", "price"} state.
+        """
+        self.cash = float(state["cash"])
+        self.position = int(state["position"])
+        self.last_price = state.get("price")
+
+    def execute_trade(self, price, target_equity_weight, volume=None):
         """
         Executes a micro-rebalanced trade to keep the portfolio active.
         This simulates tactical AI adjustments under uncertainty.
+        volume: the bar's traded volume, used by the execution model
+        (partial fills); without it orders fill in full at the close.
         """
 
         # -------------------------
@@ -30,7 +51,7 @@ class PaperTrader:
         # 🔥 MICRO-REBALANCING LOGIC
         # -------------------------
         # Force small buy/sell to show live activity
-        jitter = random.choice([-1, 0, 1])
+        jitter = self._rng.choice([-1, 0, 1])
 
         # Avoid over-trading when flat
         if abs(target_shares - self.position) < 2:
@@ -41,20 +62,38 @@ class PaperTrader:
         target_shares = max(0, min(target_shares, self.position + max_affordable))
 
         delta_shares = target_shares - self.position
+        requested = delta_shares
+        fill_price = price
+
+        if delta_shares != 0 and self.execution is not None \
+                and volume is not None:
+            delta_shares, fill_price = self.execution.fill(
+                delta_shares, price, volume
+            )
+            if delta_shares > 0:
+                # spread / impact can push a buy past the cash left
+                delta_shares = min(delta_shares, int(self.cash // fill_price))
+            if delta_shares != 0:
+                self.execution_cost += abs(delta_shares) * abs(fill_price - price)
 
         # -------------------------
         # EXECUTE TRADE
         # -------------------------
         if delta_shares != 0:
-            self.cash -= delta_shares * price
+            self.cash -= delta_shares * fill_price
             self.position += delta_shares
 
         self.last_price = price
 
+        if delta_shares != 0 and self.journal is not None:
+            self.journal(self)
+
         return {
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": self.clock().isoformat(),
             "price": round(price, 2),
             "shares_traded": int(delta_shares),
+            "shares_requested": int(requested),
+            "fill_price": round(fill_price, 4) if delta_shares else None,
             "position": int(self.position),
             "cash": round(self.cash, 2),
             "portfolio_value": round(
@@ -67,7 +106,7 @@ class PaperTrader:
     # -------------------------
     def snapshot(self):
         return {
-            "timestamp": datetime.datetime.now().isoformat(),
+            "timestamp": self.clock().isoformat(),
             "price": "-" if self.last_price is None else round(self.last_price, 2),
             "shares_traded": 0,
             "position": int(self.position),
@@ -1,38 +1,87 @@
+import argparse
 import csv
 import os
+from collections import deque
 from datetime import datetime
 
-LOG_FILE = "logs/trades.csv"
+from config import TRADE_LOG_FILE
+from explain import Explanation
 
-def log_trade(symbol, regime, action, allocation, explanation, metrics):
+LOG_FILE = TRADE_LOG_FILE
+
+HEADER = [
+    "Time",
+    "Symbol",
+    "Regime",
+    "Action",
+    "Equity Allocation",
+    "Explanation",
+    "Portfolio Value"
+]
+
+
+def log_trade(symbol, regime, action, allocation, explanation, metrics,
+              timestamp=None, log_file=None):
+    """
+    explanation: explain.Explanation, logged in its compact encode()
+    form (rendered by read_trades() only when shown), or plain text.
+    """
+    log_file = log_file or LOG_FILE
     try:
-        os.makedirs("logs", exist_ok=True)
-        file_exists = os.path.isfile(LOG_FILE)
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        file_exists = os.path.isfile(log_file)
 
-        with open(LOG_FILE, "a", newline="") as f:
+        with open(log_file, "a", newline="") as f:
             writer = csv.writer(f)
 
             if not file_exists:
-                writer.writerow([
-                    "Time",
-                    "Symbol",
-                    "Regime",
-                    "Action",
-                    "Equity Allocation",
-                    "Explanation",
-                    "Portfolio Value"
-                ])
+                writer.writerow(HEADER)
 
             writer.writerow([
-                datetime.now().isoformat(),   # SAFE STRING
+                (timestamp or datetime.now()).isoformat(),   # SAFE STRING
                 symbol,
                 regime,
                 action,
                 allocation,
-                explanation,
+                explanation if isinstance(explanation, str)
+                else explanation.encode(),
                 metrics.get("portfolio_value", "")
             ])
 
     except Exception as e:
         # Logging should NEVER crash trading
         print("⚠️ LOGGING ERROR:", e)
+
+
+def read_trades(log_file=None, limit=None):
+    """
+    The last `limit` rows (all when None) as dicts. "Explanation" is
+    decoded back into an explain.Explanation (text is rendered on
+    str()); sentences written by older logs stay plain text.
+    """
+    log_file = log_file or LOG_FILE
+    if not os.path.isfile(log_file):
+        return []
+
+    with open(log_file, newline="") as f:
+        rows = deque(csv.DictReader(f), maxlen=limit)
+
+    for row in rows:
+        row["Explanation"] = Explanation.decode(
+            row["Explanation"], symbol=row["Symbol"], regime=row["Regime"]
+        )
+    return list(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Show the trade log with readable explanations"
+    )
+    parser.add_argument("--log-file", default=LOG_FILE)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    for row in read_trades(args.log_file, args.limit):
+        print(f"{row['Time']} {row['Symbol']} {row['Action']} "
+              f"{row['Equity Allocation']} → {row['Portfolio Value']}")
+        print(f"   {row['Explanation']}")
@@ -1,34 +1,129 @@
+import datetime
+import numpy as np
+import pandas as pd
+
 from utils import (
-    fetch_live_data,
+    bars_per_year,
+    FEATURES,
     compute_features,
     predict_regime,
     allocate,
     pick_best_stock
 )
 
-from risk_engine import apply_risk_controls
+from config import FEATURE_FLAGS, MARKET_BREADTH_WEIGHTING
+from risk_engine import apply_risk_controls, OnlineRiskCalculator
+from portfolio_risk import (
+    RollingCovariance,
+    cached_universe_returns,
+    correlated_shock
+)
+from backtest import BacktestAccumulator
+from market_regime import MarketBreadth
 from trade_executor import PaperTrader
+from execution import ExecutionModel
 from trade_logger import log_trade
+from market_data import ResilientSource
+from replay import data_file_symbol
+from explain import (
+    build_explanation,
+    score_contributions,
+    regime_contributions
+)
+
+
+# model inputs + what pick_best_stock scores on
+ENGINE_FEATURES = FEATURES + ["momentum"]
 
 
 class AITradingEngine:
-    def __init__(self, symbols):
+    def __init__(self, symbols, data_source=None, clock=None,
+                 log_file=None, seed=None, interval="1d", compact=None,
+                 breadth_weighting=None, execution=None, universe=None):
         """
         symbols: list of stock symbols
+        data_source: object with fetch(symbol) → OHLCV frame;
+                     None → Yahoo behind deadlines, retries, a
+                     circuit breaker and a stale-frame cache
+        clock: callable → datetime (None → wall clock)
+        log_file: trade log path (None → trade_logger.LOG_FILE)
+        seed: seeds the paper trader's jitter (replays)
+        interval: bar size ("1d", "5m", "1h", ...) for fetches and
+                  annualization of every risk / backtest metric
+        compact: float32 / categorical frames (None → config flag)
+        breadth_weighting: market regime weighting, "equal" /
+                           "industry" / "cap" (None → config)
+        execution: execution.ExecutionModel for paper fills
+                   (None → default model if ORDER_EXECUTION is on)
+        universe: (dates × symbols) daily returns that widen the
+                  covariance beyond `symbols` (None → data/*.csv when
+                  UNIVERSE_RISK is on and bars are daily; False → off)
         """
         self.symbols = symbols
-        self.trader = PaperTrader()
+        # `is None`: sources may define __len__ (ReplayDataSource)
+        self.data_source = (
+            ResilientSource(interval=interval) if data_source is None
+            else data_source
+        )
+        self.clock = clock or datetime.datetime.now
+        self.log_file = log_file
+        self.interval = interval
+        self.compact = (
+            FEATURE_FLAGS.get("COMPACT_FRAMES", False)
+            if compact is None else compact
+        )
+        annualization = bars_per_year(interval)
+        if execution is None and FEATURE_FLAGS.get("ORDER_EXECUTION", False):
+            execution = ExecutionModel()
+        self.trader = PaperTrader(
+            clock=self.clock, seed=seed, execution=execution
+        )
+
+        # streaming risk state, fed only with bars not seen before
+        self.risk_calcs = {
+            sym: OnlineRiskCalculator(annualization=annualization)
+            for sym in symbols
+        }
+        # universe returns are read on the first cycle, not here:
+        # /live/start must not wait on data/*.csv
+        self._universe = universe
+        self.universe = None
+        self.covariance = None
+
+        # live strategy track record: (symbol, weight) held since the
+        # last cycle is credited with that symbol's new bars only
+        self.backtest_acc = BacktestAccumulator(
+            annualization=annualization
+        )
+        self._held = None
+        self._backtest_date = None
+
+        self.breadth = MarketBreadth(
+            symbols,
+            weighting=breadth_weighting or MARKET_BREADTH_WEIGHTING,
+            index_regime=FEATURE_FLAGS.get("INDEX_REGIME", False)
+        )
 
     def run_cycle(self):
         stock_dfs = {}
+        stale = []
+
+        # sources with versioned snapshots pin one per cycle
+        begin_cycle = getattr(self.data_source, "begin_cycle", None)
+        if begin_cycle is not None:
+            begin_cycle()
 
         # =====================================
         # 1. FETCH + FEATURE ENGINEERING
         # =====================================
         for sym in self.symbols:
-            df = fetch_live_data(sym)
-            df = compute_features(df)
-            df = predict_regime(df)
+            df = self._fetch(sym)
+            if df is not None and df.attrs.get("stale"):
+                stale.append(sym)
+            df = compute_features(
+                df, self.interval, self.compact, ENGINE_FEATURES
+            )
+            df = predict_regime(df, self.compact)
 
             if df is None or df.empty:
                 continue
@@ -37,6 +132,7 @@ class AITradingEngine:
                 continue
 
             stock_dfs[sym] = df
+            self.risk_calcs[sym].update_frame(df)
 
         # HARD FAIL-SAFE
         if not stock_dfs:
@@ -45,10 +141,10 @@ class AITradingEngine:
             )
 
         # =====================================
-        # 2. MARKET REGIME (ANCHOR)
+        # 2. MARKET REGIME (BREADTH OF ALL SYMBOLS)
         # =====================================
-        first_symbol = list(stock_dfs.keys())[0]
-        market_regime = stock_dfs[first_symbol].iloc[-1]["market_state"]
+        market = self.breadth.update(stock_dfs)
+        market_regime = market["regime"]
 
         # =====================================
         # 3. BEST STOCK SELECTION
@@ -58,7 +154,7 @@ class AITradingEngine:
                 stock_dfs, market_regime
             )
         except Exception:
-            best_stock = first_symbol
+            best_stock = next(iter(stock_dfs))
 
         df = stock_dfs[best_stock]
 
@@ -74,7 +170,8 @@ class AITradingEngine:
         except Exception:
             base_weight = 0.0
 
-        risk_ctrl = apply_risk_controls(df, base_weight)
+        calc = self.risk_calcs[best_stock]
+        risk_ctrl = apply_risk_controls(df, base_weight, calc)
         final_weight = risk_ctrl.get(
             "final_weight", base_weight
         )
@@ -84,8 +181,11 @@ class AITradingEngine:
         # =====================================
         try:
             price = float(df.iloc[-1]["Close"])
+            volume = (
+                float(df.iloc[-1]["Volume"]) if "Volume" in df else None
+            )
             trade = self.trader.execute_trade(
-                price, final_weight
+                price, final_weight, volume=volume
             )
         except Exception:
             trade = self.trader.snapshot()
@@ -94,11 +194,23 @@ class AITradingEngine:
         # 6. RISK METRICS (ALWAYS PRESENT)
         # =====================================
         volatility = float(df["volatility"].iloc[-1])
-        max_dd = float(df["drawdown"].min())
+        max_dd = float(calc.max_drawdown)
+
+        if self.covariance is None:
+            self._build_covariance(stock_dfs)
+        self.covariance.update_frames(stock_dfs)
+        # the paper trader holds one position at a time
+        holdings = {best_stock: final_weight}
+        port_vol = self.covariance.portfolio_volatility(holdings)
+        var_95 = self.covariance.parametric_var(holdings, confidence=0.95)
 
         risk = {
             "volatility": round(volatility, 3),
             "max_drawdown": round(max_dd, 3),
+            "portfolio_volatility": (
+                None if np.isnan(port_vol) else round(float(port_vol), 3)
+            ),
+            "var_95": None if np.isnan(var_95) else round(var_95, 4),
             "risk_level": (
                 "HIGH"
                 if volatility > 0.3 or max_dd < -0.2
@@ -109,24 +221,24 @@ class AITradingEngine:
         # =====================================
         # 7. BACKTEST (LEAKAGE-FREE)
         # =====================================
-        strat_equity = (
-            1 + df["return"] * final_weight
-        ).cumprod()
+        self._update_backtest(stock_dfs, df, final_weight)
+        self._held = (best_stock, final_weight)
+
+        # Sharpe / Sortino are per bar (not annualized) like before,
+        # but of the strategy's returns (held weight × the held
+        # symbol's bars), not of the selected stock's raw returns
+        bt = self.backtest_acc.metrics()
+        mean = float(self.backtest_acc.mean)
+        std = float(np.nan_to_num(self.backtest_acc.std))
+        downside_std = float(np.nan_to_num(self.backtest_acc.downside_std))
 
         backtest = {
-    "final_value": round(float(strat_equity.iloc[-1]), 2),
-    "CAGR": round((strat_equity.iloc[-1] ** (252 / len(df)) - 1), 4),
-    "Sharpe": round(df["return"].mean() / (df["return"].std() + 1e-6), 2),
-    "Sortino": round(
-        df["return"].mean() /
-        (df[df["return"] < 0]["return"].std() + 1e-6),
-        2
-    )
-}
-
-
-        
-         
+            "final_value": round(float(bt["equity"]), 2),
+            "CAGR": round(float(bt["CAGR"]), 4),
+            "Sharpe": round(mean / (std + 1e-6), 2),
+            "Sortino": round(mean / (downside_std + 1e-6), 2)
+        }
+
         # ====================================
         # 8. STRESS TEST (SYNTHETIC SHOCK)
         # =====================================
@@ -137,23 +249,41 @@ class AITradingEngine:
             1 + stressed_returns
         ).cumprod()
 
+        # systemic: a market-wide move scaled by this stock's beta
+        # to the whole covariance universe, for the last 30 bars
+        systemic_shock = float(
+            correlated_shock(self.covariance)[best_stock]
+        )
+        systemic_returns = df["return"].copy()
+        systemic_returns.iloc[-30:] = systemic_shock
+        systemic_equity = (1 + systemic_returns).cumprod()
+
         stress = {
             "final_value": round(
                 float(stress_equity.iloc[-1]), 2
             ),
-            "survived": stress_equity.iloc[-1] > 0.7
+            "survived": stress_equity.iloc[-1] > 0.7,
+            "systemic_shock": round(systemic_shock, 4),
+            "systemic_final_value": round(
+                float(systemic_equity.iloc[-1]), 2
+            )
         }
 
         # =====================================
         # 9. EXPLAINABILITY
         # =====================================
-        explanation = (
-            f"{best_stock} selected under {market_regime} regime. "
-            f"Risk-adjusted allocation = {round(final_weight * 100, 0)}%. "
-            f"Volatility={risk['volatility']}, "
-            f"Drawdown={risk['max_drawdown']}."
+        # structured; rendered to text only where it is displayed
+        explanation = build_explanation(
+            best_stock, market_regime, final_weight, risk,
+            score_contributions(df)
         )
 
+        # which features drove the model's regime call for this stock
+        try:
+            regime_drivers = regime_contributions(df, best_stock)
+        except Exception:
+            regime_drivers = None
+
         # =====================================
         # 10. LOG TRADE (NON-BLOCKING)
         # =====================================
@@ -164,7 +294,9 @@ class AITradingEngine:
                 "AUTO_TRADE",
                 final_weight,
                 explanation,
-                trade
+                trade,
+                timestamp=self.clock(),
+                log_file=self.log_file
             )
         except Exception:
             pass
@@ -175,6 +307,7 @@ class AITradingEngine:
         return {
             "best_stock": best_stock,
             "regime": market_regime,
+            "market": market,
             "allocation": final_weight,
             "portfolio": trade,
 
@@ -182,9 +315,92 @@ class AITradingEngine:
             "backtest": backtest,
             "stress": stress,
 
-            "explanation": explanation
+            "explanation": explanation,
+            "reasons": explanation.to_dict(),
+            "regime_drivers": regime_drivers,
+            "data": self._data_status(stale)
+        }
+
+    # =====================================
+    # MARKET DATA
+    # =====================================
+    def _fetch(self, sym):
+        return self.data_source.fetch(sym)
+
+    def _data_status(self, stale):
+        # symbols served from the last good frame this cycle
+        status = getattr(self.data_source, "status", None)
+        return {
+            "stale_symbols": stale,
+            **(status() if status is not None else {})
         }
 
+    # =====================================
+    # UNIVERSE COVARIANCE
+    # =====================================
+    def _universe_frame(self, universe):
+        if universe is False:
+            return None
+        if universe is None:
+            if not FEATURE_FLAGS.get("UNIVERSE_RISK", False):
+                return None
+            if self.interval != "1d":
+                return None          # data/ holds daily bars only
+            try:
+                universe = cached_universe_returns()
+            except OSError:
+                return None
+
+        # data/ file names → this engine's symbols ("TCS" → "TCS.NS")
+        names = {data_file_symbol(s): s for s in self.symbols}
+        return universe.rename(columns=names)
+
+    def _build_covariance(self, stock_dfs):
+        self.universe = self._universe_frame(self._universe)
+        extra = [] if self.universe is None else [
+            s for s in self.universe.columns if s not in self.symbols
+        ]
+        self.covariance = RollingCovariance(
+            list(self.symbols) + extra,
+            annualization=bars_per_year(self.interval)
+        )
+        if self.universe is None:
+            return
+
+        # seeded with universe rows strictly before the first live
+        # bar (no look-ahead in replays)
+        first = min(df["Date"].iloc[0] for df in stock_dfs.values())
+        first = pd.Timestamp(first)
+        if first.tz is not None:
+            first = first.tz_localize(None)
+
+        seed = self.universe[self.universe.index < first]
+        self.covariance.update_frame(seed.tail(self.covariance.window))
+
+    # =====================================
+    # STREAMING BACKTEST FEED
+    # =====================================
+    def _update_backtest(self, stock_dfs, df, final_weight):
+        # first cycle: seed with the history at the current weight
+        if self._held is None:
+            self.backtest_acc.update_many(
+                df["return"].to_numpy() * final_weight
+            )
+            self._backtest_date = df["Date"].iloc[-1]
+            return
+
+        symbol, weight = self._held
+        held_df = stock_dfs.get(symbol)
+        if held_df is None:
+            return
+
+        new = held_df[held_df["Date"] > self._backtest_date]
+        if new.empty:
+            return
+
+        self.backtest_acc.update_many(new["return"].to_numpy() * weight)
+        self._backtest_date = new["Date"].iloc[-1]
+
     # =====================================
     # SAFE EMPTY STATE (NEVER BREAKS UI)
     # =====================================
@@ -192,6 +408,12 @@ class AITradingEngine:
         return {
             "best_stock": "-",
             "regime": "Initializing",
+            "market": {
+                "regime": None,
+                "breadth": {},
+                "symbols": 0,
+                "index_regime": None
+            },
             "allocation": 0.0,
 
             "portfolio": self.trader.snapshot(),
@@ -211,5 +433,7 @@ class AITradingEngine:
                 "survived": True
             },
 
-            "explanation": msg
+            "explanation": msg,
+            "regime_drivers": None,
+            "data": self._data_status([])
         }
@@ -1,40 +1,279 @@
-from utils import fetch_live_data, compute_features, predict_regime
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
 import pandas as pd
 
+from data_plane import PLANE_NAME, DataPlaneReader, SharedMemorySource
+from market_data import ResilientSource
+from utils import (
+    compute_features,
+    predict_regime_rows,
+    history_bars,
+    FEATURES,
+    SCORE_WEIGHTS,
+    SCORE_FEATURES
+)
+
+METADATA_FILE = "data/stock_metadata.csv"
+SYMBOL_SUFFIX = ".NS"
+
+# fallback when the metadata file is missing
 UNIVERSE = [
     "TCS.NS", "INFY.NS", "RELIANCE.NS", "HDFCBANK.NS",
     "ICICIBANK.NS", "ITC.NS", "AXISBANK.NS"
 ]
 
-def scan_universe():
-    rows = []
+CHUNK_SIZE = 25
+MAX_WORKERS = 8
+BAR_CACHE_TTL = 900          # seconds a scanned symbol's bars are reused
+
+# only the latest bar is ranked → fetch just its warm-up
+SCAN_FEATURES = FEATURES + [f for f in SCORE_FEATURES if f not in FEATURES]
+SCAN_BARS = history_bars(SCAN_FEATURES)
+
+COLUMNS = [
+    "symbol", "industry", "price", "regime",
+    "momentum", "volatility", "trend", "score"
+]
+
+
+# ======================================================
+# UNIVERSE DEFINITION
+# ======================================================
+def load_universe(metadata_file=METADATA_FILE, suffix=SYMBOL_SUFFIX):
+    """
+    symbol → industry for every listed stock (NIFTY-50 by default;
+    any metadata file with Symbol / Industry columns works).
+    """
+    if not os.path.exists(metadata_file):
+        return {s: "UNKNOWN" for s in UNIVERSE}
+
+    meta = pd.read_csv(metadata_file, usecols=["Symbol", "Industry"])
+    return {
+        f"{sym}{suffix}": industry
+        for sym, industry in zip(meta["Symbol"], meta["Industry"])
+    }
+
+
+# ======================================================
+# SCAN DATA SOURCE (CHEAPEST FIRST)
+# ======================================================
+class ScanSource:
+    """
+    PURPOSE:
+    Where scans read bars from, cheapest first:
+
+    1. the shared-memory data plane (data_plane.py), when a
+       publisher is running and has the symbol
+    2. bars an earlier scan fetched less than `ttl` seconds ago
+    3. the network, through `upstream` (ResilientSource)
+
+    so a repeated scan of a large universe only pays for symbols
+    that are neither published nor recently fetched.
+    """
+
+    def __init__(self, upstream=None, plane=PLANE_NAME, ttl=BAR_CACHE_TTL,
+                 clock=time.monotonic):
+        self.upstream = upstream or ResilientSource()
+        self.plane = plane
+        self.ttl = ttl
+        self.clock = clock
+
+        self._plane = None
+        self._cache = {}
+        self._lock = threading.Lock()
+        self.stats = {"plane": 0, "cache": 0, "network": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _plane_source(self):
+        # (re)attach lazily: the publisher may start after us
+        if self._plane is None:
+            try:
+                self._plane = SharedMemorySource(DataPlaneReader(self.plane))
+            except FileNotFoundError:
+                return None
+        return self._plane
+
+    def begin_cycle(self):
+        plane = self._plane_source()
+        if plane is not None:
+            plane.begin_cycle()
+        begin_cycle = getattr(self.upstream, "begin_cycle", None)
+        if begin_cycle is not None:
+            begin_cycle()
+
+    def fetch(self, symbol, bars=None):
+        plane = self._plane_source()
+        if plane is not None:
+            df = plane.fetch(symbol, bars)
+            if not df.empty:
+                self._count("plane")
+                return df
+
+        with self._lock:
+            hit = self._cache.get(symbol)
+        if hit is not None and self.clock() - hit[0] < self.ttl and \
+                (bars is None or len(hit[1]) >= bars):
+            self._count("cache")
+            return hit[1].tail(bars) if bars else hit[1]
+
+        self._count("network")
+        df = self.upstream.fetch(symbol, bars=bars)
+        if df is not None and not df.empty and not df.attrs.get("stale"):
+            with self._lock:
+                self._cache[symbol] = (self.clock(), df)
+        return df
+
 
-    for symbol in UNIVERSE:
-        df = fetch_live_data(symbol)
-        df = compute_features(df)
-        df = predict_regime(df)
+_source = None
 
-        if df.empty:
-            continue
 
-        last = df.iloc[-1]
+def _default_source():
+    # one shared source, so the bar cache, breaker state and stale
+    # frames persist across scans
+    global _source
+    if _source is None:
+        _source = ScanSource()
+    return _source
 
-        rows.append({
-            "symbol": symbol,
-            "price": round(last["Close"], 2),
-            "regime": last["market_state"],
-            "momentum": round(df["return"].rolling(20).mean().iloc[-1], 4),
-            "volatility": round(last["volatility"], 4),
-            "trend": round(last["ma_short"] - last["ma_long"], 2)
-        })
 
-    universe_df = pd.DataFrame(rows)
+# ======================================================
+# PER-SYMBOL FEATURES (RUNS IN WORKER THREADS)
+# ======================================================
+def _latest_features(symbol, fetch):
+    df = compute_features(fetch(symbol), features=SCAN_FEATURES)
+    if df is None or df.empty:
+        return None
 
-    universe_df["score"] = (
-        0.6 * universe_df["momentum"]
-        - 0.3 * universe_df["volatility"]
-        + 0.1 * universe_df["trend"]
+    last = df.iloc[-1]
+    return {
+        "symbol": symbol,
+        "price": round(float(last["Close"]), 2),
+        "momentum": round(float(last["momentum"]), 4),
+        "volatility": round(float(last["volatility"]), 4),
+        "trend": round(float(last["trend"]), 2),
+        **{f: float(last[f]) for f in FEATURES}
+    }
+
+
+def _score_rows(rows, industries):
+    """
+    One batched model call for the latest bar of every symbol in
+    the chunk instead of a full-history predict per symbol.
+    """
+    df = pd.DataFrame(rows)
+    df["regime"] = predict_regime_rows(df[FEATURES])
+    df["industry"] = df["symbol"].map(industries).fillna("UNKNOWN")
+    df["score"] = sum(w * df[f] for f, w in SCORE_WEIGHTS.items())
+    return df[COLUMNS]
+
+
+def _rank(parts):
+    if not parts:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(parts, ignore_index=True).sort_values(
+        "score", ascending=False, ignore_index=True
     )
 
-    universe_df = universe_df.sort_values("score", ascending=False)
+
+# ======================================================
+# STREAMING SCAN
+# ======================================================
+def iter_scan(symbols=None, data_source=None, chunk_size=CHUNK_SIZE,
+              max_workers=MAX_WORKERS):
+    """
+    Yields the ranking so far after every completed chunk, so
+    callers can show partial results while the scan continues.
+    """
+    industries = load_universe()
+    if symbols is None:
+        symbols = list(industries)
+
+    if data_source is None:
+        data_source = _default_source()
+
+    def fetch(symbol):
+        return data_source.fetch(symbol, bars=SCAN_BARS)
+
+    begin_cycle = getattr(data_source, "begin_cycle", None)
+    if begin_cycle is not None:
+        begin_cycle()
+
+    chunks = [
+        symbols[i:i + chunk_size]
+        for i in range(0, len(symbols), chunk_size)
+    ]
+    parts = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(
+                lambda chunk: [_latest_features(s, fetch) for s in chunk],
+                chunk
+            )
+            for chunk in chunks
+        ]
+
+        for future in as_completed(futures):
+            try:
+                rows = [r for r in future.result() if r is not None]
+            except Exception as e:
+                print("⚠️ SCAN CHUNK ERROR:", e)
+                continue
+            if rows:
+                parts.append(_score_rows(rows, industries))
+            yield _rank(parts)
+
+
+def scan_universe(symbols=None, data_source=None, chunk_size=CHUNK_SIZE,
+                  max_workers=MAX_WORKERS):
+    """
+    data_source: optional object with fetch(symbol, bars); None →
+    ScanSource: the shared-memory data plane, then bars cached by
+    earlier scans, then Yahoo behind market_data.ResilientSource.
+    """
+    universe_df = pd.DataFrame(columns=COLUMNS)
+    for universe_df in iter_scan(symbols, data_source, chunk_size,
+                                 max_workers):
+        pass
     return universe_df
+
+
+# ======================================================
+# SECTOR AGGREGATION
+# ======================================================
+def sector_summary(universe_df):
+    """
+    Per-industry averages, regime mix (share of symbols per regime)
+    and the top-ranked symbol.
+    """
+    if universe_df is None or universe_df.empty:
+        return pd.DataFrame()
+
+    grouped = universe_df.groupby("industry")
+
+    summary = grouped.agg(
+        symbols=("symbol", "count"),
+        avg_score=("score", "mean"),
+        avg_momentum=("momentum", "mean"),
+        avg_volatility=("volatility", "mean"),
+        top_symbol=("symbol", "first")      # frame is score-sorted
+    )
+
+    regimes = pd.crosstab(
+        universe_df["industry"], universe_df["regime"], normalize="index"
+    ).add_prefix("share_")
+
+    summary = summary.join(regimes).fillna(0.0)
+    summary["dominant_regime"] = (
+        pd.crosstab(universe_df["industry"], universe_df["regime"])
+        .idxmax(axis=1)
+    )
+
+    return summary.sort_values("avg_score", ascending=False)
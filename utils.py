@@ -1,14 +1,97 @@
+import json
+import os
+import threading
+import time
+
 import pandas as pd
 import numpy as np
-import yfinance as yf
-import joblib
+
+from compact import to_compact, regimes_from_codes
+from features import feature, plan_features, history_bars
 
 # ======================================================
-# LOAD TRAINED MODEL ARTIFACTS
+# LOAD TRAINED MODEL ARTIFACTS (HOT-SWAPPABLE)
 # ======================================================
-model = joblib.load("market_state_model.pkl")
-scaler = joblib.load("scaler.pkl")
-encoder = joblib.load("label_encoder.pkl")
+# retrain.py publishes new artifacts into models/<version>/ and then
+# atomically replaces this manifest; running processes notice the
+# change and swap all three artifacts together, no restart needed.
+MODEL_MANIFEST = "model_manifest.json"
+MODEL_CHECK_INTERVAL = 30      # seconds between manifest stats
+
+_artifact_lock = threading.Lock()
+_artifacts = None
+_manifest_mtime = None
+_last_check = 0.0
+model_version = None
+
+
+def read_manifest():
+    if not os.path.exists(MODEL_MANIFEST):
+        return None
+    with open(MODEL_MANIFEST) as f:
+        return json.load(f)
+
+
+def load_artifacts(folder="."):
+    # joblib (and sklearn, on unpickling) only when a model is needed
+    import joblib
+
+    return (
+        joblib.load(os.path.join(folder, "market_state_model.pkl")),
+        joblib.load(os.path.join(folder, "scaler.pkl")),
+        joblib.load(os.path.join(folder, "label_encoder.pkl"))
+    )
+
+
+def get_artifacts(force=False):
+    """
+    (model, scaler, encoder) currently in use, reloading them when
+    the manifest changed since the last check.
+    """
+    global _artifacts, _manifest_mtime, _last_check, model_version
+    global model, scaler, encoder
+
+    now = time.monotonic()
+    if (
+        _artifacts is not None and not force
+        and now - _last_check < MODEL_CHECK_INTERVAL
+    ):
+        return _artifacts
+
+    with _artifact_lock:
+        _last_check = now
+        mtime = (
+            os.path.getmtime(MODEL_MANIFEST)
+            if os.path.exists(MODEL_MANIFEST) else None
+        )
+        if _artifacts is not None and mtime == _manifest_mtime and not force:
+            return _artifacts
+
+        try:
+            manifest = read_manifest()
+            folder = manifest["folder"] if manifest else "."
+            loaded = load_artifacts(folder)
+        except Exception as e:
+            if _artifacts is None:
+                raise
+            print("⚠️ MODEL RELOAD ERROR (keeping current model):", e)
+            return _artifacts
+
+        _artifacts = loaded
+        _manifest_mtime = mtime
+        model_version = manifest["version"] if manifest else "baseline"
+        model, scaler, encoder = loaded
+        print("🧠 MODEL LOADED:", model_version)
+
+    return _artifacts
+
+
+def __getattr__(name):
+    # utils.model / scaler / encoder: loaded on first access, not at
+    # import, so processes that never predict never pay for sklearn
+    if name in ("model", "scaler", "encoder"):
+        return dict(zip(("model", "scaler", "encoder"), get_artifacts()))[name]
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
 
 # ======================================================
 # CONFIG
@@ -16,6 +99,8 @@ encoder = joblib.load("label_encoder.pkl")
 VOL_WINDOW = 20
 SHORT_MA = 20
 LONG_MA = 50
+MOMENTUM_WINDOW = 20
+DRAWDOWN_LOOKBACK = 126        # peak over ≈ the live "6mo" fetch
 
 FEATURES = [
     "return",
@@ -25,70 +110,274 @@ FEATURES = [
     "drawdown"
 ]
 
+# ======================================================
+# BAR FREQUENCY
+# ======================================================
+TRADING_DAYS = 252
+TRADING_MINUTES_PER_DAY = 375      # NSE session 09:15 – 15:30
+SESSION_OPEN = "09:15"             # intraday buckets start here
+
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "10m": 600,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "1h": 3600,
+    "75m": 4500,
+    "90m": 5400,
+    "1d": 86400
+}
+
+# longest history Yahoo serves per interval
+DEFAULT_PERIODS = {
+    "1m": "5d",
+    "2m": "1mo",
+    "5m": "1mo",
+    "10m": "1mo",
+    "15m": "1mo",
+    "30m": "1mo",
+    "60m": "3mo",
+    "1h": "3mo",
+    "75m": "1mo",
+    "90m": "1mo",
+    "1d": "6mo"
+}
+
+# intervals Yahoo does not serve, built from finer bars
+RESAMPLED_FROM = {
+    "10m": "5m",
+    "75m": "15m"        # five equal bars per NSE session
+}
+
+
+def bars_per_year(interval="1d"):
+    """
+    Annualization factor for a bar interval (daily → 252).
+    """
+    if interval == "1d":
+        return TRADING_DAYS
+    if interval not in INTERVAL_SECONDS:
+        raise ValueError(f"Unsupported interval: {interval}")
+
+    bars_per_day = TRADING_MINUTES_PER_DAY * 60 / INTERVAL_SECONDS[interval]
+    return TRADING_DAYS * bars_per_day
+
 # ======================================================
 # LIVE DATA INGESTION (ROBUST)
 # ======================================================
-def fetch_live_data(symbol, period="6mo"):
-    try:
-        df = yf.download(
-            symbol,
-            period=period,
-            progress=False,
-            auto_adjust=False
-        )
+def history_start(bars, interval="1d", now=None):
+    """
+    Earliest date to request so that at least `bars` bars come
+    back (weekends + a holiday allowance on top of trading days).
+    """
+    bars_per_day = bars_per_year(interval) / TRADING_DAYS
+    trading_days = int(np.ceil(bars / bars_per_day))
+    calendar_days = int(np.ceil(trading_days * 7 / 5)) + 10
+    now = now or pd.Timestamp.now()
+    return (now - pd.Timedelta(days=calendar_days)).date()
+
+
+def download_bars(symbol, period=None, interval="1d", bars=None,
+                  timeout=10):
+    """
+    One Yahoo download; raises instead of returning an empty frame
+    (market_data.ResilientSource retries / falls back on that).
+    bars: fetch just this many trailing bars (history_bars() of the
+    features the caller needs) instead of the whole default period.
+    """
+    source = RESAMPLED_FROM.get(interval)
+    if source is not None:
+        ratio = INTERVAL_SECONDS[interval] // INTERVAL_SECONDS[source]
+        df = resample_bars(download_bars(
+            symbol, period, source,
+            None if bars is None else (bars + 1) * ratio, timeout
+        ), interval)
+        return df.tail(bars) if bars is not None else df
+
+    import yfinance as yf
+
+    if bars is not None and period is None:
+        window = {"start": history_start(bars, interval)}
+    else:
+        window = {"period": period or DEFAULT_PERIODS.get(interval, "6mo")}
+
+    df = yf.download(
+        symbol,
+        interval=interval,
+        progress=False,
+        auto_adjust=False,
+        timeout=timeout,
+        **window
+    )
+
+    # 🔥 CRITICAL: flatten MultiIndex columns if present
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    df = df.reset_index()
 
-        # 🔥 CRITICAL: flatten MultiIndex columns if present
-        if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.get_level_values(0)
+    # intraday frames come back indexed by "Datetime"
+    if "Datetime" in df.columns:
+        df = df.rename(columns={"Datetime": "Date"})
 
-        df = df.reset_index()
+    # Ensure required columns exist
+    required = {"Date", "Close", "Volume"}
+    if df.empty or not required.issubset(df.columns):
+        raise ValueError(f"no data returned for {symbol}")
 
-        # Ensure required columns exist
-        required = {"Date", "Close", "Volume"}
-        if not required.issubset(df.columns):
-            return pd.DataFrame()
+    df = df[["Date", "Close", "Volume"]]
+    return df.tail(bars) if bars is not None else df
 
-        return df[["Date", "Close", "Volume"]]
 
+def fetch_live_data(symbol, period=None, interval="1d", bars=None):
+    try:
+        return download_bars(symbol, period, interval, bars)
     except Exception as e:
         print("⚠️ FETCH ERROR:", e)
         return pd.DataFrame()
 
 # ======================================================
-# FEATURE ENGINEERING (NO LEAKAGE, LIVE SAFE)
+# RESAMPLING (1m → 5m → 1h → 1d)
 # ======================================================
-def compute_features(df):
+def resample_bars(df, interval, session_open=SESSION_OPEN):
+    """
+    Aggregate finer bars into `interval` buckets on NumPy arrays:
+    last Close, summed Volume and, when present, first Open /
+    max High / min Low. Only complete-or-current buckets that
+    contain at least one bar are emitted.
+    Intraday buckets are counted from each day's `session_open`
+    (exchange time), so 75m bars are 09:15, 10:30, ... like the
+    exchange's; daily buckets are calendar days.
+    """
     if df is None or df.empty:
         return pd.DataFrame()
 
-    df = df.sort_values("Date").copy()
+    df = df.sort_values("Date")
+    dates = pd.DatetimeIndex(df["Date"])
+    tz = dates.tz
+
+    if tz is not None:
+        dates = dates.tz_localize(None)         # bucket in exchange time
+    epoch = dates.as_unit("s").asi8
+    width = INTERVAL_SECONDS[interval]
+    day = epoch // 86400 * 86400
+    if width >= 86400:
+        bucket = day
+    else:
+        hours, minutes = map(int, session_open.split(":"))
+        origin = day + (hours * 60 + minutes) * 60
+        bucket = origin + (epoch - origin) // width * width
+
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(bucket)] - 1
+
+    out_dates = pd.to_datetime(bucket[starts], unit="s")
+    if tz is not None:
+        out_dates = out_dates.tz_localize(tz)
+
+    out = {"Date": out_dates}
+    if "Open" in df:
+        out["Open"] = df["Open"].to_numpy(dtype=float)[starts]
+    if "High" in df:
+        out["High"] = np.maximum.reduceat(df["High"].to_numpy(dtype=float), starts)
+    if "Low" in df:
+        out["Low"] = np.minimum.reduceat(df["Low"].to_numpy(dtype=float), starts)
+
+    out["Close"] = df["Close"].to_numpy(dtype=float)[ends]
+    if "Volume" in df:
+        out["Volume"] = np.add.reduceat(df["Volume"].to_numpy(dtype=float), starts)
+
+    return pd.DataFrame(out)
 
+# ======================================================
+# FEATURE DEFINITIONS (DAG, see features.py)
+# ======================================================
+@feature("close")
+def _close(df, interval):
     # 🔥 FORCE SERIES (prevents DataFrame assignment bugs)
-    close = df["Close"].astype(float)
+    return df["Close"].astype(float)
 
-    df["return"] = close.pct_change()
 
-    df["volatility"] = (
-        df["return"].rolling(VOL_WINDOW).std() * np.sqrt(252)
-    )
+@feature("return", inputs=["close"], window=2)
+def _return(close, interval):
+    return close.pct_change()
+
+
+@feature("volatility", inputs=["return"], window=VOL_WINDOW)
+def _volatility(ret, interval):
+    return ret.rolling(VOL_WINDOW).std() * np.sqrt(bars_per_year(interval))
+
 
-    df["ma_short"] = close.rolling(SHORT_MA).mean()
-    df["ma_long"] = close.rolling(LONG_MA).mean()
+@feature("ma_short", inputs=["close"], window=SHORT_MA)
+def _ma_short(close, interval):
+    return close.rolling(SHORT_MA).mean()
 
+
+@feature("ma_long", inputs=["close"], window=LONG_MA)
+def _ma_long(close, interval):
+    return close.rolling(LONG_MA).mean()
+
+
+@feature("drawdown", inputs=["close"], lookback=DRAWDOWN_LOOKBACK)
+def _drawdown(close, interval):
     rolling_max = close.cummax()
-    df["drawdown"] = (close - rolling_max) / rolling_max
+    return (close - rolling_max) / rolling_max
+
+
+@feature("momentum", inputs=["return"], window=MOMENTUM_WINDOW)
+def _momentum(ret, interval):
+    return ret.rolling(MOMENTUM_WINDOW).mean()
+
+
+@feature("trend", inputs=["ma_short", "ma_long"])
+def _trend(ma_short, ma_long, interval):
+    return ma_short - ma_long
+
+# ======================================================
+# FEATURE ENGINEERING (NO LEAKAGE, LIVE SAFE)
+# ======================================================
+def compute_features(df, interval="1d", compact=False, features=None):
+    """
+    Windows are counted in bars; volatility is annualized for the
+    bar interval (√252 for daily, √(252 · bars per day) intraday).
+    features: names to compute (default: the model's FEATURES);
+    only those and what they depend on are computed, and the
+    leading warm-up rows are dropped (history_bars() tells how many
+    bars to fetch for a given number of usable rows).
+    compact=True returns the float32 / epoch-date layout (compact.py).
+    """
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    # new columns go on a shallow copy, the caller's frame is untouched
+    if df["Date"].is_monotonic_increasing:
+        df = df.copy(deep=False)
+    else:
+        df = df.sort_values("Date")
+
+    values = plan_features(features or FEATURES).compute(df, interval)
+    for name, series in values.items():
+        df[name] = series
 
     df.dropna(inplace=True)
+
+    if compact:
+        to_compact(df, inplace=True)
     return df
 
 # ======================================================
 # ML REGIME DETECTION (BULLETPROOF)
 # ======================================================
-def predict_regime(df):
+def predict_regime(df, compact=False):
     if df is None or df.empty:
         return df
 
-    X = df[FEATURES].copy()
+    model, scaler, encoder = get_artifacts()
+
+    X = df[FEATURES]
 
     # 🔥 SAFE FEATURE ALIGNMENT (NO ASSERTS)
     expected = list(scaler.feature_names_in_)
@@ -102,10 +391,25 @@ def predict_regime(df):
     preds = model.predict(X_scaled)
 
     # 🔥 STANDARD COLUMN NAME (USED EVERYWHERE)
-    df["market_state"] = encoder.inverse_transform(preds)
+    if compact:
+        df["market_state"] = regimes_from_codes(preds, encoder.classes_)
+    else:
+        df["market_state"] = encoder.inverse_transform(preds)
 
     return df
 
+def predict_regime_rows(X):
+    """
+    Regimes for a batch of feature rows (e.g. the latest bar of
+    many symbols) in a single model call.
+    """
+    if X is None or len(X) == 0:
+        return np.array([], dtype=object)
+
+    model, scaler, encoder = get_artifacts()
+    X = X[list(scaler.feature_names_in_)]
+    return encoder.inverse_transform(model.predict(scaler.transform(X)))
+
 # ======================================================
 # ALLOCATION ENGINE
 # ======================================================
@@ -131,6 +435,15 @@ def allocate(df):
 # ======================================================
 # BEST STOCK SELECTION (FAIL-SAFE)
 # ======================================================
+# stock score = Σ weight · factor (pick_best_stock, universe scan,
+# explanation contributions)
+SCORE_WEIGHTS = {
+    "momentum": 0.6,
+    "volatility": -0.3,
+    "trend": 0.1
+}
+SCORE_FEATURES = list(SCORE_WEIGHTS)
+
 def pick_best_stock(stock_dfs, market_regime):
     scores = []
 
@@ -140,7 +453,10 @@ def pick_best_stock(stock_dfs, market_regime):
 
         latest = df.iloc[-1]
 
-        momentum = df["return"].rolling(20).mean().iloc[-1]
+        momentum = (
+            latest["momentum"] if "momentum" in df
+            else df["return"].rolling(MOMENTUM_WINDOW).mean().iloc[-1]
+        )
         volatility = df["volatility"].iloc[-1]
         trend = latest["ma_short"] - latest["ma_long"]
 
@@ -148,9 +464,9 @@ def pick_best_stock(stock_dfs, market_regime):
             continue
 
         score = (
-            0.6 * momentum
-            - 0.3 * volatility
-            + 0.1 * trend
+            SCORE_WEIGHTS["momentum"] * momentum
+            + SCORE_WEIGHTS["volatility"] * volatility
+            + SCORE_WEIGHTS["trend"] * trend
         )
 
         scores.append({